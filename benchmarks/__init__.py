@@ -0,0 +1,12 @@
+""" Performance benchmarks of pygame_cards.
+
+Benchmarks run headlessly (SDL dummy video driver) and cover deck creation, shuffling,
+grabbing and dropping cards, moving cards between holders, rendering, cards animation,
+scripted Klondike sessions and large-table stress scenarios. Run from the repository root:
+
+    python -m benchmarks                          # run all scenarios, print a table
+    python -m benchmarks -o results.json          # also save machine-readable results
+    python -m benchmarks -c baseline.json         # compare with saved results, exit with
+                                                  # status 1 if any scenario regressed
+    python -m benchmarks --list                   # list scenarios
+"""
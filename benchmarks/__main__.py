@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+""" Runs benchmark scenarios, prints results, saves them to JSON and compares them with
+saved results. See benchmarks/__init__.py for usage.
+"""
+try:
+    import sys
+    import os
+    import argparse
+    import json
+    import platform
+    import time
+
+    from benchmarks import common, scenarios
+    import pygame
+except ImportError as err:
+    print("Fail loading a module in file:", __file__, "\n", err)
+    sys.exit(2)
+
+
+def run(names=None):
+    """ Runs benchmark scenarios.
+    :param names: list of scenario names to run, all scenarios are run if None
+    :return: dictionary with results: {"meta": {...}, "results": {name: result}}
+    """
+    results = dict()
+    for name, scenario in scenarios.SCENARIOS:
+        if names is not None and name not in names:
+            continue
+        for result_name, result in scenario():
+            results[result_name] = result
+            print("%-32s %14.2f us" % (result_name, result["median"]))
+            sys.stdout.flush()
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "seed": common.SEED
+        },
+        "results": results
+    }
+
+
+def compare(current, baseline, threshold):
+    """ Compares results with baseline results and prints the comparison.
+    :param current: dictionary returned by run()
+    :param baseline: dictionary returned by run() for the baseline (e.g. previous release)
+    :param threshold: max allowed ratio of current to baseline time
+    :return: list of names of regressed results
+    """
+    # The minimal time is compared, it's the least affected by other processes
+    regressions = []
+    print("\n%-32s %14s %14s %8s" % ("benchmark", "baseline, us", "current, us", "ratio"))
+    for name in sorted(current["results"]):
+        if name not in baseline["results"]:
+            continue
+        old = baseline["results"][name]["min"]
+        new = current["results"][name]["min"]
+        ratio = new / old if old > 0 else 1.0
+        mark = ""
+        if ratio > threshold:
+            regressions.append(name)
+            mark = " REGRESSION"
+        print("%-32s %14.2f %14.2f %8.2f%s" % (name, old, new, ratio, mark))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="pygame_cards performance benchmarks")
+    parser.add_argument("scenarios", nargs="*", help="names of scenarios to run (default: all)")
+    parser.add_argument("-o", "--output", help="save results to a JSON file")
+    parser.add_argument("-c", "--compare", help="compare results with a saved JSON file, exit "
+                                                "with status 1 if any benchmark regressed")
+    parser.add_argument("-t", "--threshold", type=float, default=1.25,
+                        help="max allowed ratio of current to baseline time (default: 1.25)")
+    parser.add_argument("--list", action="store_true", help="list scenarios and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, scenario in scenarios.SCENARIOS:
+            print("%-20s %s" % (name, " ".join(scenario.__doc__.split())))
+        return 0
+
+    known = [name for name, _ in scenarios.SCENARIOS]
+    for name in args.scenarios:
+        if name not in known:
+            parser.error("unknown scenario: " + name)
+
+    # Scenarios may change the current directory, so paths are resolved before running them
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+    current = run(args.scenarios if len(args.scenarios) > 0 else None)
+    if output is not None:
+        with open(output, "w", encoding="utf-8") as json_file:
+            json.dump(current, json_file, indent=2, sort_keys=True)
+    if baseline_path is not None:
+        with open(baseline_path, "r", encoding="utf-8") as json_file:
+            baseline = json.load(json_file)
+        regressions = compare(current, baseline, args.threshold)
+        if len(regressions) > 0:
+            print("\n%d benchmark(s) regressed by more than %.0f%%" %
+                  (len(regressions), (args.threshold - 1) * 100))
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+""" Helpers shared by benchmark scenarios: headless environment, cards settings and timing. """
+try:
+    import sys
+    import os
+    import timeit
+    import random
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    KLONDIKE_DIR = os.path.join(ROOT_DIR, "examples", "klondike")
+    sys.path.insert(0, os.path.join(ROOT_DIR, "pygame_cards"))
+    import pygame
+    from pygame_cards import card_holder, card_sprite, controller
+except ImportError as err:
+    print("Fail loading a module in file:", __file__, "\n", err)
+    sys.exit(2)
+
+CARD_JSON = {
+    "size": [65, 85],
+    "front_sprite_path": "img/cards/",
+    "back_sprite_file": "img/back-side.png",
+    "move_speed": 80,
+    "atlas_file": ""
+}
+
+# Seed of random generators, so every run works with the same cards layouts
+SEED = 2016
+
+
+class BenchController(controller.Controller):
+    """ Minimal concrete controller for scenarios that don't need a game. """
+
+    def build_objects(self):
+        pass
+
+    def start_game(self):
+        pass
+
+    def process_mouse_event(self, pos, down, double_click):
+        pass
+
+
+def setup_cards(load_images=False):
+    """ Initializes cards settings without creating GameApp.
+    :param load_images: if True, cards' sprites load images (requires a display surface)
+    """
+    card_holder.CardsHolder.card_json = CARD_JSON
+    card_sprite.CardSprite.card_json = CARD_JSON
+    card_sprite.CardSprite.load_images = load_images
+    random.seed(SEED)
+
+
+def init_display(size=(570, 460)):
+    """ Initializes pygame with a (dummy) display, needed for rendering scenarios.
+    :param size: tuple (width, height) of the window
+    :return: display surface
+    """
+    pygame.init()
+    return pygame.display.set_mode(size)
+
+
+def measure(func, number, repeat=5, setup=None):
+    """ Measures execution time of a function.
+    :param func: function without arguments to measure
+    :param number: number of calls in a single measurement
+    :param repeat: number of measurements
+    :param setup: optional function called before each measurement (not measured)
+    :return: dictionary with min, median and mean time of a single call in microseconds
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        times.append(timeit.timeit(func, number=number) / number * 1e6)
+    times.sort()
+    return {
+        "unit": "us",
+        "min": times[0],
+        "median": times[len(times) // 2],
+        "mean": sum(times) / len(times),
+        "number": number,
+        "repeat": repeat
+    }
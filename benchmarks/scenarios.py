@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+""" Benchmark scenarios. Each scenario is a function that yields tuples (name, result), where
+result is a dictionary returned by common.measure(). Scenarios are registered in SCENARIOS.
+"""
+try:
+    import sys
+    import os
+    import random
+
+    from benchmarks import common
+    from pygame_cards import card, card_holder, card_sprite, deck, enums, animation, atlas
+    from pygame_cards import texture_cache
+except ImportError as err:
+    print("Fail loading a module in file:", __file__, "\n", err)
+    sys.exit(2)
+
+_klondike_app = None
+
+
+def get_klondike_app():
+    """ Creates (once) Klondike GameApp with rendering to a dummy display.
+    :return: GameApp object with KlondikeController
+    """
+    global _klondike_app
+    if _klondike_app is None:
+        os.chdir(common.KLONDIKE_DIR)
+        if common.KLONDIKE_DIR not in sys.path:
+            sys.path.insert(0, common.KLONDIKE_DIR)
+        import main
+        from pygame_cards import game_app
+        random.seed(common.SEED)
+        _klondike_app = game_app.GameApp("settings.json", main.KlondikeController())
+        _klondike_app.init_game()
+    return _klondike_app
+
+
+def build_pile(height, inner_offset=(0, 20)):
+    """ Builds a multi-grab pile of face-up cards.
+    :param height: number of cards in the pile
+    :param inner_offset: tuple (x, y) offset between cards
+    :return: CardsHolder object
+    """
+    pile = card_holder.CardsHolder((0, 0), inner_offset, enums.GrabPolicy.can_multi_grab)
+    for i in range(height):
+        pile.add_card(card.Card(i % 4, enums.Rank.two + (i // 4) % 13, (0, 0)))
+    return pile
+
+
+def deck_build():
+    """ Creation of a full deck (52 cards) and of a short deck (36 cards) """
+    common.setup_cards()
+    yield "deck_build.full", common.measure(
+        lambda: deck.Deck(enums.DeckType.full, (0, 0), (0.2, 0)), 200)
+    yield "deck_build.short", common.measure(
+        lambda: deck.Deck(enums.DeckType.short, (0, 0), (0.2, 0)), 200)
+
+
+def deck_shuffle():
+    """ Shuffling of a full deck """
+    common.setup_cards()
+    deck_ = deck.Deck(enums.DeckType.full, (0, 0), (0.2, 0))
+    yield "deck_shuffle.full", common.measure(deck_.shuffle, 500)
+
+
+def grab_drop():
+    """ Grabbing the top card and the whole face-up run from piles of different height with
+    CardsHolder.try_grab_card() and dropping grabbed cards back with add_card(). Latency should
+    not grow faster than the pile height.
+    """
+    common.setup_cards()
+    for height in (13, 52, 208):
+        pile = build_pile(height)
+        for name, index in (("top_card", -1), ("whole_run", 0)):
+            rect = pile.cards[index].get_rect()
+            pos = rect[0] + rect[2] // 2, rect[1] + pile.offset[1] // 2 + 1
+
+            def grab_and_drop():
+                grabbed = pile.try_grab_card(pos)
+                for card_ in reversed(grabbed):
+                    pile.add_card(card_)
+
+            yield ("grab_drop.%s.%d" % (name, height)), common.measure(grab_and_drop, 500)
+
+
+def move_all_cards():
+    """ Moving all cards of two decks between two holders with CardsHolder.move_all_cards() """
+    common.setup_cards()
+    source = card_holder.CardsHolder((0, 0), (0, 20))
+    target = card_holder.CardsHolder((100, 0), (0, 20))
+    for i in range(104):
+        source.add_card(card.Card(i % 4, enums.Rank.two + (i // 4) % 13, (0, 0)))
+
+    def move_there_and_back():
+        source.move_all_cards(target)
+        target.move_all_cards(source)
+
+    yield "move_all_cards.104", common.measure(move_there_and_back, 50)
+
+
+def render_objects():
+    """ Rendering of a dealt Klondike table: Controller.render_objects() and complete frame
+    (GameApp.render(), which also updates objects and renders GUI)
+    """
+    app = get_klondike_app()
+    yield "render_objects.klondike", common.measure(
+        lambda: app.game_controller.render_objects(app.screen), 200)
+    yield "render_frame.klondike", common.measure(app.render, 200)
+
+
+def cards_animation():
+    """ Per-frame cost of cards animation: 28 cards moved as a single group, 28 cards moved
+    by separate concurrent moves (as during dealing of Klondike) and 520 cards moved by
+    concurrent moves, with Animator and with BatchAnimator (if NumPy is installed)
+    """
+    common.setup_cards()
+    cards = [card.Card(i % 4, enums.Rank.two + i // 4, (0, 0)) for i in range(28)]
+    frames = 200
+    state = {}
+
+    def setup_group():
+        state["controller"] = common.BenchController()
+        for card_ in cards:
+            card_.set_pos((0, 0))
+        state["controller"].add_move(cards, (5000, 5000), 1)
+
+    def setup_concurrent():
+        state["controller"] = common.BenchController()
+        for card_ in cards:
+            card_.set_pos((0, 0))
+            state["controller"].add_move([card_], (5000, 5000), 1)
+
+    def frame():
+        state["controller"].update_objects()
+
+    yield "animation.group.28", common.measure(frame, frames, setup=setup_group)
+    yield "animation.concurrent.28", common.measure(frame, frames, setup=setup_concurrent)
+
+    # "Collect all cards" sweep of 10 decks, each card is moved by its own track.
+    # The clock advances by one frame at 60 FPS on each call, so all cards move every frame
+    def frame_clock():
+        state["time"] += 1.0 / 60
+        return state["time"]
+
+    sweep_cards = [card.Card(i % 4, enums.Rank.two + (i // 4) % 13, (0, 0)) for i in range(520)]
+    animators = [("python", animation.Animator)]
+    if animation.numpy is not None:
+        animators.append(("numpy", animation.BatchAnimator))
+    for name, animator_class in animators:
+        def setup_sweep():
+            state["time"] = 0.0
+            state["animator"] = animator_class(frame_clock)
+            for i, card_ in enumerate(sweep_cards):
+                card_.set_pos(((i % 26) * 60, (i // 26) * 40))
+                state["animator"].move([card_], (5000, 5000), 60, "ease_in_out")
+
+        yield ("animation.sweep.%s.520" % name), common.measure(
+            lambda: state["animator"].update(), frames, setup=setup_sweep)
+
+
+def play_klondike_session(app, actions, render):
+    """ Plays a scripted Klondike session: deals cards, then repeatedly clicks the deck,
+    double-clicks top cards (to move them to foundations) and drags cards from the stack and
+    from piles onto other piles.
+    :param app: GameApp object with KlondikeController
+    :param actions: number of deck clicks
+    :param render: boolean, if True a frame is rendered after each action
+    """
+    controller = app.game_controller
+    custom = controller.custom_dict
+    custom["deck"].set_rng(common.SEED)
+    controller.restart_game()
+    deck_rect = custom["deck"].pos[0] + 1, custom["deck"].pos[1] + 1
+    sources = [custom["stack"]] + custom["piles"]
+
+    def click(pos, double_click=False):
+        controller.process_mouse_event(pos, True, False)
+        controller.process_mouse_event(pos, False, double_click)
+        if render:
+            app.render()
+
+    def drag(source, target):
+        face_up = [c for c in source.cards if not c.back_up]
+        if len(face_up) == 0:
+            return
+        rect = face_up[0].get_rect()
+        controller.process_mouse_event((rect[0] + 2, rect[1] + 2), True, False)
+        grabbed = custom["grabbed_cards_holder"]
+        if len(grabbed.cards) == 0:
+            return
+        if len(target.cards) > 0:
+            target_rect = target.cards[-1].get_rect()
+        else:
+            target_rect = target.pos
+        grabbed.cards[0].set_pos((target_rect[0], target_rect[1]))
+        grabbed.update()
+        controller.process_mouse_event((target_rect[0] + 2, target_rect[1] + 2), False, False)
+        if render:
+            app.render()
+
+    for _ in range(actions):
+        click(deck_rect)
+        for source in sources:
+            if len(source.cards) > 0:
+                rect = source.cards[-1].get_rect()
+                click((rect[0] + 2, rect[1] + 2), True)
+        for source in sources:
+            for target in custom["piles"]:
+                if target is not source:
+                    drag(source, target)
+
+
+def klondike_session():
+    """ Scripted Klondike sessions (see play_klondike_session()) with and without rendering """
+    app = get_klondike_app()
+    yield "klondike_session.logic", common.measure(
+        lambda: play_klondike_session(app, 30, False), 3, repeat=3)
+    yield "klondike_session.rendered", common.measure(
+        lambda: play_klondike_session(app, 30, True), 1, repeat=3)
+
+
+def render_modes():
+    """ Scripted Klondike session rendered by each renderer (see GameApp.create_renderer()) """
+    app = get_klondike_app()
+    try:
+        for mode in ("full", "dirty", "layered"):
+            app.renderer = app.create_renderer(mode)
+            yield ("render_modes.%s" % mode), common.measure(
+                lambda: play_klondike_session(app, 30, True), 1, repeat=3)
+    finally:
+        app.renderer = app.create_renderer(app.settings_json["render"]["mode"])
+
+
+def pixel_formats():
+    """ Blitting of all card images (52 fronts and the back side) converted to each pixel format
+    of texture_cache.TextureCache. "opaque" and "colorkey" with alpha_tolerance change
+    antialiased corners of the card fronts, "auto" uses Klondike settings.
+    """
+    app = get_klondike_app()
+    screen = app.screen
+    card_json = app.settings_json["card"]
+    cache = texture_cache.TextureCache
+    images = [cache.load_image(card_sprite.get_img_full_path(path), card_json["size"])
+              for path in atlas.CardAtlas.get_sprite_paths(card_json)]
+    positions = [((i % 13) * 40, (i // 13) * 90) for i in range(len(images))]
+    tolerance = cache.alpha_tolerance
+    try:
+        for name, pixel_format, cache.alpha_tolerance in (
+                ("alpha", "alpha", 0), ("premul", "premultiplied", 0),
+                ("auto", "auto", tolerance), ("colorkey", "auto", 16), ("opaque", "opaque", 0)):
+            surfaces = []
+            for image in images:
+                surface_format = cache.resolve_pixel_format(image, pixel_format)
+                surfaces.append((cache.convert_surface(image, surface_format),
+                                 cache.get_blend_flags(surface_format)))
+
+            def blit_all():
+                for i, (surface, flags) in enumerate(surfaces):
+                    screen.blit(surface, positions[i], None, flags)
+
+            yield ("pixel_formats.blit.%s.53" % name), common.measure(blit_all, 50)
+    finally:
+        cache.alpha_tolerance = tolerance
+
+
+def large_table():
+    """ Stress scenario: 4 full decks dealt to 200 holders. Measures rendering of the table,
+    hit-testing (Controller.card_at()) and grabbing and dropping cards across holders.
+    """
+    get_klondike_app()  # display and cards' images
+    screen = common.init_display((1600, 1200))
+    random.seed(common.SEED)
+    controller = common.BenchController()
+    holders = []
+    for i in range(200):
+        pos = (i % 20) * 80, (i // 20) * 120
+        holder = card_holder.CardsHolder(pos, (0, 6), enums.GrabPolicy.can_multi_grab)
+        holders.append(holder)
+        controller.add_rendered_object(holder)
+    cards = [card.Card(suit, rank, (0, 0))
+             for _ in range(4)
+             for rank in range(enums.Rank.two, enums.Rank.ace + 1)
+             for suit in range(enums.Suit.hearts, enums.Suit.spades + 1)]
+    random.shuffle(cards)
+    for i, card_ in enumerate(cards):
+        holders[i % len(holders)].add_card(card_)
+    points = [(random.randint(0, 1599), random.randint(0, 1199)) for _ in range(1000)]
+
+    def hit_test():
+        for pos in points:
+            controller.card_at(pos)
+
+    def grab_and_drop():
+        for i, source in enumerate(holders):
+            if len(source.cards) == 0:
+                continue
+            rect = source.cards[-1].get_rect()
+            grabbed = source.try_grab_card((rect[0] + 2, rect[1] + 2))
+            if grabbed is not None:
+                target = holders[(i * 7 + 3) % len(holders)]
+                for card_ in reversed(grabbed):
+                    target.add_card(card_)
+
+    yield "large_table.render.200", common.measure(lambda: controller.render_objects(screen), 50)
+    yield "large_table.hit_test.1000", common.measure(hit_test, 20)
+    yield "large_table.grab_drop.200", common.measure(grab_and_drop, 20)
+    common.init_display()
+
+
+# Registered scenarios in the order they are run
+SCENARIOS = [
+    ("deck_build", deck_build),
+    ("deck_shuffle", deck_shuffle),
+    ("grab_drop", grab_drop),
+    ("move_all_cards", move_all_cards),
+    ("render_objects", render_objects),
+    ("animation", cards_animation),
+    ("klondike_session", klondike_session),
+    ("render_modes", render_modes),
+    ("pixel_formats", pixel_formats),
+    ("large_table", large_table),
+]
@@ -62,7 +62,7 @@ class Pile(card_holder.CardsHolder):
     def open_top_card(self):
         """ Flips top card face up. """
         if len(self.cards) > 0 and self.cards[-1].back_up:
-            self.cards[-1].flip()
+            self.flip_card()
 
     def render(self, screen):
         draw_empty_card_pocket(self, screen)
@@ -70,18 +70,20 @@ class Pile(card_holder.CardsHolder):
 
 class GrabbedCardsHolder(card_holder.CardsHolder):
     """Holds cards currently grabbed by the user (ie under the mouse with the button held down)"""
+    render_is_static = False
+
     def add_card(self, card_, on_top=False):
         if isinstance(card_, card.Card):
             if on_top:
                 self.cards.append(card_)
             else:
                 self.cards.insert(0, card_)
+            self.bounds_changed()
 
-    def render(self, screen):
+    def update(self):
         if len(self.cards) > 0:
             self.pos = self.cards[0].get_sprite().pos
             self.update_position(self.offset)
-            _ = screen
 
 
 class DeckDiscard(card_holder.CardsHolder):
@@ -2,10 +2,12 @@
 try:
     import sys
     import os
+    import argparse
     import pygame
 
-    from pygame_cards import game_app, controller, deck, card_holder, enums
+    from pygame_cards import game_app, controller, deck, card_holder, enums, replay
     import holders
+    import solver
 except ImportError as err:
     print("Fail loading a module in file:", __file__, "\n", err)
     sys.exit(2)
@@ -14,6 +16,7 @@ except ImportError as err:
 class KlondikeController(controller.Controller):
 
     def restart_game(self):
+        self.moves.cancel_all()
         self.custom_dict["deck_discard"].move_all_cards(self.custom_dict["deck"])
         self.custom_dict["stack"].move_all_cards(self.custom_dict["deck"])
 
@@ -24,8 +27,7 @@ class KlondikeController(controller.Controller):
             pile.move_all_cards(self.custom_dict["deck"])
 
         if isinstance(self.gui_interface, game_app.GameApp.GuiInterface):
-            self.gui_interface.hide_by_id("win_label1")
-            self.gui_interface.hide_by_id("win_label2")
+            self.hide_messages()
         self.start_game()
 
     def start_game(self):
@@ -33,14 +35,22 @@ class KlondikeController(controller.Controller):
         self.custom_dict["deck"].shuffle()
         #self.deal_cards()
 
+        # Cards are dealt in parallel: each card flies from the deck to its pile
+        deal_delay = 0
         for i in range(1, 8):
             for j in range(0, i):
                 card_ = self.custom_dict["deck"].pop_top_card()
                 if j == i - 1:
                     card_.flip()
 
+                deck_pos = card_.pos
                 self.custom_dict["piles"][i-1].add_card(card_)
+                pile_pos = card_.pos
+                card_.set_pos(deck_pos)
+                self.add_move(card_, pile_pos, easing="ease_out", delay=deal_delay)
+                deal_delay += 0.02
 
+        self.move_log.clear()
         self.custom_dict["game_start_time"] = pygame.time.get_ticks()
 
     def build_objects(self):
@@ -88,9 +98,26 @@ class KlondikeController(controller.Controller):
                                                                               pile_inner_offset)
         self.add_rendered_object(self.custom_dict["grabbed_cards_holder"])
         self.custom_dict["owner_of_grabbed_card"] = None
+        self.enable_move_log()
 
         self.gui_interface.show_button(self.settings_json["gui"]["restart_button"],
                                        self.restart_game, "Restart")
+        self.gui_interface.show_button(self.settings_json["gui"]["hint_button"],
+                                       self.show_hint, "Hint")
+        self.gui_interface.show_button(self.settings_json["gui"]["auto_button"],
+                                       self.auto_complete, "Auto")
+        self.gui_interface.show_button(self.settings_json["gui"]["undo_button"],
+                                       self.undo_action, "Undo")
+        self.gui_interface.show_button(self.settings_json["gui"]["redo_button"],
+                                       self.redo_action, "Redo")
+
+    def state_holders(self):
+        """ Holders saved by save_state(): the discard pile is part of the game state though it
+        isn't rendered, grabbed cards are not.
+        """
+        return ([self.custom_dict["deck"], self.custom_dict["deck_discard"],
+                 self.custom_dict["stack"]] + self.custom_dict["piles"] +
+                self.custom_dict["foundations"])
 
     def check_win(self):
         win = True
@@ -121,16 +148,139 @@ class KlondikeController(controller.Controller):
             self.gui_interface.show_label(position=pos, text=text, text_size=size, timeout=0,
                                           id_="win_label2")
 
+    def start_solver(self, query, callback):
+        """ Runs a solver query in background thread.
+        :param query: string, name of solver.Solver method: "hint" or "auto_complete"
+        :param callback: function called with the game state key and the query result
+        """
+        state = solver.KlondikeState.from_controller(self)
+        self.gui_interface.hide_by_id("hint_label")
+        self.gui_interface.show_label(position=self.settings_json["gui"]["hint_label"],
+                                      text="Thinking...", timeout=0, id_="hint_label")
+        time_budget = self.settings_json.get("solver", {}).get("time_budget", 2.0)
+        solver.SolverThread(state, query, lambda result: callback(state.key, result),
+                            time_budget).start()
+
+    def is_state_changed(self, key):
+        """ Checks if the game state has changed since a solver query was started """
+        return solver.KlondikeState.from_controller(self).key != key
+
+    def show_hint(self):
+        self.start_solver("hint", self.on_hint)
+
+    def on_hint(self, key, result):
+        """ Shows the hint, called from the solver thread """
+        move, solve_result = result
+        with self.state_lock:
+            self.gui_interface.hide_by_id("hint_label")
+            if self.is_state_changed(key):
+                return
+            if move is None:
+                text = "No moves"
+            else:
+                text = "Hint: " + self.describe_move(move)
+                if solve_result.status == solver.Solver.lost:
+                    text += " (no solution)"
+            self.gui_interface.show_label(position=self.settings_json["gui"]["hint_label"],
+                                          text=text, timeout=5, id_="hint_label")
+            self.request_frame()
+
+    def describe_move(self, move):
+        """ Returns text description of a solver move """
+        kind, src, index, dst = move
+        if kind == solver.DRAW:
+            return "click the deck"
+        if kind in (solver.STACK_TO_FOUNDATION, solver.STACK_TO_PILE):
+            card_ = self.custom_dict["stack"].cards[-1]
+        else:
+            card_ = self.custom_dict["piles"][src].cards[index]
+        rank = enums.Rank
+        names = {rank.jack: "jack", rank.queen: "queen", rank.king: "king", rank.ace: "ace"}
+        suits = ("hearts", "diamonds", "clubs", "spades")
+        text = names.get(card_.rank, str(card_.rank)) + " of " + suits[card_.suit]
+        if kind in (solver.STACK_TO_FOUNDATION, solver.PILE_TO_FOUNDATION):
+            return text + " to foundation"
+        return text + " to pile " + str(dst + 1)
+
+    def auto_complete(self):
+        self.start_solver("auto_complete", self.on_auto_complete)
+
+    def on_auto_complete(self, key, moves):
+        """ Plays solution moves, called from the solver thread """
+        with self.state_lock:
+            self.gui_interface.hide_by_id("hint_label")
+            if self.is_state_changed(key):
+                return
+            if moves is None:
+                self.gui_interface.show_label(position=self.settings_json["gui"]["hint_label"],
+                                              text="No solution found", timeout=5,
+                                              id_="hint_label")
+            else:
+                for i, move in enumerate(moves):
+                    self.apply_solver_move(move, i * 0.05)
+                    self.move_log.end_action()
+                self.check_win()
+            self.request_frame()
+
+    def apply_solver_move(self, move, delay=0):
+        """ Plays a solver move with cards animation.
+        :param move: move tuple, see solver.KlondikeState.get_moves()
+        :param delay: delay in seconds before the animation starts
+        """
+        kind, src, index, dst = move
+        if kind == solver.DRAW:
+            self.process_deck_click()
+            return
+        if kind in (solver.STACK_TO_FOUNDATION, solver.STACK_TO_PILE):
+            source = self.custom_dict["stack"]
+            index = len(source.cards) - 1
+        else:
+            source = self.custom_dict["piles"][src]
+        cards = []
+        while len(source.cards) > index:
+            cards.insert(0, source.pop_top_card())
+        if kind in (solver.STACK_TO_PILE, solver.PILE_TO_PILE):
+            target = self.custom_dict["piles"][dst]
+        else:
+            target = [f for f in self.custom_dict["foundations"] if f.can_drop_card(cards[0])][0]
+        for card_ in cards:
+            start_pos = card_.pos
+            target.add_card(card_)
+            dest_pos = card_.pos
+            card_.set_pos(start_pos)
+            self.add_move(card_, dest_pos, delay=delay)
+        if isinstance(source, holders.Pile):
+            source.open_top_card()
+
+    def undo_action(self):
+        if len(self.custom_dict["grabbed_cards_holder"].cards) == 0:
+            self.hide_messages()
+            self.undo()
+
+    def redo_action(self):
+        if len(self.custom_dict["grabbed_cards_holder"].cards) == 0:
+            self.hide_messages()
+            self.redo()
+            self.check_win()
+
+    def hide_messages(self):
+        for id_ in ("win_label1", "win_label2", "hint_label"):
+            self.gui_interface.hide_by_id(id_)
+
     def execute_game(self):
         pass
 
     def process_mouse_event(self, pos, down, double_click=False):
+        # Animations are finished at once, so user always interacts with cards at final positions
+        self.moves.cancel_all(finish=True)
         if down:
             self.process_mouse_down(pos)
         else:
             self.process_mouse_up(pos)
         if double_click:
             self.process_double_click(pos)
+        if len(self.custom_dict["grabbed_cards_holder"].cards) == 0:
+            self.move_log.end_action()
 
     def process_mouse_down(self, pos):
         if self.custom_dict["deck"].is_clicked(pos):
@@ -138,7 +288,7 @@ class KlondikeController(controller.Controller):
             return
 
         if len(self.custom_dict["grabbed_cards_holder"].cards) == 0:
-            for obj in self.rendered_objects:
+            for obj in self.holders_at(pos):
                 grabbed_cards = obj.try_grab_card(pos)
                 if grabbed_cards is not None:
                     for card_ in grabbed_cards:
@@ -148,11 +298,11 @@ class KlondikeController(controller.Controller):
 
     def process_mouse_up(self, pos):
         if len(self.custom_dict["grabbed_cards_holder"].cards) > 0:
-            for obj in self.rendered_objects:
-                dropped_cards = False
-                if hasattr(obj, "can_drop_card") and hasattr(obj, "check_collide"):
-                    if (obj.check_collide(self.custom_dict["grabbed_cards_holder"].cards[0]) and
-                            obj.can_drop_card(self.custom_dict["grabbed_cards_holder"].cards[0])):
+            dropped_cards = False
+            grabbed_rect = self.custom_dict["grabbed_cards_holder"].cards[0].get_rect()
+            for obj in self.drop_targets_for(grabbed_rect):
+                if hasattr(obj, "can_drop_card"):
+                    if obj.can_drop_card(self.custom_dict["grabbed_cards_holder"].cards[0]):
                         dropped_cards = True
                         while len(self.custom_dict["grabbed_cards_holder"].cards) != 0:
                             obj.add_card(self.custom_dict["grabbed_cards_holder"].pop_bottom_card())
@@ -209,8 +359,31 @@ class KlondikeController(controller.Controller):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Klondike")
+    parser.add_argument("--record", metavar="FILE", help="record mouse events to a file")
+    parser.add_argument("--seed", type=int, help="seed of the recorded game")
+    parser.add_argument("--replay", metavar="FILE", help="replay recorded mouse events")
+    parser.add_argument("--mode", choices=["fast", "realtime"], default="realtime",
+                        help="replay events as fast as possible or at recorded times")
+    parser.add_argument("--render", action="store_true",
+                        help="render a frame after each event in fast replay")
+    parser.add_argument("--headless", action="store_true", help="replay without a window")
+    args = parser.parse_args()
+
     json_path = os.path.join(os.getcwd(), 'settings.json')
-    klondike_app = game_app.GameApp(json_path=json_path, game_controller=KlondikeController())
+    klondike_app = game_app.GameApp(json_path=json_path, game_controller=KlondikeController(),
+                                    headless=args.headless)
+    if args.replay is not None:
+        report = replay.replay(klondike_app, args.replay, args.mode, args.render).get_report()
+        print("%d events in %.3f s, %.0f events/sec" %
+              (report["events"], report["elapsed"], report["events_per_sec"]))
+        print("latency, us: min %.1f, median %.1f, p99 %.1f, max %.1f" %
+              (report["latency_min"], report["latency_median"], report["latency_p99"],
+               report["latency_max"]))
+        print("final state matches the recording: " + str(report["state_matched"]))
+        return
+    if args.record is not None:
+        klondike_app.start_recording(args.record, args.seed)
     klondike_app.execute()
 
 if __name__ == '__main__':
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+""" Monte Carlo simulator of Klondike deals: plays seeded deals with a bot policy on the headless
+model of the game (solver.KlondikeState) in a pool of processes, streams results of each deal to
+a JSON Lines file and reports win rates and throughput.
+
+    python simulate.py --deals 100000 --draw 1 3 --policy greedy --output results.jsonl
+
+Deals are numbered as Microsoft FreeCell deals (see Deck.deal_permutation()), so results are
+reproducible on all machines. A custom policy is passed as "module:ClassName", the class should
+derive from BotPolicy.
+"""
+try:
+    import sys
+    import os
+    import time
+    import json
+    import random
+    import argparse
+    import importlib
+    import concurrent.futures
+
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    from pygame_cards import deck
+    import solver
+except ImportError as err:
+    print("Fail loading a module in file:", __file__, "\n", err)
+    sys.exit(2)
+
+
+class BotPolicy(object):
+    """ Base class of bot policies. A new policy object is created for each deal. """
+
+    def __init__(self, rng):
+        """
+        :param rng: random.Random object seeded by the deal number
+        """
+        self.rng = rng
+
+    def choose_move(self, state):
+        """ Chooses the next move.
+        :param state: solver.KlondikeState object, should not be modified
+        :return: move tuple (see solver.KlondikeState.get_moves()) or None to give up
+        """
+        raise NotImplementedError
+
+
+class GreedyPolicy(BotPolicy):
+    """ Plays safe moves to foundations, otherwise the most promising legal move """
+
+    def choose_move(self, state):
+        move = state.get_safe_move()
+        if move is not None:
+            return move
+        moves = state.get_moves()
+        return moves[0] if len(moves) > 0 else None
+
+
+class RandomPolicy(BotPolicy):
+    """ Plays safe moves to foundations, otherwise a random legal move """
+
+    def choose_move(self, state):
+        move = state.get_safe_move()
+        if move is not None:
+            return move
+        moves = state.get_moves()
+        return self.rng.choice(moves) if len(moves) > 0 else None
+
+
+class SolverPolicy(BotPolicy):
+    """ Plays solution found by solver.Solver, plays greedily if a solution is not found """
+
+    time_budget = 1.0
+
+    def __init__(self, rng):
+        BotPolicy.__init__(self, rng)
+        self.plan = None
+
+    def choose_move(self, state):
+        if self.plan is None:
+            result = solver.Solver(SolverPolicy.time_budget).solve(state)
+            self.plan = list(reversed(result.moves))
+        if len(self.plan) > 0:
+            return self.plan.pop()
+        return GreedyPolicy.choose_move(self, state)
+
+
+POLICIES = {
+    "greedy": GreedyPolicy,
+    "random": RandomPolicy,
+    "solver": SolverPolicy
+}
+
+
+def get_policy_class(name):
+    """ Returns policy class by name from POLICIES or by "module:ClassName" string """
+    if name in POLICIES:
+        return POLICIES[name]
+    module_name, _, class_name = name.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def play_deal(deal_number, draw_count, policy_class, max_moves=1000):
+    """ Plays a deal until it's won, the policy gives up or starts looping.
+    :param deal_number: int deal number
+    :param draw_count: number of cards drawn from the deck at once, 3 or 1
+    :param policy_class: class derived from BotPolicy
+    :param max_moves: max number of moves
+    :return: dictionary with result of the deal
+    """
+    state = solver.KlondikeState.from_permutation(deck.Deck.deal_permutation(deal_number),
+                                                  draw_count)
+    policy = policy_class(random.Random(deal_number))
+    visits = dict()
+    moves = 0
+    while not state.is_won() and moves < max_moves:
+        count = visits.get(state.key, 0) + 1
+        if count > 2:
+            break  # The policy goes around in circles
+        visits[state.key] = count
+        move = policy.choose_move(state)
+        if move is None:
+            break
+        state.apply(move)
+        moves += 1
+    return {
+        "deal": deal_number,
+        "draw": draw_count,
+        "won": state.is_won(),
+        "moves": moves,
+        "foundation_cards": sum(state.foundations),
+        "face_down_cards": sum(state.face_down)
+    }
+
+
+def play_chunk(first_deal, count, draw_counts, policy_name, max_moves):
+    """ Plays a range of deals in a worker process.
+    :return: list of dictionaries with results of deals
+    """
+    policy_class = get_policy_class(policy_name)
+    results = []
+    for deal_number in range(first_deal, first_deal + count):
+        for draw_count in draw_counts:
+            results.append(play_deal(deal_number, draw_count, policy_class, max_moves))
+    return results
+
+
+class Statistics(object):
+    """ Accumulates results of deals per draw count """
+
+    def __init__(self):
+        self.games = dict()
+        self.wins = dict()
+        self.moves = dict()
+        self.foundation_cards = dict()
+
+    def add(self, result):
+        draw = result["draw"]
+        self.games[draw] = self.games.get(draw, 0) + 1
+        self.wins[draw] = self.wins.get(draw, 0) + (1 if result["won"] else 0)
+        self.moves[draw] = self.moves.get(draw, 0) + result["moves"]
+        self.foundation_cards[draw] = (self.foundation_cards.get(draw, 0) +
+                                       result["foundation_cards"])
+
+    def report(self):
+        lines = []
+        for draw in sorted(self.games):
+            games = self.games[draw]
+            lines.append("draw %d: %d deals, won %.2f%%, %.1f moves and %.1f foundation cards "
+                         "per deal" % (draw, games, 100.0 * self.wins[draw] / games,
+                                       float(self.moves[draw]) / games,
+                                       float(self.foundation_cards[draw]) / games))
+        return "\n".join(lines)
+
+
+def simulate(first_deal, count, draw_counts, policy_name, workers, output, chunk_size=200,
+             max_moves=1000):
+    """ Plays deals in a pool of processes and streams results to a file.
+    :param first_deal: number of the first deal
+    :param count: number of deals
+    :param draw_counts: list of draw counts, each deal is played with each draw count
+    :param policy_name: name of a policy from POLICIES or "module:ClassName"
+    :param workers: number of worker processes
+    :param output: path to JSON Lines file with results of deals, None to not save results
+    :param chunk_size: number of deals sent to a worker at once
+    :param max_moves: max number of moves in a deal
+    :return: Statistics object
+    """
+    get_policy_class(policy_name)  # Fail early if the policy is not found
+    statistics = Statistics()
+    out = open(output, "w", encoding="utf-8") if output is not None else None
+    start = time.perf_counter()
+    next_deal = first_deal
+    end_deal = first_deal + count
+    done = 0
+    try:
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            pending = set()
+            while next_deal < end_deal or len(pending) > 0:
+                # A few chunks per worker are in flight, so memory doesn't depend on count
+                while next_deal < end_deal and len(pending) < workers * 4:
+                    size = min(chunk_size, end_deal - next_deal)
+                    pending.add(executor.submit(play_chunk, next_deal, size, draw_counts,
+                                                policy_name, max_moves))
+                    next_deal += size
+                finished, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in finished:
+                    for result in future.result():
+                        statistics.add(result)
+                        if out is not None:
+                            out.write(json.dumps(result) + "\n")
+                    done += len(future.result()) // len(draw_counts)
+                if out is not None:
+                    out.flush()
+                elapsed = time.perf_counter() - start
+                sys.stderr.write("\r%d/%d deals, %.0f deals/sec" % (done, count, done / elapsed))
+    finally:
+        if out is not None:
+            out.close()
+    elapsed = time.perf_counter() - start
+    sys.stderr.write("\n")
+    print(statistics.report())
+    print("%.1f s, %.0f deals/sec, %.0f deals/sec/core (%d workers)" %
+          (elapsed, count / elapsed, count / elapsed / workers, workers))
+    return statistics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Klondike deals simulator")
+    parser.add_argument("--start", type=int, default=1, help="number of the first deal")
+    parser.add_argument("--deals", type=int, default=10000, help="number of deals")
+    parser.add_argument("--draw", type=int, nargs="+", default=[3], choices=[1, 3],
+                        help="number of cards drawn from the deck at once (default: 3)")
+    parser.add_argument("--policy", default="greedy",
+                        help="bot policy: " + ", ".join(sorted(POLICIES)) +
+                             " or module:ClassName (default: greedy)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("--output", default="results.jsonl",
+                        help="JSON Lines file with results of deals, '-' to not save results")
+    parser.add_argument("--max-moves", type=int, default=1000, help="max number of moves per deal")
+    args = parser.parse_args()
+    simulate(args.start, args.deals, args.draw, args.policy, args.workers,
+             None if args.output == "-" else args.output, max_moves=args.max_moves)
+
+if __name__ == '__main__':
+    main()
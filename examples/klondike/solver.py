@@ -0,0 +1,503 @@
+#!/usr/bin/env python
+""" Klondike solver: answers "is this deal winnable", "best hint" and "auto-complete" queries.
+
+The solver works on KlondikeState, a compact encoding of the game (cards are ints with codes
+rank << 2 | suit, see Card.code), generates legal moves with the same rules as Pile and
+Foundation holders and KlondikeController.process_deck_click(), and searches with depth-first
+search, pruning and a Zobrist-hashed transposition table of fixed size.
+"""
+try:
+    import sys
+    import time
+    import array
+    import random
+    import threading
+
+    from pygame_cards import enums
+except ImportError as err:
+    print("Fail loading a module in file:", __file__, "\n", err)
+    sys.exit(2)
+
+# Move kinds. A move is a tuple (kind, source pile, index of the first moved card, target pile),
+# unused fields are -1
+DRAW = 0
+STACK_TO_FOUNDATION = 1
+STACK_TO_PILE = 2
+PILE_TO_FOUNDATION = 3
+PILE_TO_PILE = 4
+
+KING = enums.Rank.king
+ACE = enums.Rank.ace
+
+# Zobrist keys: a random 64-bit key for each card in each slot (position in a pile, deck,
+# discard pile or stack), for face-down cards in piles and for each foundation rank
+PILE_SLOTS = 20
+DECK_BASE = 7 * PILE_SLOTS
+DISCARD_BASE = DECK_BASE + 52
+STACK_BASE = DISCARD_BASE + 52
+SLOTS = STACK_BASE + 3
+
+_zobrist_rng = random.Random(0x4b4c4e44)
+ZOBRIST = [[_zobrist_rng.getrandbits(64) for _ in range(SLOTS)] for _ in range(64)]
+ZOBRIST_FACE_DOWN = [_zobrist_rng.getrandbits(64) for _ in range(64)]
+ZOBRIST_FOUNDATION = [[_zobrist_rng.getrandbits(64) for _ in range(14)] for _ in range(4)]
+
+
+def foundation_rank(code):
+    """ Returns rank of a card in foundation order: ace is 1, king is 13 """
+    rank = code >> 2
+    return 1 if rank == ACE else rank
+
+
+def is_red(code):
+    """ Returns True for hearts and diamonds """
+    return (code & 3) in (enums.Suit.hearts, enums.Suit.diamonds)
+
+
+def can_drop_on_pile(pile, code):
+    """ Same rules as holders.Pile.can_drop_card() """
+    if len(pile) == 0:
+        return code >> 2 == KING
+    top = pile[-1]
+    if top >> 2 == ACE:
+        return False
+    return (top >> 2) - (code >> 2) == 1 and is_red(top) != is_red(code)
+
+
+class KlondikeState(object):
+    """ Compact mutable state of a Klondike game.
+    Lists of card codes (top card is the last one): 7 piles with numbers of face-down cards at
+    their bottom, deck, discard pile (cards from the stack waiting for the next pass through the
+    deck) and stack (up to draw_count drawn cards, 3 as in KlondikeController, or 1).
+    Foundations are stored by suit as rank of the top card
+    in foundation order (0 if empty). key is Zobrist hash of the state, updated incrementally.
+    """
+
+    __slots__ = ('piles', 'face_down', 'deck', 'discard', 'stack', 'foundations', 'draw_count',
+                 'key')
+
+    def __init__(self, piles, face_down, deck, discard, stack, foundations, draw_count=3):
+        self.piles = piles
+        self.face_down = face_down
+        self.deck = deck
+        self.discard = discard
+        self.stack = stack
+        self.foundations = foundations
+        self.draw_count = draw_count
+        self.key = self.calc_key()
+
+    @staticmethod
+    def from_controller(controller):
+        """ Encodes state of KlondikeController. Cards grabbed by the user are ignored.
+        :param controller: KlondikeController object
+        :return: KlondikeState object
+        """
+        custom = controller.custom_dict
+        piles = []
+        face_down = []
+        for pile in custom["piles"]:
+            piles.append([card_.code for card_ in pile.cards])
+            count = 0
+            while count < len(pile.cards) and pile.cards[count].back_up:
+                count += 1
+            face_down.append(count)
+        foundations = [0, 0, 0, 0]
+        for foundation in custom["foundations"]:
+            if len(foundation.cards) > 0:
+                code = foundation.cards[-1].code
+                foundations[code & 3] = foundation_rank(code)
+        return KlondikeState(piles, face_down,
+                             [card_.code for card_ in custom["deck"].cards],
+                             [card_.code for card_ in custom["deck_discard"].cards],
+                             [card_.code for card_ in custom["stack"].cards],
+                             foundations)
+
+    def copy(self):
+        return KlondikeState([list(pile) for pile in self.piles], list(self.face_down),
+                             list(self.deck), list(self.discard), list(self.stack),
+                             list(self.foundations), self.draw_count)
+
+    def calc_key(self):
+        """ Calculates Zobrist hash of the state from scratch """
+        key = self.talon_key()
+        for p, pile in enumerate(self.piles):
+            base = p * PILE_SLOTS
+            for i, code in enumerate(pile):
+                key ^= ZOBRIST[code][base + i]
+                if i < self.face_down[p]:
+                    key ^= ZOBRIST_FACE_DOWN[code]
+        for suit, rank in enumerate(self.foundations):
+            key ^= ZOBRIST_FOUNDATION[suit][rank]
+        return key
+
+    def talon_key(self):
+        """ Calculates part of Zobrist hash for the deck, discard pile and stack """
+        key = 0
+        for i, code in enumerate(self.deck):
+            key ^= ZOBRIST[code][DECK_BASE + i]
+        for i, code in enumerate(self.discard):
+            key ^= ZOBRIST[code][DISCARD_BASE + i]
+        for i, code in enumerate(self.stack):
+            key ^= ZOBRIST[code][STACK_BASE + i]
+        return key
+
+    @staticmethod
+    def from_permutation(permutation, draw_count=3):
+        """ Deals cards as KlondikeController.start_game() does.
+        :param permutation: list of card codes in the order they are dealt, e.g. returned by
+                            Deck.deal_permutation()
+        :param draw_count: number of cards drawn from the deck at once, 3 or 1
+        :return: KlondikeState object
+        """
+        cards = iter(permutation)
+        piles = [[next(cards) for _ in range(i)] for i in range(1, 8)]
+        deck = list(cards)
+        deck.reverse()
+        return KlondikeState(piles, [len(pile) - 1 for pile in piles], deck, [], [],
+                             [0, 0, 0, 0], draw_count)
+
+    def is_won(self):
+        return self.foundations == [13, 13, 13, 13]
+
+    def can_drop_on_foundation(self, code):
+        """ Same rules as holders.Foundation.can_drop_card() """
+        return self.foundations[code & 3] == foundation_rank(code) - 1
+
+    def is_safe_for_foundation(self, code):
+        """ Checks if a card can be moved to a foundation without losing a solution: it can't be
+        needed in piles if all cards of the opposite color and lower rank are on foundations.
+        """
+        rank = foundation_rank(code)
+        if not self.can_drop_on_foundation(code):
+            return False
+        if rank <= 2:
+            return True
+        if is_red(code):
+            opposite = (enums.Suit.clubs, enums.Suit.spades)
+        else:
+            opposite = (enums.Suit.hearts, enums.Suit.diamonds)
+        return (self.foundations[opposite[0]] >= rank - 1 and
+                self.foundations[opposite[1]] >= rank - 1)
+
+    def get_safe_move(self):
+        """ Returns a move to a foundation that can be played without searching alternatives.
+        :return: move tuple or None
+        """
+        for p, pile in enumerate(self.piles):
+            if len(pile) > 0 and self.is_safe_for_foundation(pile[-1]):
+                return PILE_TO_FOUNDATION, p, len(pile) - 1, -1
+        if len(self.stack) > 0 and self.is_safe_for_foundation(self.stack[-1]):
+            return STACK_TO_FOUNDATION, -1, -1, -1
+        return None
+
+    def get_moves(self):
+        """ Generates legal moves, the most promising first. Moves that can't help are pruned:
+        pile to pile moves of a part of a face-up run that don't expose a card playable to
+        a foundation, moves of a king from the bottom of a pile and moves to the second empty pile.
+        :return: list of move tuples
+        """
+        piles = self.piles
+        moves = []
+        for p, pile in enumerate(piles):
+            if len(pile) > 0 and self.can_drop_on_foundation(pile[-1]):
+                moves.append((PILE_TO_FOUNDATION, p, len(pile) - 1, -1))
+        if len(self.stack) > 0 and self.can_drop_on_foundation(self.stack[-1]):
+            moves.append((STACK_TO_FOUNDATION, -1, -1, -1))
+
+        empty_pile = -1
+        for p, pile in enumerate(piles):
+            if len(pile) == 0:
+                empty_pile = p
+                break
+
+        # Moves that reveal more face-down cards are tried first
+        pile_moves = []
+        for src, pile in enumerate(piles):
+            first = self.face_down[src]
+            for index in range(first, len(pile)):
+                code = pile[index]
+                if index == first:
+                    if index == 0 and code >> 2 == KING:
+                        continue
+                elif not self.can_drop_on_foundation(pile[index - 1]):
+                    continue
+                for dst, target in enumerate(piles):
+                    if dst == src or (len(target) == 0 and dst != empty_pile):
+                        continue
+                    if can_drop_on_pile(target, code):
+                        pile_moves.append((-first, (PILE_TO_PILE, src, index, dst)))
+        pile_moves.sort(key=lambda item: item[0])
+        moves.extend(move for _, move in pile_moves)
+
+        if len(self.stack) > 0:
+            code = self.stack[-1]
+            for dst, target in enumerate(piles):
+                if len(target) == 0 and dst != empty_pile:
+                    continue
+                if can_drop_on_pile(target, code):
+                    moves.append((STACK_TO_PILE, -1, -1, dst))
+
+        if len(self.deck) > 0 or len(self.discard) > 0 or len(self.stack) > 0:
+            moves.append((DRAW, -1, -1, -1))
+        return moves
+
+    def open_top_card(self, p):
+        """ Flips top card of a pile face up (as holders.Pile.open_top_card() does).
+        :return: True if the card was flipped
+        """
+        pile = self.piles[p]
+        if len(pile) > 0 and self.face_down[p] == len(pile):
+            self.face_down[p] -= 1
+            self.key ^= ZOBRIST_FACE_DOWN[pile[-1]]
+            return True
+        return False
+
+    def add_to_foundation(self, code):
+        suit = code & 3
+        rank = self.foundations[suit]
+        self.key ^= ZOBRIST_FOUNDATION[suit][rank] ^ ZOBRIST_FOUNDATION[suit][rank + 1]
+        self.foundations[suit] = rank + 1
+
+    def remove_from_foundation(self, code):
+        suit = code & 3
+        rank = self.foundations[suit]
+        self.key ^= ZOBRIST_FOUNDATION[suit][rank] ^ ZOBRIST_FOUNDATION[suit][rank - 1]
+        self.foundations[suit] = rank - 1
+
+    def draw(self):
+        """ Same as KlondikeController.process_deck_click() """
+        self.key ^= self.talon_key()
+        self.discard.extend(self.stack)
+        del self.stack[:]
+        if len(self.deck) == 0:
+            self.discard.reverse()
+            self.deck, self.discard = self.discard, self.deck
+        else:
+            for _ in range(self.draw_count):
+                if len(self.deck) == 0:
+                    break
+                self.stack.append(self.deck.pop())
+        self.key ^= self.talon_key()
+
+    def apply(self, move):
+        """ Plays a move.
+        :param move: move tuple
+        :return: undo information that should be passed to undo()
+        """
+        kind, src, index, dst = move
+        if kind == DRAW:
+            undo = list(self.deck), list(self.discard), list(self.stack), self.key
+            self.draw()
+            return undo
+        if kind == STACK_TO_FOUNDATION:
+            code = self.stack.pop()
+            self.key ^= ZOBRIST[code][STACK_BASE + len(self.stack)]
+            self.add_to_foundation(code)
+            return code
+        if kind == STACK_TO_PILE:
+            code = self.stack.pop()
+            target = self.piles[dst]
+            self.key ^= (ZOBRIST[code][STACK_BASE + len(self.stack)] ^
+                         ZOBRIST[code][dst * PILE_SLOTS + len(target)])
+            target.append(code)
+            return code
+        pile = self.piles[src]
+        if kind == PILE_TO_FOUNDATION:
+            code = pile.pop()
+            self.key ^= ZOBRIST[code][src * PILE_SLOTS + len(pile)]
+            self.add_to_foundation(code)
+            return self.open_top_card(src), code
+        target = self.piles[dst]
+        src_base = src * PILE_SLOTS + index
+        dst_base = dst * PILE_SLOTS + len(target)
+        for k in range(len(pile) - index):
+            code = pile[index + k]
+            self.key ^= ZOBRIST[code][src_base + k] ^ ZOBRIST[code][dst_base + k]
+        target.extend(pile[index:])
+        count = len(pile) - index
+        del pile[index:]
+        return self.open_top_card(src), count
+
+    def undo(self, move, undo):
+        """ Takes back a move played by apply().
+        :param move: move tuple
+        :param undo: value returned by apply()
+        """
+        kind, src, index, dst = move
+        if kind == DRAW:
+            self.deck, self.discard, self.stack, self.key = undo
+        elif kind == STACK_TO_FOUNDATION:
+            self.remove_from_foundation(undo)
+            self.key ^= ZOBRIST[undo][STACK_BASE + len(self.stack)]
+            self.stack.append(undo)
+        elif kind == STACK_TO_PILE:
+            target = self.piles[dst]
+            target.pop()
+            self.key ^= (ZOBRIST[undo][STACK_BASE + len(self.stack)] ^
+                         ZOBRIST[undo][dst * PILE_SLOTS + len(target)])
+            self.stack.append(undo)
+        else:
+            flipped, value = undo
+            pile = self.piles[src]
+            if flipped:
+                self.face_down[src] += 1
+                self.key ^= ZOBRIST_FACE_DOWN[pile[-1]]
+            if kind == PILE_TO_FOUNDATION:
+                self.remove_from_foundation(value)
+                self.key ^= ZOBRIST[value][src * PILE_SLOTS + len(pile)]
+                pile.append(value)
+            else:
+                target = self.piles[dst]
+                start = len(target) - value
+                src_base = src * PILE_SLOTS + index
+                dst_base = dst * PILE_SLOTS + start
+                for k in range(value):
+                    code = target[start + k]
+                    self.key ^= ZOBRIST[code][src_base + k] ^ ZOBRIST[code][dst_base + k]
+                pile.extend(target[start:])
+                del target[start:]
+
+
+class SearchTimeout(Exception):
+    """ Raised when search exceeds its time budget """
+    pass
+
+
+class SolveResult(object):
+    """ Result of a search.
+
+    Attributes:
+        status - Solver.won if a solution is found, Solver.lost if the search is completed
+                 without a solution, Solver.unknown if the time budget is exceeded
+        moves - list of moves of the solution (empty if there is no solution)
+        nodes - number of searched states
+        elapsed - search time in seconds
+    """
+
+    def __init__(self, status, moves, nodes, elapsed):
+        self.status = status
+        self.moves = moves
+        self.nodes = nodes
+        self.elapsed = elapsed
+
+
+class Solver(object):
+    """ Depth-first search of a solution with a transposition table.
+    The table is a fixed-size array of Zobrist keys of visited states (a newer state replaces
+    an older one with the same index), so memory doesn't grow with the search.
+    "lost" status means that there is no solution within pruning rules of
+    KlondikeState.get_moves() and the depth limit.
+    """
+
+    won = "won"
+    lost = "lost"
+    unknown = "unknown"
+
+    def __init__(self, time_budget=2.0, table_bits=18, max_depth=400):
+        """
+        :param time_budget: max search time in seconds
+        :param table_bits: size of the transposition table is 2 ** table_bits entries (8 bytes
+                           each)
+        :param max_depth: max number of moves in a solution
+        """
+        self.time_budget = time_budget
+        self.table_bits = table_bits
+        self.max_depth = max_depth
+        self.table = None
+        self.path = []
+        self.nodes = 0
+        self.deadline = 0
+        self.depth_limited = False
+
+    def solve(self, state):
+        """ Searches for a solution.
+        :param state: KlondikeState object, is not modified
+        :return: SolveResult object
+        """
+        start = time.perf_counter()
+        self.table = array.array('Q', bytes(8 << self.table_bits))
+        self.path = []
+        self.nodes = 0
+        self.deadline = start + self.time_budget
+        self.depth_limited = False
+        try:
+            if self.search(state.copy(), 0):
+                status = Solver.won
+            elif self.depth_limited:
+                status = Solver.unknown
+            else:
+                status = Solver.lost
+        except SearchTimeout:
+            status = Solver.unknown
+        moves = list(self.path) if status == Solver.won else []
+        self.table = None
+        return SolveResult(status, moves, self.nodes, time.perf_counter() - start)
+
+    def search(self, state, depth):
+        if state.is_won():
+            return True
+        self.nodes += 1
+        if (self.nodes & 1023) == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        if depth >= self.max_depth:
+            self.depth_limited = True
+            return False
+        index = state.key & ((1 << self.table_bits) - 1)
+        if self.table[index] == state.key:
+            return False
+        self.table[index] = state.key
+
+        safe_move = state.get_safe_move()
+        moves = [safe_move] if safe_move is not None else state.get_moves()
+        for move in moves:
+            undo = state.apply(move)
+            self.path.append(move)
+            if self.search(state, depth + 1):
+                return True
+            self.path.pop()
+            state.undo(move, undo)
+        return False
+
+    def hint(self, state):
+        """ Returns the best move: the first move of a solution, or the most promising legal move
+        if a solution is not found.
+        :param state: KlondikeState object
+        :return: tuple (move or None if there are no moves, SolveResult object)
+        """
+        result = self.solve(state)
+        if result.status == Solver.won and len(result.moves) > 0:
+            return result.moves[0], result
+        moves = state.get_moves()
+        return (moves[0] if len(moves) > 0 else None), result
+
+    def auto_complete(self, state):
+        """ Returns moves that finish the game.
+        :param state: KlondikeState object
+        :return: list of moves, None if a solution is not found
+        """
+        result = self.solve(state)
+        if result.status == Solver.won:
+            return result.moves
+        return None
+
+
+class SolverThread(threading.Thread):
+    """ Runs a query of a new Solver in background, so the UI thread is not blocked. """
+
+    def __init__(self, state, query, callback, time_budget=2.0, table_bits=18):
+        """
+        :param state: KlondikeState object, copied before the thread starts
+        :param query: string, name of Solver method: "solve", "hint" or "auto_complete"
+        :param callback: function called from the solver thread with the query result
+        :param time_budget: max search time in seconds
+        :param table_bits: size of the transposition table is 2 ** table_bits entries
+        """
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.state = state.copy()
+        self.query = query
+        self.callback = callback
+        self.solver = Solver(time_budget, table_bits)
+
+    def run(self):
+        self.callback(getattr(self.solver, self.query)(self.state))
@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+try:
+    import sys
+    import math
+    import time
+except ImportError as err:
+    print("Fail loading a module in file:", __file__, "\n", err)
+    sys.exit(2)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # Optional, BatchAnimator is used only if NumPy is installed
+
+
+def linear(t):
+    """ Constant speed """
+    return t
+
+
+def ease_in(t):
+    """ Accelerates from zero speed """
+    return t * t
+
+
+def ease_out(t):
+    """ Decelerates to zero speed """
+    return t * (2.0 - t)
+
+
+def ease_in_out(t):
+    """ Accelerates, then decelerates """
+    return t * t * (3.0 - 2.0 * t)
+
+
+# Easing curves: functions that map animation progress [0, 1] to position progress [0, 1]
+EASINGS = {
+    "linear": linear,
+    "ease_in": ease_in,
+    "ease_out": ease_out,
+    "ease_in_out": ease_in_out
+}
+
+# Coefficients (a, b, c) of easing curves as polynomials a*t + b*t^2 + c*t^3,
+# used to evaluate easing of many cards at once
+EASING_POLYNOMIALS = {
+    linear: (1.0, 0.0, 0.0),
+    ease_in: (0.0, 1.0, 0.0),
+    ease_out: (2.0, -1.0, 0.0),
+    ease_in_out: (0.0, 3.0, -2.0)
+}
+
+
+class Track(object):
+    """ Animation of cards moving to a destination position during fixed time.
+    Position of each card is interpolated between its start position and the destination,
+    so the animation takes the same time regardless of frame rate.
+    """
+
+    __slots__ = ('cards', 'start_positions', 'dest_pos', 'start_time', 'duration', 'easing',
+                 'on_complete')
+
+    def __init__(self, cards, dest_pos, start_time, duration, easing=linear, on_complete=None):
+        """
+        :param cards: list of Card objects to be moved
+        :param dest_pos: tuple with coordinates (x,y) of destination position
+        :param start_time: time in seconds when the animation starts
+        :param duration: duration of the animation in seconds
+        :param easing: easing function, see EASINGS
+        :param on_complete: function without arguments called when the animation is completed
+        """
+        self.cards = list(cards)
+        self.start_positions = [card_.pos for card_ in self.cards]
+        self.dest_pos = dest_pos
+        self.start_time = start_time
+        self.duration = duration
+        self.easing = easing
+        self.on_complete = on_complete
+
+    def update(self, now):
+        """ Moves cards to positions that correspond to the time.
+        :param now: current time in seconds
+        :return: True if the animation is completed, False otherwise
+        """
+        elapsed = now - self.start_time
+        if elapsed < 0:
+            return False
+        if elapsed >= self.duration:
+            self.finish()
+            return True
+        k = self.easing(elapsed / self.duration)
+        dest_x, dest_y = self.dest_pos
+        for card_, start in zip(self.cards, self.start_positions):
+            card_.set_pos((start[0] + (dest_x - start[0]) * k, start[1] + (dest_y - start[1]) * k))
+        return False
+
+    def finish(self):
+        """ Moves cards to the destination position """
+        for card_ in self.cards:
+            card_.set_pos(self.dest_pos)
+
+    def remove_card(self, card_):
+        """ Stops animation of a card, the card stays where it is.
+        :param card_: Card object
+        """
+        index = self.cards.index(card_)
+        del self.cards[index]
+        del self.start_positions[index]
+
+
+class Animator(object):
+    """ Runs many concurrent cards animations (tracks). Cost of update() depends only on the
+    number of active tracks. A card can be moved by a single track at a time: when a new track
+    moves a card, the card is removed from its previous track. A track which cards were all
+    taken over by newer tracks is completed (its completion callback is called) on the next
+    update().
+
+    Attributes:
+        reference_fps - frame rate used to convert speed in pixels per frame to duration
+        enabled - if False, animations complete immediately (used in headless mode)
+    """
+
+    reference_fps = 60
+    enabled = True
+
+    def __init__(self, clock=time.perf_counter):
+        """
+        :param clock: function that returns current time in seconds
+        """
+        self.clock = clock
+        self.tracks = []
+        self.card_tracks = dict()  # card -> track that moves it
+
+    def __len__(self):
+        return len(self.tracks)
+
+    @staticmethod
+    def get_duration(cards, dest_pos, speed):
+        """ Calculates duration of a move with the speed in pixels per frame at reference_fps.
+        :param cards: list of Card objects
+        :param dest_pos: tuple with coordinates (x,y) of destination position
+        :param speed: number of pixels per frame
+        :return: duration in seconds
+        """
+        distance = 0
+        for card_ in cards:
+            pos = card_.pos
+            distance = max(distance, math.hypot(dest_pos[0] - pos[0], dest_pos[1] - pos[1]))
+        return distance / (max(speed, 1) * Animator.reference_fps)
+
+    def move(self, cards, dest_pos, duration, easing="linear", on_complete=None, delay=0):
+        """ Starts animation of cards moving to a destination position.
+        :param cards: list of Card objects to be moved
+        :param dest_pos: tuple with coordinates (x,y) of destination position
+        :param duration: duration of the animation in seconds
+        :param easing: name of easing curve from EASINGS or easing function
+        :param on_complete: function without arguments called when the animation is completed
+        :param delay: delay in seconds before the animation starts
+        :return: Track object that can be passed to cancel()
+        """
+        if not callable(easing):
+            easing = EASINGS[easing]
+        track = Track(cards, dest_pos, self.clock() + delay, duration, easing, on_complete)
+        for card_ in track.cards:
+            previous = self.card_tracks.get(card_)
+            if previous is not None:
+                previous.remove_card(card_)
+            self.card_tracks[card_] = track
+        self.tracks.append(track)
+        self.tracks_changed()
+        if not Animator.enabled or duration <= 0:
+            self.cancel(track, finish=True)
+        return track
+
+    def update(self, now=None):
+        """ Advances all animations. Completion callbacks are called after all cards are moved.
+        :param now: current time in seconds, the clock is used if None
+        """
+        if len(self.tracks) == 0:
+            return
+        if now is None:
+            now = self.clock()
+        completed = []
+        active = []
+        for track in self.tracks:
+            if len(track.cards) == 0:
+                completed.append(track)  # All cards were taken over by other tracks
+                continue
+            if track.update(now):
+                completed.append(track)
+            else:
+                active.append(track)
+        self.tracks = active
+        if len(completed) > 0:
+            self.tracks_changed()
+        for track in completed:
+            self.release(track)
+            if track.on_complete is not None:
+                track.on_complete()
+
+    def tracks_changed(self):
+        """ Called when tracks are added, completed or cancelled. Does nothing by default. """
+        pass
+
+    def release(self, track):
+        """ Forgets cards moved by a track """
+        for card_ in track.cards:
+            if self.card_tracks.get(card_) is track:
+                del self.card_tracks[card_]
+
+    def cancel(self, track, finish=False):
+        """ Stops an animation.
+        :param track: Track object returned by move()
+        :param finish: if True, cards are moved to the destination and completion callback is
+                       called, otherwise cards stay where they are
+        """
+        if track in self.tracks:
+            self.tracks.remove(track)
+            self.tracks_changed()
+            self.release(track)
+            if finish:
+                track.finish()
+                if track.on_complete is not None:
+                    track.on_complete()
+
+    def cancel_all(self, finish=False):
+        """ Stops all animations.
+        :param finish: if True, cards are moved to destinations and completion callbacks are
+                       called, otherwise cards stay where they are
+        """
+        for track in list(self.tracks):
+            self.cancel(track, finish)
+
+
+class BatchAnimator(Animator):
+    """ Animator that keeps start positions, destinations and timing of all moving cards in
+    NumPy arrays and calculates positions of all cards in one vectorized step per frame.
+    Positions are rounded to pixels and written back only to cards which pixel position has
+    changed. Tracks with custom easing functions are updated one by one, as in Animator.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        """
+        :param clock: function that returns current time in seconds
+        """
+        Animator.__init__(self, clock)
+        self.batch = None  # Arrays of the batched cards, rebuilt when tracks change
+
+    def tracks_changed(self):
+        self.batch = None
+
+    def build_batch(self):
+        """ Collects cards of tracks with polynomial easing into arrays """
+        cards = []
+        rows = []
+        for track in self.tracks:
+            coefficients = EASING_POLYNOMIALS.get(track.easing)
+            if coefficients is None:
+                continue
+            for card_, start in zip(track.cards, track.start_positions):
+                cards.append(card_)
+                rows.append((start[0], start[1], track.dest_pos[0], track.dest_pos[1],
+                             track.start_time, track.duration) + coefficients)
+        data = numpy.array(rows, dtype=numpy.float64).reshape(-1, 9)
+        start = data[:, 0:2]
+        self.batch = {
+            "cards": cards,
+            "start": start,
+            "delta": data[:, 2:4] - start,
+            "start_time": data[:, 4],
+            "duration": data[:, 5],
+            "a": data[:, 6],
+            "b": data[:, 7],
+            "c": data[:, 8],
+            "pixels": numpy.array([card_.pos for card_ in cards],
+                                  dtype=numpy.float64).reshape(-1, 2).round()
+        }
+
+    def update(self, now=None):
+        """ Advances all animations. Completion callbacks are called after all cards are moved.
+        :param now: current time in seconds, the clock is used if None
+        """
+        if len(self.tracks) == 0:
+            return
+        if now is None:
+            now = self.clock()
+        if self.batch is None:
+            self.build_batch()
+        batch = self.batch
+
+        if len(batch["cards"]) > 0:
+            t = numpy.clip((now - batch["start_time"]) / batch["duration"], 0.0, 1.0)
+            k = t * (batch["a"] + t * (batch["b"] + t * batch["c"]))
+            pixels = (batch["start"] + batch["delta"] * k[:, numpy.newaxis]).round()
+            moved = numpy.flatnonzero((pixels != batch["pixels"]).any(axis=1))
+            cards = batch["cards"]
+            for i, x, y in zip(moved.tolist(), pixels[moved, 0].tolist(),
+                               pixels[moved, 1].tolist()):
+                cards[i].set_pos((x, y))
+            batch["pixels"] = pixels
+
+        completed = []
+        active = []
+        for track in self.tracks:
+            if len(track.cards) == 0:
+                completed.append(track)  # All cards were taken over by other tracks
+                continue
+            if now - track.start_time >= track.duration:
+                track.finish()
+                completed.append(track)
+            else:
+                if track.easing not in EASING_POLYNOMIALS:
+                    track.update(now)
+                active.append(track)
+        self.tracks = active
+        if len(completed) > 0:
+            self.tracks_changed()
+        for track in completed:
+            self.release(track)
+            if track.on_complete is not None:
+                track.on_complete()
+
+
+def create_animator(clock=time.perf_counter):
+    """ Creates BatchAnimator if NumPy is installed, Animator otherwise.
+    :param clock: function that returns current time in seconds
+    :return: Animator object
+    """
+    if numpy is not None:
+        return BatchAnimator(clock)
+    return Animator(clock)
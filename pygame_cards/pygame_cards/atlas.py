@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+""" Card atlas - all card sprites packed into a single image at the configured card size.
+
+The atlas consists of two files: an image (e.g. "card_atlas.png") and an index next to it
+("card_atlas.png.json") with the card settings the atlas was built for and a sub-rectangle
+of every sprite in the image. Building the atlas:
+
+    python -m pygame_cards.atlas settings.json
+
+The atlas is used when "atlas_file" is set in the "card" node of settings.json.
+"""
+try:
+    import sys
+    import os
+    import json
+    import pygame
+
+    from pygame_cards import enums, card_sprite, texture_cache
+except ImportError as err:
+    print("Fail loading a module in file:", __file__, "\n", err)
+    sys.exit(2)
+
+
+class CardAtlas(object):
+    """ Card atlas builder and loader. """
+
+    version = 1
+    columns = 13
+
+    def __init__(self, path, image, index):
+        """
+        :param path: path to the atlas image
+        :param image: pygame.Surface with packed card sprites
+        :param index: dictionary loaded from the atlas index file
+        """
+        self.path = path
+        self.image = image
+        self.index = index
+
+    @staticmethod
+    def get_index_path(atlas_path):
+        """ Returns path to the index file of an atlas
+        :param atlas_path: path to the atlas image
+        :return: path to the atlas index
+        """
+        return atlas_path + ".json"
+
+    @staticmethod
+    def get_sprite_paths(card_json):
+        """ Returns list of sprite paths (as used by CardSprite) that are packed into the atlas.
+        :param card_json: the 'card' node of settings.json
+        :return: list of strings
+        """
+        paths = []
+        for suit in range(enums.Suit.hearts, enums.Suit.spades + 1):
+            for rank in range(enums.Rank.two, enums.Rank.ace + 1):
+                paths.append(card_sprite.CardSprite.get_image_path(
+                    suit, rank, card_json["front_sprite_path"]))
+        paths.append(card_json["back_sprite_file"])
+        return paths
+
+    @staticmethod
+    def is_valid_index(index, card_json):
+        """ Checks if atlas index matches card settings.
+        :param index: dictionary loaded from the atlas index file
+        :param card_json: the 'card' node of settings.json
+        :return: True if atlas was built for these settings, False otherwise
+        """
+        return (index.get("version") == CardAtlas.version and
+                index.get("size") == list(card_json["size"]) and
+                index.get("front_sprite_path") == card_json["front_sprite_path"] and
+                index.get("back_sprite_file") == card_json["back_sprite_file"])
+
+    @staticmethod
+    def build(card_json, atlas_path=None):
+        """ Packs card sprites scaled to card size into an atlas image and writes atlas index.
+        Doesn't need a display, can be run as a build step.
+        :param card_json: the 'card' node of settings.json
+        :param atlas_path: path to the atlas image. If None, "atlas_file" from card_json is used.
+        :return: path to the atlas image
+        """
+        if atlas_path is None:
+            atlas_path = card_json["atlas_file"]
+        size = int(card_json["size"][0]), int(card_json["size"][1])
+        paths = CardAtlas.get_sprite_paths(card_json)
+        rows = (len(paths) + CardAtlas.columns - 1) // CardAtlas.columns
+        image = pygame.Surface((size[0] * CardAtlas.columns, size[1] * rows), pygame.SRCALPHA)
+        rects = dict()
+        for i, path in enumerate(paths):
+            rect = [(i % CardAtlas.columns) * size[0], (i // CardAtlas.columns) * size[1],
+                    size[0], size[1]]
+            sprite = pygame.image.load(card_sprite.get_img_full_path(path))
+            image.blit(pygame.transform.scale(sprite, size), rect[:2])
+            rects[path] = rect
+        pygame.image.save(image, atlas_path)
+
+        index = {
+            "version": CardAtlas.version,
+            "size": list(card_json["size"]),
+            "front_sprite_path": card_json["front_sprite_path"],
+            "back_sprite_file": card_json["back_sprite_file"],
+            "rects": rects
+        }
+        with open(CardAtlas.get_index_path(atlas_path), 'w', encoding='utf-8') as index_file:
+            json.dump(index, index_file, separators=(',', ':'))
+        return atlas_path
+
+    @staticmethod
+    def load(card_json, rebuild=True):
+        """ Loads atlas configured in card_json. Display mode should be already set.
+        :param card_json: the 'card' node of settings.json
+        :param rebuild: if True, outdated atlas (built for other card settings) gets rebuilt
+        :return: CardAtlas object, or None if atlas is not configured, doesn't exist or outdated.
+        """
+        atlas_path = card_json.get("atlas_file", "")
+        index_path = CardAtlas.get_index_path(atlas_path)
+        if atlas_path == "" or not (os.path.isfile(atlas_path) and os.path.isfile(index_path)):
+            return None
+        with open(index_path, 'r', encoding='utf-8') as index_file:
+            index = json.load(index_file)
+        if not CardAtlas.is_valid_index(index, card_json):
+            if not rebuild:
+                return None
+            CardAtlas.build(card_json, atlas_path)
+            with open(index_path, 'r', encoding='utf-8') as index_file:
+                index = json.load(index_file)
+        return CardAtlas(atlas_path, pygame.image.load(atlas_path).convert_alpha(), index)
+
+    def install(self, textures, pixel_format="alpha"):
+        """ Puts subsurfaces of the atlas to a texture cache, so CardSprite objects get their
+        images from the atlas instead of loading separate files. Sprites which pixel format
+        isn't "alpha" are copied from the atlas.
+        :param textures: texture_cache.TextureCache object
+        :param pixel_format: pixel format the sprites are requested with, see
+                             CardSprite.pixel_format
+        """
+        cache = texture_cache.TextureCache
+        size = self.index["size"]
+        textures.add(self.path, self.image.get_size(), self.image)
+        for path, rect in self.index["rects"].items():
+            surface = self.image.subsurface(rect)
+            surface_format = cache.resolve_pixel_format(surface, pixel_format)
+            if surface_format == "alpha":
+                textures.add(card_sprite.get_img_full_path(path), size, surface, pixel_format,
+                             size_bytes=0, surface_format=surface_format)
+            else:
+                textures.add(card_sprite.get_img_full_path(path), size,
+                             cache.convert_surface(surface, surface_format), pixel_format,
+                             surface_format=surface_format)
+
+
+def main():
+    """ Builds card atlas for settings.json passed in command line arguments. """
+    from pygame_cards import game_app
+
+    if len(sys.argv) < 2:
+        print("Usage: python -m pygame_cards.atlas settings.json [atlas_file]")
+        sys.exit(2)
+    card_json = game_app.JsonHelper.load_json(sys.argv[1])["card"]
+    atlas_path = sys.argv[2] if len(sys.argv) > 2 else None
+    if atlas_path is None and card_json["atlas_file"] == "":
+        print("'atlas_file' is not set in the 'card' node of " + sys.argv[1])
+        sys.exit(2)
+    print("Card atlas is written to " + CardAtlas.build(card_json, atlas_path))
+
+if __name__ == '__main__':
+    main()
@@ -1,23 +1,70 @@
 #!/usr/bin/env python
 try:
     import sys
+    import pygame
     from pygame_cards import card_sprite
-    from pygame_cards import game_object
+    from pygame_cards import game_object, enums
 except ImportError as err:
     print("Fail loading a module in file:", __file__, "\n", err)
     sys.exit(2)
 
 
 class Card(game_object.GameObject):
-    """ This class represents a card. """
+    """ This class represents a card.
+    Card's model is kept compact: suit, rank and side are packed into a single integer 'state'
+    (rank << 3 | suit << 1 | back_up), so game logic doesn't pay for rendering objects.
+    The sprite is created lazily, when the card is rendered or a mouse event hits the card.
+    Cards' images are shared between sprites by the CardSprite.textures cache.
+    """
+
+    __slots__ = ('state', '_sprite', '_pos')
+
+    children = ()  # Cards don't have children objects
+    grab_policy = enums.GrabPolicy.no_grab
 
     def __init__(self, suit, rank, pos, back_up=False):
-        game_object.GameObject.__init__(self)
-        self.suit = suit
-        self.rank = rank
-        self.sprite = card_sprite.CardSprite(suit, rank, pos, back_up)
-        #self.back_sprite = card_sprite.CardBackSprite(pos)
-        self.back_up = back_up
+        self.state = (rank << 3) | (suit << 1) | (1 if back_up else 0)
+        self._sprite = None
+        self._pos = pos
+
+    @property
+    def suit(self):
+        """ Card's suit, int value that corresponds to enum from enums.Suit class """
+        return (self.state >> 1) & 3
+
+    @property
+    def rank(self):
+        """ Card's rank, int value that corresponds to enum from enums.Rank class """
+        return self.state >> 3
+
+    @property
+    def code(self):
+        """ Integer that identifies card's suit and rank (rank << 2 | suit), fits in 6 bits """
+        return self.state >> 1
+
+    @property
+    def back_up(self):
+        """ True if card is turned face down, False otherwise """
+        return (self.state & 1) == 1
+
+    @back_up.setter
+    def back_up(self, back_up):
+        if back_up != self.back_up:
+            self.flip()
+
+    @property
+    def sprite(self):
+        """ Card's sprite object, created on first access """
+        if self._sprite is None:
+            self._sprite = card_sprite.CardSprite(self.suit, self.rank, self._pos, self.back_up)
+        return self._sprite
+
+    @property
+    def pos(self):
+        """ Tuple with coordinates (x, y) of the top left corner of the card """
+        if self._sprite is None:
+            return self._pos
+        return self._sprite.pos
 
     def get_sprite(self):
         """ Returns card's spite object
@@ -25,30 +72,44 @@ class Card(game_object.GameObject):
         """
         return self.sprite
 
-    # def get_back_sprite(self):
-    #     return self.back_sprite
+    def get_rect(self):
+        """ Returns area occupied by the card without creating a sprite.
+        :return: tuple (x, y, width, height)
+        """
+        if self._sprite is None:
+            size = card_sprite.CardSprite.card_json["size"]
+            return self._pos[0], self._pos[1], size[0], size[1]
+        rect = self._sprite.rect
+        return rect[0], rect[1], rect[2], rect[3]
 
-    def render(self, screen):
+    def render(self, screen, area=None):
         """ Renders the card's sprite on a screen passed in argument
         :param screen: screen to render the card's sprite on
+        :param area: tuple (x, y, width, height), part of the card to render, the whole card
+                     by default
         """
-        self.sprite.render(screen)
+        self.sprite.render(screen, area)
 
     def flip(self):
         """ Flips the card from face-up to face-down and vice versa """
-        self.back_up = not self.back_up
-        self.sprite.flip()
+        self.state ^= 1
+        if self._sprite is not None:
+            self._sprite.flip()
 
     def is_clicked(self, pos):
         """ Checks if mouse click is on card
         :param pos: tuple with coordinates of mouse click (x, y)
         :return: True if card is clicked, False otherwise
         """
-        return self.sprite.is_clicked(pos)
+        if self._sprite is not None:
+            return self._sprite.is_clicked(pos)
+        rect = self.get_rect()
+        return (rect[0] < pos[0] < rect[0] + rect[2]) and (rect[1] < pos[1] < rect[1] + rect[3])
 
     def unclick(self):
         """ Marks card as unclicked, i.e. it won't stick to the mouse cursor """
-        self.sprite.clicked = False
+        if self._sprite is not None:
+            self._sprite.clicked = False
 
     def check_mouse(self, pos, down):
         """ Checks if mouse event affects the card and if so processes the event.
@@ -57,6 +118,8 @@ class Card(game_object.GameObject):
         :return: True if passed mouse event affects the card, False otherwise.
 
         """
+        if not self.is_clicked(pos):
+            return False
         return self.sprite.check_mouse(pos, down)
 
     def check_collide(self, card_=None, pos=None):
@@ -66,22 +129,27 @@ class Card(game_object.GameObject):
         :param pos: tuple with coordinates (x,y) - top left corner of area to check collision with
         :return: True if cards/card and area collide, False otherwise
         """
+        rect = pygame.Rect(self.get_rect())
         if card_ is not None:
-            return self.sprite.check_card_collide(card_.sprite)
+            return rect.colliderect(card_.get_rect())
         elif pos is not None:
-            return self.sprite.check_area_collide(pos)
+            return rect.colliderect((pos[0], pos[1], rect[2], rect[3]))
 
     def set_pos(self, pos):
         """ Sets position of the card's sprite
         :param pos: tuple with coordinates (x, y) where the top left corner of the card
                     should be placed.
         """
-        self.sprite.pos = pos
-        #self.back_sprite.set_pos(pos)
+        if self._sprite is None:
+            self._pos = pos
+        else:
+            self._sprite.pos = pos
 
     def offset_pos(self, pos):
         """ Move the card's position by the specified offset
         :param pos: tuple with coordinates (x, y) of the offset to move card
         """
-        self.sprite.offset_pos(pos)
-        #self.back_sprite.offset_pos(pos)
+        if self._sprite is None:
+            self._pos = self._pos[0] + pos[0], self._pos[1] + pos[1]
+        else:
+            self._sprite.offset_pos(pos)
@@ -2,8 +2,9 @@
 try:
     import sys
     import operator
+    import pygame
 
-    from pygame_cards import game_object, card, enums
+    from pygame_cards import game_object, card, card_sprite, enums, instrumentation, texture_cache
 except ImportError as err:
     print("Fail loading a module in file:", __file__, "\n", err)
     sys.exit(2)
@@ -17,9 +18,29 @@ class CardsHolder(game_object.GameObject):
     Attributes:
         card_json - The 'card' node of the settings.json. Data can be accessed via [] operator,
                     for example: CardsHolder.card_json["size"][0]
+        dirty_rects - renderer.DirtyRects object where holders mark changed screen areas.
+                      None if dirty rectangles rendering is not used.
+        move_log - move_log.MoveLog object where holders record changes of their cards for
+                   undo/redo. None if changes are not recorded.
+        occlusion_culling - if True, render_all() skips cards covered by the next card and
+                            renders only visible strips of partly covered cards.
+        occlusion_margin - number of pixels of a partly covered card rendered under the edge
+                           of the next card, so rounded corners of the next card are drawn over
+                           the covered card.
+        static_layers - if True, render_all() renders static parts of holders from cached
+                        surfaces, see update_static_layer().
+        render_is_static - if True, the holder can be rendered with a static layer. Should be set
+                           to False in derived classes which render() output of an empty holder
+                           changes over time or doesn't fit the card area at the holder position.
     """
 
     card_json = None
+    dirty_rects = None
+    move_log = None
+    occlusion_culling = True
+    occlusion_margin = 3
+    static_layers = True
+    render_is_static = True
 
     def __init__(self, pos=(0, 0), offset=(0, 0), grab_policy=enums.GrabPolicy.no_grab,
                  last_card_callback=None):
@@ -35,13 +56,22 @@ class CardsHolder(game_object.GameObject):
         self.pos = pos
         self.offset = offset
         self.grabbed_card = None
+        self.cards_version = 0  # Incremented by bounds_changed()
+        self.static_layer = None  # Cached surface with the static part of the holder
+        self.static_layer_pos = None
+        self.static_layer_blendmode = 0
+        self.static_layer_count = 0
+        self.static_layer_part = None  # get_static_part() the layer is rendered from
+        self.static_layer_candidate = None  # get_static_part() seen by the previous update
+        self.static_layer_stamp = None
+        self.spatial_index = None  # Set when the holder is added to spatial_index.SpatialIndex
 
     def is_clicked(self, pos):
         """ Checks if a top card is clicked.
         :param pos: tuple with coordinates (x, y) - position of mouse click/screen touch.
         :return: True if top card is clicked, False otherwise
         """
-        if len(self.cards) is not 0:
+        if len(self.cards) != 0:
             if self.cards[-1].is_clicked(pos):
                 return True
         elif pos[0] > self.pos[0] and pos[0] < (self.pos[0] + CardsHolder.card_json["size"][0]) and\
@@ -55,11 +85,12 @@ class CardsHolder(game_object.GameObject):
         :param pos: tuple with coordinates (x, y) - position of mouse click/screen touch.
         :return: True if top card is clicked, False otherwise
         """
-        if len(self.cards) is not 0:
+        if len(self.cards) != 0:
             if self.cards[-1].check_mouse(pos, True):
                 return True
         return False
 
+    @game_object.synchronized
     def try_grab_card(self, pos):
         """ Tries to grab a card (or multiple cards) with a mouse click.
         :param pos: tuple with coordinates (x, y) - position of mouse click/screen touch.
@@ -72,20 +103,29 @@ class CardsHolder(game_object.GameObject):
                 if self.check_click(pos):
                     grabbed_cards = [self.pop_top_card()]
             elif self.grab_policy == enums.GrabPolicy.can_multi_grab:
+                # Single reverse scan over face-up cards, then one slice of the grabbed run
+                cards = self.cards
                 index = -1
-                for card_ in reversed(self.cards):
-                    if card_.back_up:
+                for i in range(len(cards) - 1, -1, -1):
+                    if cards[i].back_up:
                         break
-                    if card_.check_mouse(pos, True):
-                        index = self.cards.index(card_)
+                    if cards[i].is_clicked(pos):
+                        index = i
                         break
 
                 if index != -1:
-                    grabbed_cards = [c for c in self.cards if self.cards.index(c) >= index]
+                    cards[index].check_mouse(pos, True)
+                    grabbed_cards = cards[index:]
                     grabbed_cards.reverse()
-                    self.cards[:] = [c for c in self.cards if self.cards.index(c) < index]
+                    del cards[index:]
+                    if CardsHolder.move_log is not None:
+                        for card_ in grabbed_cards:
+                            CardsHolder.move_log.pop(self, card_, True)
+                    self.mark_dirty()
+                    self.bounds_changed()
         return grabbed_cards
 
+    @game_object.synchronized
     def check_grab(self, pos, bot=False):
         """ Tries to grab a card in specified position.
         Returns True if card was grabbed or there is already grabbed card that is not dropped yet.
@@ -97,7 +137,7 @@ class CardsHolder(game_object.GameObject):
         if not self.grabbed_card and len(self.cards) > 0:
             if bot or self.cards[-1].check_mouse(pos, True):
                 if self.cards[-1].back_up:
-                    self.cards[-1].flip()
+                    self.flip_card()
                 self.grabbed_card = True
                 return True
             else:
@@ -105,6 +145,7 @@ class CardsHolder(game_object.GameObject):
         else:
             return True
 
+    @game_object.synchronized
     def add_card(self, card_, on_top=True):
         """ Appends a card to the list of self.cards
         :param card_:  object of the Card class to be appended to the list
@@ -114,7 +155,7 @@ class CardsHolder(game_object.GameObject):
             card_.unclick()
             if on_top:
                 pos_ = self.pos
-                if len(self.cards) is not 0:
+                if len(self.cards) != 0:
                     length = len(self.cards)
                     pos_ = (self.pos[0] + length * self.offset[0],
                             self.pos[1] + length * self.offset[1])
@@ -123,7 +164,12 @@ class CardsHolder(game_object.GameObject):
             else:
                 self.cards.insert(0, card_)
                 self.update_position(self.offset)
+            if CardsHolder.move_log is not None:
+                CardsHolder.move_log.add(self, card_, on_top)
+            self.mark_dirty(card_)
+            self.bounds_changed()
 
+    @game_object.synchronized
     def pop_card(self, top):
         """ Removes top or bottom cards from the list and returns it.
         :param top: boolean, if True top card is removed, otherwise bottom card is removed.
@@ -135,9 +181,14 @@ class CardsHolder(game_object.GameObject):
             if len(self.cards) == 1 and self.last_card_callback is not None:
                 self.last_card_callback(self.cards[0])
             if top:
-                return self.cards.pop()
+                card_ = self.cards.pop()
             else:
-                return self.cards.pop(0)
+                card_ = self.cards.pop(0)
+            if CardsHolder.move_log is not None:
+                CardsHolder.move_log.pop(self, card_, top)
+            self.mark_dirty(card_)
+            self.bounds_changed()
+            return card_
 
     def pop_top_card(self):
         """ Removes top card from the list and returns it.
@@ -158,30 +209,56 @@ class CardsHolder(game_object.GameObject):
         self.grabbed_card = False
         return self.pop_top_card()
 
+    @game_object.synchronized
+    def flip_card(self, index=-1):
+        """ Flips a card from face-up to face-down and vice versa.
+        :param index: index of the card in self.cards, the top card by default
+        """
+        card_ = self.cards[index]
+        card_.flip()
+        if CardsHolder.move_log is not None:
+            CardsHolder.move_log.flip(self, index % len(self.cards))
+        self.mark_dirty(card_)
+
+    @game_object.synchronized
     def flip_cards(self):
         """ Flip cards from face-up to face-down and vice versa """
-        for card_ in self.cards:
-            card_.flip()
+        for index in range(len(self.cards)):
+            self.flip_card(index)
 
+    @game_object.synchronized
     def sort_cards(self):
         """ Sort cards by suits and ranks from lower to higher.
         Suits order: hearts, diamonds, clubs, spades.
         """
         self.cards.sort(key=operator.attrgetter('suit', 'rank'))
 
+    @game_object.synchronized
     def move_all_cards(self, other, back_side_up=True):
         """ Moves all cards to other cards holder.
         :param other: instance of CardsHolder where cards will be moved.
         :param back_side_up: True if cards should be flipped to back side up, False otherwise.
         """
         if isinstance(other, CardsHolder):
-            while len(self.cards) != 0:
-                card_ = self.pop_top_card()
-                if card_ is not None:
-                    if card_.back_up != back_side_up:
-                        card_.flip()
-                    other.add_card(card_)
+            move_log = CardsHolder.move_log
+            if move_log is not None:
+                move_log.suspend()  # The move is recorded at once
+            first = len(other.cards)
+            flipped = []
+            try:
+                while len(self.cards) != 0:
+                    card_ = self.pop_top_card()
+                    if card_ is not None:
+                        if card_.back_up != back_side_up:
+                            card_.flip()
+                            flipped.append(len(other.cards))
+                        other.add_card(card_)
+            finally:
+                if move_log is not None:
+                    move_log.resume()
+                    move_log.move_all(self, other, first, flipped)
 
+    @game_object.synchronized
     def update_position(self, offset):
         """ Updates position of all cards according to the offset passed
         :param offset: tuple (x, y) with values of offset for each card
@@ -190,6 +267,7 @@ class CardsHolder(game_object.GameObject):
         for card_ in self.cards:
             card_.set_pos(pos_)
             pos_ = pos_[0] + offset[0], pos_[1] + offset[1]
+        self.bounds_changed()
 
     def check_collide(self, card_):
         """ Checks if current cards holder collides with other card.
@@ -201,6 +279,180 @@ class CardsHolder(game_object.GameObject):
         else:
             return card_.check_collide(pos=self.pos)
 
+    def mark_dirty(self, card_=None):
+        """ Marks area of the holder's pocket (where the first card is placed) and area of a card
+            as changed if dirty rectangles rendering is used.
+        :param card_: Card object which area should be marked as well (default None)
+        """
+        if CardsHolder.dirty_rects is not None:
+            CardsHolder.dirty_rects.add((self.pos[0], self.pos[1], CardsHolder.card_json["size"][0],
+                                         CardsHolder.card_json["size"][1]))
+            if card_ is not None:
+                CardsHolder.dirty_rects.add(card_.get_rect())
+
+    def bounds_changed(self):
+        """ Notifies spatial index (if the holder is indexed) that cards of the holder have
+            been changed or moved. Should be called by derived classes that modify self.cards
+            or self.pos directly.
+        """
+        self.cards_version += 1
+        if self.spatial_index is not None:
+            self.spatial_index.invalidate(self)
+
+    @staticmethod
+    def get_visible_area(rect, next_rect):
+        """ Calculates visible part of a card covered by the next card.
+        :param rect: tuple (x, y, width, height), area of the card
+        :param next_rect: tuple (x, y, width, height), area of the next card
+        :return: tuple (x, y, width, height) with visible part in the card's coordinates,
+                 None if the card should be rendered completely, width is 0 if the next card
+                 is at the same position
+        """
+        width, height = rect[2], rect[3]
+        if next_rect[2] != width or next_rect[3] != height:
+            return None
+        dx = next_rect[0] - rect[0]
+        dy = next_rect[1] - rect[1]
+        margin = CardsHolder.occlusion_margin
+        if dx == 0 and dy == 0:
+            return 0, 0, 0, 0
+        # Rounded corners of the next card show the card around both edges of the next card,
+        # so cards which are closer than margin are rendered completely
+        elif dy == 0 and margin <= abs(dx) < width - margin:
+            if dx > 0:
+                return 0, 0, dx + margin, height
+            return width + dx - margin, 0, margin - dx, height
+        elif dx == 0 and margin <= abs(dy) < height - margin:
+            if dy > 0:
+                return 0, 0, width, dy + margin
+            return 0, height + dy - margin, width, margin - dy
+        return None
+
+    def render_all(self, screen):
+        """ Renders cards from the bottom card to the top card, then the holder itself.
+            The static part of the holder is rendered from the static layer, see
+            update_static_layer(). With occlusion_culling, of a run of cards at the same position
+            only the top card is rendered (completely), cards partly covered by the next card are
+            clipped to their visible strip, and cards closer than occlusion_margin to the next card
+            are rendered completely, so stacks of cards cost about as much as their visible part.
+        :param screen: Screen to render objects on
+        """
+        cards = self.cards
+        first = 0
+        if CardsHolder.static_layers and self.render_is_static:
+            first = self.update_static_layer()
+            if self.static_layer is not None:
+                screen.blit(self.static_layer, self.static_layer_pos, None,
+                            self.static_layer_blendmode)
+                if instrumentation.FrameStats.active is not None:
+                    instrumentation.FrameStats.active.blits += 1
+                if len(cards) == 0:
+                    return  # The layer contains render() output
+        if CardsHolder.occlusion_culling and len(cards) - first > 1:
+            rect = cards[first].get_rect()
+            covered = False  # True if the previous card is at the same position
+            for i in range(first, len(cards) - 1):
+                next_rect = cards[i + 1].get_rect()
+                area = CardsHolder.get_visible_area(rect, next_rect)
+                if area is not None and area[2] == 0:
+                    covered = True
+                elif covered:
+                    # Top card of a run renders what cards under it would show around corners
+                    cards[i].render(screen)
+                    covered = False
+                else:
+                    cards[i].render(screen, area)
+                rect = next_rect
+            cards[-1].render(screen)
+        else:
+            for i in range(first, len(cards)):
+                cards[i].render(screen)
+        self.render(screen)
+
+    def get_static_part(self):
+        """ Returns the static part of the holder: face-down cards at the bottom of the holder,
+        which have the same image and are not dragged by the mouse. An empty holder is
+        represented by its position, as render() output is cached for it.
+        :return: list of tuples (image, (x, y)) for cards, [(None, (x, y))] for an empty holder,
+                 empty list if there is no static part
+        """
+        cards = self.cards
+        if len(cards) == 0:
+            if CardsHolder.card_json is None or self.pos[0] < 0 or self.pos[1] < 0:
+                return []
+            return [(None, (int(self.pos[0]), int(self.pos[1])))]
+        part = []
+        for card_ in cards:
+            if not card_.back_up:
+                break
+            sprite = card_.sprite
+            image, pos = sprite.get_render_tuple()
+            if image is None or sprite.clicked or (len(part) > 0 and image is not part[0][0]):
+                break
+            part.append((image, pos))
+        return part
+
+    def update_static_layer(self):
+        """ Updates the static layer: a cached surface with the static part of the holder (see
+        get_static_part()). Cards are checked only when the holder was changed (see
+        bounds_changed()) or any sprite was moved or flipped. The layer is rendered again when
+        the static part is changed and then stays the same for one update, so moving cards are
+        rendered as usual rather than the layer being rendered every frame.
+        self.static_layer is None if there is no layer.
+        :return: number of cards rendered by the static layer
+        """
+        stamp = self.cards_version, card_sprite.AbstractPygameCardSprite.changes
+        if stamp == self.static_layer_stamp:
+            return self.static_layer_count
+        part = self.get_static_part()
+        if part != self.static_layer_part:
+            self.static_layer = self.static_layer_part = None
+            self.static_layer_count = 0
+            if len(part) == 0 or part != self.static_layer_candidate:
+                self.static_layer_candidate = part
+                if len(part) == 0:
+                    self.static_layer_stamp = stamp
+                return 0
+            self.render_static_layer(part)
+        self.static_layer_stamp = stamp
+        self.static_layer_count = len(part) if len(self.cards) > 0 else 0
+        return self.static_layer_count
+
+    def render_static_layer(self, part):
+        """ Renders the static layer.
+        :param part: static part of the holder returned by get_static_part()
+        """
+        size = CardsHolder.card_json["size"] if CardsHolder.card_json is not None \
+            else part[0][0].get_size()
+        left = min(pos[0] for _, pos in part)
+        top = min(pos[1] for _, pos in part)
+        right = max(pos[0] for _, pos in part) + size[0]
+        bottom = max(pos[1] for _, pos in part) + size[1]
+        blendmode = 0
+        if part[0][0] is not None:
+            blendmode = self.cards[0].sprite.blendmode
+            layer = pygame.Surface((right - left, bottom - top), pygame.SRCALPHA)
+            for image, pos in part:
+                layer.blit(image, (pos[0] - left, pos[1] - top), None, blendmode)
+        else:
+            # render() draws at screen coordinates, the card area at the holder position is cut out
+            surface = pygame.Surface((right, bottom), pygame.SRCALPHA)
+            self.render(surface)
+            layer = surface.subsurface((left, top, right - left, bottom - top))
+        cache = texture_cache.TextureCache
+        layer_format = cache.detect_pixel_format(layer)
+        if layer_format == "alpha" and blendmode != 0:
+            self.static_layer = layer.convert_alpha()  # Premultiplied as the cards' images
+        else:
+            self.static_layer = cache.convert_surface(layer, layer_format)
+            blendmode = 0
+        self.static_layer_blendmode = blendmode
+        self.static_layer_pos = left, top
+        self.static_layer_part = part
+        self.static_layer_candidate = None
+        if instrumentation.FrameStats.active is not None:
+            instrumentation.FrameStats.active.surfaces_created += 1
+
     def render(self, screen):
         """ Does not render anything by default.
         Should be overridden in derived classes if need to render anything for the holder itself.
@@ -3,10 +3,9 @@
 try:
     import sys
     import os
-    import math
     import pygame
 
-    from pygame_cards import enums
+    from pygame_cards import enums, texture_cache, instrumentation
 except ImportError as err:
     print("Fail loading a module in file:", __file__, "\n", err)
     sys.exit(2)
@@ -29,13 +28,28 @@ def get_img_full_path(path):
             raise IOError("File not found: " + path)
 
 
-class AbstractPygameCardSprite(pygame.sprite.Sprite):
-    """ Abstract base class for Card sprite with pygame routines implemented in default methods. """
+class AbstractPygameCardSprite(pygame.sprite.DirtySprite):
+    """ Abstract base class for Card sprite with pygame routines implemented in default methods.
+    self.image is the currently shown image. Sprites can be drawn by pygame.sprite.LayeredDirty
+    group (see renderer.LayeredRenderer), so moves and flips set self.dirty.
+
+    Attributes:
+        dirty_rects - renderer.DirtyRects object where sprites mark changed screen areas.
+                      None if dirty rectangles rendering is not used.
+        clicked_sprites - set of sprites that are currently clicked (stick to the mouse cursor)
+        changes - number of moves and flips of all sprites, lets cached surfaces (see
+                  CardsHolder.update_static_layer()) skip checking their sprites while it's the same
+    """
+
+    dirty_rects = None
+    clicked_sprites = set()
+    changes = 0
 
     def __init__(self, pos):
+        pygame.sprite.DirtySprite.__init__(self)
         self.rect = [pos[0], pos[1], 0, 0]
         self.mouse_offset = [0, 0]
-        self.clicked = False
+        self._clicked = False
         self.image = None  # Placeholder for card sprite
 
     @property
@@ -44,31 +58,88 @@ class AbstractPygameCardSprite(pygame.sprite.Sprite):
 
     @pos.setter
     def pos(self, pos):
-        self.rect[0] = pos[0]
-        self.rect[1] = pos[1]
+        self.move_to(pos[0], pos[1])
 
-    def offset_pos(self, pos):
-        self.rect[0] = self.rect[0] + pos[0]
-        self.rect[1] = self.rect[1] + pos[1]
+    @property
+    def clicked(self):
+        return self._clicked
+
+    @clicked.setter
+    def clicked(self, clicked):
+        self._clicked = clicked
+        if clicked:
+            AbstractPygameCardSprite.clicked_sprites.add(self)
+        else:
+            AbstractPygameCardSprite.clicked_sprites.discard(self)
 
-    def get_rect(self):
-        return self.image.get_rect()
+    @staticmethod
+    def update_clicked(mouse_pos=None):
+        """ Moves all clicked sprites to the mouse cursor position.
+        :param mouse_pos: tuple with coordinates (x, y), the current mouse cursor position by
+                          default. Mouse events pass their position, so dragged cards are
+                          dropped where the button is released.
+        """
+        for sprite in list(AbstractPygameCardSprite.clicked_sprites):
+            sprite.update(mouse_pos)
+
+    def move_to(self, x, y):
+        """ Moves sprite and marks old and new sprite's areas as changed.
+        :param x: new x coordinate of the top left corner
+        :param y: new y coordinate of the top left corner
+        """
+        rect = self.rect
+        AbstractPygameCardSprite.changes += 1
+        self.dirty = 1
+        if AbstractPygameCardSprite.dirty_rects is None:
+            rect[0] = x
+            rect[1] = y
+        else:
+            old_rect = (rect[0], rect[1], rect[2], rect[3])
+            rect[0] = x
+            rect[1] = y
+            if rect[0] != old_rect[0] or rect[1] != old_rect[1]:
+                AbstractPygameCardSprite.dirty_rects.add(old_rect)
+                AbstractPygameCardSprite.dirty_rects.add(rect)
+
+    def mark_dirty(self):
+        """ Marks sprite's area as changed if dirty rectangles rendering is used. """
+        if AbstractPygameCardSprite.dirty_rects is not None:
+            AbstractPygameCardSprite.dirty_rects.add(self.rect)
 
-    def update(self):
-        if self.clicked:
-            self.rect[0] = pygame.mouse.get_pos()[0] - self.mouse_offset[0]
-            self.rect[1] = pygame.mouse.get_pos()[1] - self.mouse_offset[1]
+    def offset_pos(self, pos):
+        self.move_to(self.rect[0] + pos[0], self.rect[1] + pos[1])
 
-    def render(self, screen):
+    def get_rect(self):
+        return pygame.Rect(0, 0, self.rect[2], self.rect[3])
+
+    def update(self, mouse_pos=None):
+        if self._clicked:
+            if mouse_pos is None:
+                mouse_pos = pygame.mouse.get_pos()
+            self.move_to(mouse_pos[0] - self.mouse_offset[0], mouse_pos[1] - self.mouse_offset[1])
+
+    def render(self, screen, area=None):
+        """ Renders the sprite.
+        :param screen: Screen to render the sprite on
+        :param area: tuple (x, y, width, height), part of the sprite to render, the whole sprite
+                     by default
+        """
         self.update()
-        screen.blit(*self.get_render_tuple())
+        image, pos = self.get_render_tuple()
+        if image is not None:
+            if area is None:
+                screen.blit(image, pos, None, self.blendmode)
+            else:
+                screen.blit(image, (pos[0] + area[0], pos[1] + area[1]), area, self.blendmode)
+            if instrumentation.FrameStats.active is not None:
+                instrumentation.FrameStats.active.blits += 1
 
     def get_render_tuple(self):
         return self.image, (self.rect[0], self.rect[1])
 
     def is_clicked(self, pos):
-        return (pos[0] > self.rect[0] and pos[0] < (self.rect[0] + self.get_rect()[2]) and
-                pos[1] > self.rect[1] and pos[1] < (self.rect[1] + self.get_rect()[3]))
+        rect = self.rect
+        return (rect[0] < pos[0] < rect[0] + rect[2]) and (rect[1] < pos[1] < rect[1] + rect[3])
 
     def check_mouse(self, pos, down):
         if self.is_clicked(pos):
@@ -96,39 +167,74 @@ class CardSprite(AbstractPygameCardSprite):
     Attributes:
         card_json - The 'card' node of the settings.json. Data can be accessed via [] operator,
                     for example: CardsHolder.card_json["size"][0]
+        textures - process-wide texture_cache.TextureCache shared by all card sprites.
+        load_images - if False, sprites don't load images and can't be rendered, but can be
+                      moved and clicked. Used in headless mode.
+        pixel_format - pixel format of images in the texture cache, one of
+                       texture_cache.TextureCache.pixel_formats
     """
 
     card_json = None
+    textures = texture_cache.TextureCache()
+    load_images = True
+    pixel_format = "auto"
 
     def __init__(self, suit, rank, pos, back_up=False):
         if CardSprite.card_json is None:
             raise ValueError('CardSprite.card_json is not initialized')
         AbstractPygameCardSprite.__init__(self, pos)
 
-        temp_image = pygame.image.load(get_img_full_path(
-            self.get_image_path(suit, rank))).convert_alpha()
-        self.image = pygame.transform.scale(temp_image, CardSprite.card_json["size"])
-        self.rect = self.image.get_rect()
-        self.rect[0] = pos[0]
-        self.rect[1] = pos[1]
-
-        back_img_path = CardSprite.card_json["back_sprite_file"]
-        temp_image = pygame.image.load(get_img_full_path(back_img_path)).convert_alpha()
-        self.back_image = pygame.transform.scale(temp_image, CardSprite.card_json["size"])
-        self.back_up = back_up
-
-    def get_render_tuple(self):
-        if self.back_up:
-            return self.back_image, (self.rect[0], self.rect[1])
+        size = CardSprite.card_json["size"]
+        if CardSprite.load_images:
+            textures = CardSprite.textures
+            pixel_format = CardSprite.pixel_format
+            front_path = get_img_full_path(self.get_image_path(suit, rank))
+            self.front_image = textures.get(front_path, size, pixel_format)
+            self.front_blendmode = texture_cache.TextureCache.get_blend_flags(
+                textures.get_format(front_path, size, pixel_format))
+            back_path = get_img_full_path(CardSprite.card_json["back_sprite_file"])
+            self.back_image = textures.get(back_path, size, pixel_format)
+            self.back_blendmode = texture_cache.TextureCache.get_blend_flags(
+                textures.get_format(back_path, size, pixel_format))
         else:
-            return self.image, (self.rect[0], self.rect[1])
+            self.front_image = None
+            self.back_image = None
+            self.front_blendmode = self.back_blendmode = 0
+        self.rect = pygame.Rect(pos[0], pos[1], size[0], size[1])
+        self.back_up = back_up
+        self.image = self.back_image if back_up else self.front_image
+        self.blendmode = self.back_blendmode if back_up else self.front_blendmode
 
     def flip(self):
         self.back_up = not self.back_up
+        self.image = self.back_image if self.back_up else self.front_image
+        self.blendmode = self.back_blendmode if self.back_up else self.front_blendmode
+        AbstractPygameCardSprite.changes += 1
+        self.dirty = 1
+        self.mark_dirty()
 
     @staticmethod
-    def get_image_path(suit, rank):
-        path = CardSprite.card_json["front_sprite_path"]
+    def preload_images(deck_type=enums.DeckType.full):
+        """ Loads all card sprites of a deck into the texture cache, so creation of cards
+        doesn't hit the disk.
+        :param deck_type: value from enums.DeckType (full deck by default)
+        """
+        if CardSprite.card_json is None:
+            raise ValueError('CardSprite.card_json is not initialized')
+        start = enums.Rank.two
+        if deck_type == enums.DeckType.short:
+            start = enums.Rank.six
+        paths = [get_img_full_path(CardSprite.card_json["back_sprite_file"])]
+        for rank in range(start, enums.Rank.ace + 1):
+            for suit in range(enums.Suit.hearts, enums.Suit.spades + 1):
+                paths.append(get_img_full_path(CardSprite.get_image_path(suit, rank)))
+        CardSprite.textures.preload(paths, CardSprite.card_json["size"], CardSprite.pixel_format)
+
+    @staticmethod
+    def get_image_path(suit, rank, front_sprite_path=None):
+        if front_sprite_path is None:
+            front_sprite_path = CardSprite.card_json["front_sprite_path"]
+        path = front_sprite_path
 
         if rank == enums.Rank.two:
             path += "2_of_"
@@ -182,64 +288,3 @@ class CardSprite(AbstractPygameCardSprite):
 #         #w = temp_image.get_rect()[2]
 #         #h = temp_image.get_rect()[3]
 #         self.image = pygame.transform.scale(temp_image, globals.Size.card)
-
-
-class SpriteMove(object):
-    """
-    Class that animates a card move. Can be used to animate automatic cards' moves,
-    for example during cards dealing.
-    """
-    def __init__(self, sprites, dest_pos, speed=None):
-        """ Initializes an object of SpriteMove class.
-        :param sprites: list of card sprites to be moved
-        :param dest_pos: tuple with coordinates (x,y) of destination position
-        :param speed: integer number, on how many pixels card(s) should move per frame.
-                    If not specified (None), "move_speed" value from the config json is used.
-        """
-        self.sprites = sprites
-        self.dest_pos = dest_pos
-        for sprite in self.sprites:
-            sprite.start_pos = sprite.pos
-            sprite.angle = math.atan2(dest_pos[1] - sprite.start_pos[1],
-                                      dest_pos[0] - sprite.start_pos[0])
-            sprite.distance = SpriteMove.calc_distance(dest_pos, sprite.start_pos)
-            if speed is None:
-                sprite.speed = CardSprite.card_json["move_speed"]
-            else:
-                sprite.speed = speed
-            sprite.completed = False
-
-    @staticmethod
-    def calc_distance(point1, point2):
-        """ Calculates distance between two points.
-        :param point1: tuple (x, y) with coordinates of the first point
-        :param point2: tuple (x, y) with coordinates of the second point
-        :return: distance between two points in pixels
-        """
-        return math.sqrt(math.pow(point1[0] - point2[0], 2) + math.pow(point1[1] - point2[1], 2))
-
-    def update(self):
-        """
-        Updates sprite(s) position. IMPORTANT: this method should be executed in an endless loop
-        during all lifetime of SpriteMove object in order for animation to be smooth.
-        :return: True is move to destination position is completed, otherwise returns False.
-        """
-        for sprite in self.sprites:
-            new_pos = (sprite.pos[0] + sprite.speed * math.cos(sprite.angle),
-                       sprite.pos[1] + sprite.speed * math.sin(sprite.angle))
-            distance = SpriteMove.calc_distance(new_pos, sprite.start_pos)
-            if distance < sprite.distance:
-                sprite.pos = new_pos
-            else:
-                sprite.pos = self.dest_pos
-                sprite.completed = True
-
-    def is_completed(self):
-        """
-        Checks if animation is completed.
-        :return: True is sprite(s) reached the destination point. False otherwise.
-        """
-        result = True
-        for sprite in self.sprites:
-            result = result and sprite.completed
-        return result
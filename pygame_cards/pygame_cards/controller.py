@@ -3,7 +3,8 @@ try:
     import sys
     import abc
 
-    from pygame_cards import game_object, card, card_sprite
+    from pygame_cards import game_object, card, card_sprite, card_holder, spatial_index
+    from pygame_cards import animation, serialization, move_log
 except ImportError as err:
     print("Fail loading a module in file:", __file__, "\n", err)
     sys.exit(2)
@@ -25,8 +26,16 @@ class Controller(object, metaclass=abc.ABCMeta):
 
         These methods are called from high level GameApp class. See details about each method below.
         Other auxiliary methods can be added if needed and called from the mandatory methods.
+
+        GameApp calls these methods while game_object.GameObject.state_lock is held, so they can
+        safely modify game objects. If game objects are modified from other threads (timers,
+        bots etc.), hold the lock too: "with self.state_lock: ...".
+        Delayed and periodic actions don't need threads: self.scheduler.call_later() and
+        call_every() run callbacks from the game loop while the lock is held.
     """
 
+    state_lock = game_object.GameObject.state_lock
+
     def __init__(self, objects_list=None, gui_interface=None, settings_json=None):
         """
         Initializes Controller object.
@@ -34,11 +43,17 @@ class Controller(object, metaclass=abc.ABCMeta):
         :param gui_interface: gui interface object
         """
         self.rendered_objects = []
-        self.moves = []
+        self.moves = animation.create_animator()
+        self.spatial_index = spatial_index.SpatialIndex()
         if objects_list is not None and isinstance(objects_list, list):
             self.rendered_objects = objects_list
+            for obj in objects_list:
+                self.index_object(obj)
         self.gui_interface = gui_interface
         self.settings_json = settings_json
+        self.frame_scheduler = None  # Set by GameApp
+        self.scheduler = None  # scheduler.Scheduler object, set by GameApp
+        self.move_log = None  # Set by enable_move_log()
         self.started = False
 
         # Dictionary where any custom objects needed can be stored
@@ -96,6 +111,28 @@ class Controller(object, metaclass=abc.ABCMeta):
         """
         pass
 
+    def update_objects(self):
+        """ Updates game objects before rendering: advances cards animations, moves clicked cards
+            with the mouse cursor and calls update() of game objects.
+            Called by GameApp before each frame is rendered.
+        """
+        self.moves.update()
+
+        card_sprite.AbstractPygameCardSprite.update_clicked()
+
+        if self.rendered_objects is not None:
+            for obj in self.rendered_objects:
+                if isinstance(obj, game_object.GameObject):
+                    obj.update()
+
+    def request_frame(self):
+        """ Requests rendering of a new frame. Frames are rendered on demand, so this method
+            should be called if game state is changed outside of mouse events processing,
+            for example in execute_game().
+        """
+        if self.frame_scheduler is not None:
+            self.frame_scheduler.request_frame()
+
     def render_objects(self, screen):
         """ Renders game objects.
         :param screen: Screen to render objects on.
@@ -105,11 +142,6 @@ class Controller(object, metaclass=abc.ABCMeta):
                 if isinstance(obj, game_object.GameObject):
                     obj.render_all(screen)
 
-        if len(self.moves) > 0:
-            self.moves[0].update()
-            if self.moves[0].is_completed():
-                self.moves.pop(0)
-
     def add_rendered_object(self, obj):
         """ Adds object to the list of objects to be rendered by the Controller.
         :param obj: an instance of GameObject or derived class.
@@ -118,8 +150,49 @@ class Controller(object, metaclass=abc.ABCMeta):
             self.rendered_objects = []
         if isinstance(obj, tuple):
             self.rendered_objects.extend(obj)
+            for obj_ in obj:
+                self.index_object(obj_)
         elif isinstance(obj, game_object.GameObject):
             self.rendered_objects.append(obj)
+            self.index_object(obj)
+
+    def index_object(self, obj):
+        """ Adds cards holder to the spatial index used by holder_at(), card_at() and
+            drop_targets_for(). Called by add_rendered_object().
+        :param obj: game object, only CardsHolder objects are indexed
+        """
+        if isinstance(obj, card_holder.CardsHolder):
+            self.spatial_index.add(obj)
+
+    def holders_at(self, pos):
+        """ Returns rendered cards holders which area (empty pocket and cards) contains a point.
+        :param pos: tuple with coordinates (x, y), e.g. position of a mouse click
+        :return: list of holders in rendering order (the topmost holder is the last one)
+        """
+        return self.spatial_index.holders_at(pos)
+
+    def holder_at(self, pos):
+        """ Returns the topmost rendered cards holder which has a card or an empty pocket
+            at a point.
+        :param pos: tuple with coordinates (x, y), e.g. position of a mouse click
+        :return: CardsHolder object or None
+        """
+        return self.spatial_index.holder_at(pos)
+
+    def card_at(self, pos):
+        """ Returns the topmost card of rendered cards holders at a point.
+        :param pos: tuple with coordinates (x, y), e.g. position of a mouse click
+        :return: tuple (holder, card), or (None, None) if there is no card at the point
+        """
+        return self.spatial_index.card_at(pos)
+
+    def drop_targets_for(self, rect):
+        """ Returns rendered cards holders which top card (or empty pocket) collides with
+            a rectangle, e.g. with area of a dragged card.
+        :param rect: tuple (x, y, width, height) or pygame.Rect
+        :return: list of holders in rendering order
+        """
+        return self.spatial_index.drop_targets_for(rect)
 
     def remove_rendered_object(self, id_):
         """ Removes an object from the list of rendered_objects by id
@@ -129,21 +202,98 @@ class Controller(object, metaclass=abc.ABCMeta):
         _ = id_
         pass
 
-    def add_move(self, cards, destination_pos, speed=None):
+    def add_move(self, cards, destination_pos, speed=None, duration=None, easing="linear",
+                 on_complete=None, delay=0):
         """
-        Creates cards animation object and stores in into list of moves in the Controller.
-        Controller class deletes the animation automatically after it completes.
-        :param cards: list of cards to be moved.
+        Starts cards animation. Animations run concurrently and are driven by time, so they
+        take the same time regardless of frame rate. Completed animations are deleted
+        automatically.
+        :param cards: Card object or list of cards to be moved.
         :param destination_pos: tuple with coordinates (x,y) of destination position where cards
                                 should be moved.
-        :param speed: integer number, on how many pixels card(s) should move per frame.
-        """
-        if isinstance(cards, list):
-            sprites = []
-            for card_ in cards:
-                if isinstance(card_, card.Card):
-                    sprites.append(card_.sprite)
-            if len(sprites) != 0:
-                self.moves.append(card_sprite.SpriteMove(sprites, destination_pos, speed))
-        elif isinstance(cards, card.Card):
-            self.moves.append(card_sprite.SpriteMove(cards.sprite, destination_pos, speed))
+        :param speed: number of pixels card(s) should move per frame at 60 FPS. If not specified,
+                      "move_speed" value from the settings json is used. Ignored if duration
+                      is specified.
+        :param duration: duration of the animation in seconds.
+        :param easing: name of easing curve ("linear", "ease_in", "ease_out", "ease_in_out") or
+                       easing function, see animation.EASINGS.
+        :param on_complete: function without arguments called when the animation is completed.
+        :param delay: delay in seconds before the animation starts.
+        :return: animation.Track object, can be passed to self.moves.cancel(), None if there
+                 are no cards to move.
+        """
+        if isinstance(cards, card.Card):
+            cards = [cards]
+        elif isinstance(cards, list):
+            cards = [card_ for card_ in cards if isinstance(card_, card.Card)]
+        else:
+            return None
+        if len(cards) == 0:
+            return None
+        if duration is None:
+            if speed is None:
+                speed = card_sprite.CardSprite.card_json["move_speed"]
+            duration = animation.Animator.get_duration(cards, destination_pos, speed)
+        track = self.moves.move(cards, destination_pos, duration, easing, on_complete, delay)
+        self.request_frame()
+        return track
+
+    def state_holders(self):
+        """ Returns cards holders which contents make up the game state saved by save_state().
+            By default these are rendered CardsHolder objects in rendering order. Override this
+            method if the game has holders that aren't rendered (e.g. a discard pile).
+        :return: list of CardsHolder objects, the order should be the same for all calls
+        """
+        return [obj for obj in self.rendered_objects if isinstance(obj, card_holder.CardsHolder)]
+
+    def save_state(self):
+        """ Saves contents of cards holders returned by state_holders().
+        :return: bytes, see serialization module for the format
+        """
+        with self.state_lock:
+            return serialization.encode(self.state_holders())
+
+    def load_state(self, data):
+        """ Restores contents of cards holders saved by save_state(). Cards animations are
+            cancelled and cards are put to their places immediately.
+        :param data: bytes returned by save_state()
+        """
+        with self.state_lock:
+            self.moves.cancel_all()
+            serialization.restore(data, self.state_holders())
+        self.request_frame()
+
+    def enable_move_log(self, capacity=65536, checkpoint_interval=256):
+        """ Starts recording changes of cards holders returned by state_holders() for undo/redo.
+            Should be called after holders are built. Call self.move_log.end_action() after each
+            completed user action and self.move_log.clear() when a new game is started.
+        :param capacity: max number of recorded changes, the oldest actions are dropped
+        :param checkpoint_interval: number of actions between checkpoints of holders contents
+        """
+        with self.state_lock:
+            self.move_log = move_log.MoveLog(self.state_holders(), capacity, checkpoint_interval)
+            card_holder.CardsHolder.move_log = self.move_log
+
+    def undo(self):
+        """ Undoes the last user action recorded by the move log. Cards animations are finished.
+        :return: True if an action is undone, False otherwise
+        """
+        if self.move_log is None:
+            return False
+        with self.state_lock:
+            self.moves.cancel_all(finish=True)
+            done = self.move_log.undo()
+        self.request_frame()
+        return done
+
+    def redo(self):
+        """ Redoes the last user action undone by undo().
+        :return: True if an action is redone, False otherwise
+        """
+        if self.move_log is None:
+            return False
+        with self.state_lock:
+            self.moves.cancel_all(finish=True)
+            done = self.move_log.redo()
+        self.request_frame()
+        return done
@@ -1,26 +1,38 @@
 #!/usr/bin/env python
 try:
     import sys
-    from random import shuffle
+    import random
 
-    from pygame_cards import enums, card, card_holder
+    from pygame_cards import enums, card, card_holder, game_object
 except ImportError as err:
     print("Fail loading a module in file:", __file__, "\n", err)
     sys.exit(2)
 
 
 class Deck(card_holder.CardsHolder):
-    """ Deck of cards. Two types of deck available: short (6..ace) and full (2..ace)"""
+    """ Deck of cards. Two types of deck available: short (6..ace) and full (2..ace)
 
-    def __init__(self, type_, pos, offset, last_card_callback=None):
+    Order of cards can be reproduced: the deck can be shuffled by a seeded random generator,
+    saved and restored as a permutation (see get_permutation()) or set by a deal number (see
+    deal_permutation()).
+    """
+
+    # Suits of Microsoft FreeCell deals in the order of their card numbers
+    freecell_suits = (enums.Suit.clubs, enums.Suit.diamonds, enums.Suit.hearts, enums.Suit.spades)
+
+    def __init__(self, type_, pos, offset, last_card_callback=None, rng=None):
         """
         :param type_: int value that corresponds to enum from enums.DeckType class
         :param pos: tuple with coordinates (x, y) for bottom card in the desk
         :param last_card_callback: function that should be called when the last card is
             removed from the deck
+        :param rng: seed (int, str or bytes) or random.Random object used by shuffle().
+            If None, the global generator of the random module is used.
         """
         card_holder.CardsHolder.__init__(self, pos, offset, False, last_card_callback)
         self.type = type_
+        self.rng = None
+        self.set_rng(rng)
 
         start = enums.Rank.two  # full deck type by default
         if type_ == enums.DeckType.short:
@@ -32,7 +44,76 @@ class Deck(card_holder.CardsHolder):
                 self.cards.append(card.Card(suit, rank, card_pos, True))
                 card_pos = card_pos[0] + self.offset[0], card_pos[1] + self.offset[1]
 
+    def set_rng(self, rng):
+        """ Sets random generator used by shuffle().
+        :param rng: seed (int, str or bytes) or random.Random object.
+            If None, the global generator of the random module is used.
+        """
+        if rng is None:
+            self.rng = random
+        elif isinstance(rng, random.Random):
+            self.rng = rng
+        else:
+            self.rng = random.Random(rng)
+
+    @game_object.synchronized
     def shuffle(self):
         """ Shuffles cards in the deck randomly """
-        shuffle(self.cards)
+        self.rng.shuffle(self.cards)
+        self.update_position(self.offset)
+
+    def get_permutation(self):
+        """ Returns order of cards in the deck, from the bottom card to the top card, as a compact
+        serializable value.
+        :return: bytes, one byte with card code (see Card.code) per card
+        """
+        return bytes(card_.code for card_ in self.cards)
+
+    @game_object.synchronized
+    def set_permutation(self, permutation):
+        """ Reorders cards in the deck.
+        :param permutation: bytes returned by get_permutation() or list of card codes, from the
+            bottom card to the top card. Should contain codes of all cards in the deck.
+        """
+        by_code = dict()
+        for card_ in self.cards:
+            by_code.setdefault(card_.code, []).append(card_)
+        cards = []
+        for code in permutation:
+            if len(by_code.get(code, ())) == 0:
+                raise ValueError('Card with code ' + str(code) + ' is not in the deck')
+            cards.append(by_code[code].pop())
+        if len(cards) != len(self.cards):
+            raise ValueError('Permutation has ' + str(len(cards)) + ' cards, the deck has ' +
+                             str(len(self.cards)))
+        self.cards[:] = cards
         self.update_position(self.offset)
+
+    @staticmethod
+    def deal_permutation(deal_number):
+        """ Returns permutation of a full deck for a deal number of Microsoft FreeCell
+        (1..1000000 are the classic deals), the same on all machines.
+        :param deal_number: int deal number
+        :return: list with codes of cards (see Card.code) in the order they are dealt
+        """
+        cards = list(range(51, -1, -1))
+        seed = deal_number
+        for i in range(52):
+            seed = (seed * 214013 + 2531011) & 0x7fffffff
+            j = 51 - (seed >> 16) % (52 - i)
+            cards[i], cards[j] = cards[j], cards[i]
+
+        permutation = []
+        for number in cards:
+            rank = enums.Rank.ace if number < 4 else number // 4 + 1
+            permutation.append((rank << 2) | Deck.freecell_suits[number % 4])
+        return permutation
+
+    def set_deal(self, deal_number):
+        """ Orders cards of a full deck by a deal number (see deal_permutation()), so the first
+        dealt card is on top of the deck.
+        :param deal_number: int deal number
+        """
+        permutation = Deck.deal_permutation(deal_number)
+        permutation.reverse()
+        self.set_permutation(permutation)
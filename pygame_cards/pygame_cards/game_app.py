@@ -1,15 +1,19 @@
 #!/usr/bin/env python
 try:
     import sys
+    import os
     import pygame
     import threading
     import json
     import abc
     import logging
+    import random
+    import collections
 
     from . import gui
 
-    from pygame_cards import controller, card_holder, card_sprite
+    from pygame_cards import controller, card_holder, card_sprite, atlas, renderer, game_object
+    from pygame_cards import instrumentation, animation, replay, scheduler, texture_cache, deck
 except ImportError as err:
     print("Fail loading a module in file:", __file__, "\n", err)
     sys.exit(2)
@@ -26,11 +30,111 @@ class RenderThread(threading.Thread):
         self.app = app
 
     def run(self):
-        """ Starts endless loop and renders game objects in it """
+        """ Starts endless loop and renders game objects in it.
+            Game objects are updated and rendered while GameObject.state_lock is held,
+            so the frame never contains half-modified state.
+        """
         while not self.app.stopped:
-            self.app.clock.tick(300)
-            self.app.render()
-            pygame.display.flip()
+            self.app.frame_scheduler.wait_frame()
+            if not self.app.stopped:
+                stats = self.app.frame_stats
+                if stats is not None:
+                    start = stats.now()
+                with self.app.state_lock:
+                    rects = self.app.render()
+                if stats is not None:
+                    flip_start = stats.now()
+                self.app.update_display(rects)
+                if stats is not None:
+                    stats.add_phase_time("flip", flip_start)
+                    stats.add_frame(start)
+
+
+class FrameScheduler(object):
+    """ Decides when frames are rendered and when the game loop wakes up:
+        - while cards are animated or dragged, frames are rendered at "active_fps" rate;
+        - when state changes (e.g. after mouse click), a frame is rendered on demand,
+          but not more often than at "target_fps" rate;
+        - when idle, the game loop blocks waiting for events (or for the next deadline of
+          app.scheduler) and frames are rendered at "idle_fps" rate, or only on demand if
+          "idle_fps" is 0.
+    """
+
+    def __init__(self, app, target_fps=60, active_fps=60, idle_fps=2):
+        """
+        :param app: object of GameApp class
+        :param target_fps: max frame rate of frames rendered on demand
+        :param active_fps: frame rate while cards are animated or dragged
+        :param idle_fps: frame rate when nothing happens, 0 to render frames only on demand
+        """
+        self.app = app
+        self.target_fps = target_fps
+        self.active_fps = active_fps
+        self.idle_fps = idle_fps
+        self.render_clock = pygame.time.Clock()
+        self.frame_requested = threading.Event()
+        self.frame_ticks = collections.deque()
+
+    def request_frame(self):
+        """ Requests rendering of a new frame. Can be called from any thread. """
+        self.frame_requested.set()
+
+    def is_active(self):
+        """ Checks if there are cards animations or dragged cards.
+        :return: True if frames should be rendered continuously, False otherwise
+        """
+        game_controller = self.app.game_controller
+        return ((game_controller is not None and len(game_controller.moves) > 0) or
+                len(card_sprite.AbstractPygameCardSprite.clicked_sprites) > 0)
+
+    def wait_frame(self):
+        """ Blocks rendering thread until the next frame should be rendered. """
+        if self.is_active():
+            self.render_clock.tick(self.active_fps)
+        else:
+            self.render_clock.tick(self.target_fps)
+            if not self.is_active():
+                self.frame_requested.wait(1.0 / self.idle_fps if self.idle_fps > 0 else None)
+        self.frame_requested.clear()
+
+        now = pygame.time.get_ticks()
+        self.frame_ticks.append(now)
+        while now - self.frame_ticks[0] > 1000:
+            self.frame_ticks.popleft()
+
+    def get_events(self):
+        """ Returns pending events. Blocks waiting for events if nothing is going on.
+        :return: list of pygame events
+        """
+        if self.is_active():
+            self.app.clock.tick(self.active_fps)
+            events = pygame.event.get()
+        else:
+            timeout = 1.0 / self.idle_fps if self.idle_fps > 0 else None
+            delay = self.app.scheduler.get_delay()
+            if delay is not None:
+                timeout = delay if timeout is None else min(timeout, delay)
+            if timeout is not None and timeout * 1000 < 1:
+                events = pygame.event.get()
+            else:
+                if timeout is None:
+                    event = pygame.event.wait()
+                else:
+                    event = pygame.event.wait(int(timeout * 1000))
+                if event.type == pygame.NOEVENT:
+                    events = []
+                else:
+                    events = [event] + pygame.event.get()
+        return events
+
+    def get_fps(self):
+        """ Returns number of frames rendered during the last second.
+        :return: float frame rate
+        """
+        if len(self.frame_ticks) < 2:
+            return 0.0
+        duration = pygame.time.get_ticks() - self.frame_ticks[0]
+        return len(self.frame_ticks) * 1000.0 / max(duration, 1000)
 
 
 class JsonHelper:
@@ -63,6 +167,19 @@ class JsonHelper:
             JsonHelper.log_json_field_warning(field, default)
             dict_[field] = default
 
+    @staticmethod
+    def check_optional_field(field, dict_, type_, default):
+        """ Same as check_field(), but doesn't log a warning if an optional field is missing.
+        :param field: string with field name
+        :param dict_: dictionary in which the field should be checked
+        :param type_: expected type of the field
+        :param default: default value of the field
+        """
+        if field not in dict_:
+            dict_[field] = default
+        else:
+            JsonHelper.check_field(field, dict_, type_, default)
+
     @staticmethod
     def validate_json(json_dict, path=""):
         """ Validates mandatory field in json_dict. Adds default values if some values are
@@ -95,16 +212,45 @@ class JsonHelper:
                 JsonHelper.check_field("back_sprite_file", json_dict["card"], str,
                                        "img/back-side.png")
                 JsonHelper.check_field("move_speed", json_dict["card"], int, 80)
+                JsonHelper.check_optional_field("atlas_file", json_dict["card"], str, "")
+                JsonHelper.check_optional_field("pixel_format", json_dict["card"], str, "auto")
+                JsonHelper.check_optional_field("alpha_tolerance", json_dict["card"], int, 0)
+                JsonHelper.check_optional_field("premultiply_alpha", json_dict["card"], bool,
+                                                False)
             else:
                 JsonHelper.log_json_field_warning("card", path)
                 card_dict = {
                     "size": [65, 85],
                     "front_sprite_path": "img/cards/",
                     "back_sprite_file": "img/back-side.png",
-                    "move_speed": 80
+                    "move_speed": 80,
+                    "atlas_file": "",
+                    "pixel_format": "auto",
+                    "alpha_tolerance": 0,
+                    "premultiply_alpha": False
                 }
                 setattr(json_dict, "card", card_dict)
 
+            # Validate optional "render"
+            if "render" not in json_dict:
+                json_dict["render"] = dict()
+            if isinstance(json_dict["render"], dict):
+                JsonHelper.check_optional_field("mode", json_dict["render"], str, "full")
+                JsonHelper.check_optional_field("target_fps", json_dict["render"], (int, float), 60)
+                JsonHelper.check_optional_field("active_fps", json_dict["render"], (int, float), 60)
+                JsonHelper.check_optional_field("idle_fps", json_dict["render"], (int, float), 2)
+                if json_dict["render"]["idle_fps"] < 0:
+                    JsonHelper.log_json_field_warning("idle_fps", 2, path)
+                    json_dict["render"]["idle_fps"] = 2
+            else:
+                JsonHelper.log_json_field_warning("render", path)
+                json_dict["render"] = {
+                    "mode": "full",
+                    "target_fps": 60,
+                    "active_fps": 60,
+                    "idle_fps": 2
+                }
+
         return json_dict
 
     @staticmethod
@@ -127,11 +273,14 @@ class GameApp(object, metaclass=abc.ABCMeta):
     """ GameApp class controls the application flow and settings. """
 
     class GuiInterface(object):
-        """ Inner class with GUI interface functions """
+        """ Inner class with GUI interface functions.
+            Methods hold GameObject.state_lock, so they can be called from any thread.
+        """
         def __init__(self, screen):
             self.screen = screen
             self.gui_list = []
 
+        @game_object.synchronized
         def show_label(self, position, text, text_size=15, color="black", timeout=3, id_=""):
             """ Creates text label on the screen. The label is stored in the internal gui_list
             list and gets rendered automatically.
@@ -146,8 +295,10 @@ class GameApp(object, metaclass=abc.ABCMeta):
             """
             label = gui.Label(self.screen, position, text, text_size, color, timeout, id_)
             self.gui_list.append(label)
+            label.mark_dirty()
             return label
 
+        @game_object.synchronized
         def show_button(self, rectangle, callback, text, text_size=15, color=(0, 0, 0), id_=""):
             """ Creates text button on the screen. The button is stored in the internal gui_list
             list and gets rendered automatically.
@@ -161,41 +312,85 @@ class GameApp(object, metaclass=abc.ABCMeta):
             """
             button = gui.Button(self.screen, rectangle, callback, text, text_size, color, id_)
             self.gui_list.append(button)
+            button.mark_dirty()
             return button
 
+        @game_object.synchronized
+        def show_stats(self, position, stats, text_size=14, color=(255, 255, 255)):
+            """ Shows overlay with frame statistics summary, which is refreshed a few times
+            per second. The overlay can be hidden by hide_by_id(gui.StatsOverlay.overlay_id).
+            :param position: tuple with coordinates (x,y) of top left corner of the overlay
+            :param stats: instrumentation.FrameStats object
+            :param text_size: integer text size
+            :param color: tuple (R, G, B) with text color
+            :return: object of gui.StatsOverlay
+            """
+            self.hide_by_id(gui.StatsOverlay.overlay_id)
+            overlay = gui.StatsOverlay(self.screen, position, stats, text_size, color)
+            self.gui_list.append(overlay)
+            overlay.mark_dirty()
+            return overlay
+
+        @game_object.synchronized
         def hide_by_id(self, id_):
             """ Hides and destroys an object of gui.AbstractGUI (Button, Label etc.)
             :param id_: string with unique ID of GUI element
             """
             for element in self.gui_list:
-                if hasattr(element, "id") and element.id_ == id_:
+                if hasattr(element, "id_") and element.id_ == id_:
                     self.gui_list.remove(element)
+                    element.mark_dirty()
+                    element.release()
                     break
 
+        @game_object.synchronized
+        def update(self):
+            """ Removes expired GUI elements from the gui_list and updates the rest.
+            Called before each frame.
+            """
+            expired = [e for e in self.gui_list if hasattr(e, 'expired') and e.expired]
+            for element in expired:
+                self.gui_list.remove(element)
+                element.mark_dirty()
+            for element in self.gui_list:
+                element.update()
+
+        @game_object.synchronized
         def render(self):
             """ Renders all current GUI elements in the gui_list. """
             for element in self.gui_list:
-                if hasattr(element, 'expired') and element.expired:
-                    self.gui_list.remove(element)
-                    continue
                 element.render()
 
-        def check_mouse(self, down):
+        @game_object.synchronized
+        def check_mouse(self, down, pos=None):
             """ Process mouse event for all GUI elements in the gui_list.
             :param down: boolean, True if mouse down event, False otherwise.
+            :param pos: tuple with mouse coordinates (x, y), the current mouse position by default
             """
-            for element in self.gui_list:
-                element.check_mouse(pygame.mouse.get_pos(), down)
+            if pos is None:
+                pos = pygame.mouse.get_pos()
+            for element in list(self.gui_list):
+                element.check_mouse(pos, down)
 
+        @game_object.synchronized
         def clean(self):
             """ Destroys all elements in the gui_list. """
+            for element in self.gui_list:
+                element.mark_dirty()
+                element.release()
             self.gui_list = []
 
-    def __init__(self, json_path, game_controller=None):
+    def __init__(self, json_path, game_controller=None, headless=False):
         """
         :param json_path: path to configuration json file
         :param game_controller: object of Controller class
+        :param headless: if True, the game runs without a window: display mode is not set (SDL
+            dummy video driver is used), cards' images are not loaded, nothing is rendered, cards
+            animations complete immediately and self.scheduler runs on a virtual clock. Game
+            objects can be created and controlled as usual, e.g. for simulations, testing or bots
+            training. execute() doesn't wait for events, see run_headless().
         """
+        self.headless = headless
         # Windows properties that will be set in load_settings_from_json()
         self.title = None
         self.background_color = None
@@ -205,21 +400,48 @@ class GameApp(object, metaclass=abc.ABCMeta):
         if self.settings_json is None:
             raise ValueError('settings.json file is not loaded', 'GameApp.__init__')
         self.load_settings_from_json()
+        if self.headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+        card_sprite.CardSprite.load_images = not self.headless
+        animation.Animator.enabled = not self.headless
         pygame.init()
         pygame.font.init()
-        pygame.display.set_caption(self.title)
-        self.screen = pygame.display.set_mode(self.size)
+        if self.headless:
+            self.screen = pygame.Surface(self.size)
+        else:
+            pygame.display.set_caption(self.title)
+            self.screen = pygame.display.set_mode(self.size)
         self.screen.fill(self.background_color)
+        if not self.headless:
+            self.load_card_atlas()
+        self.renderer = self.create_renderer(self.settings_json["render"]["mode"])
         self.clock = pygame.time.Clock()
+        render_json = self.settings_json["render"]
+        self.frame_scheduler = FrameScheduler(self, render_json["target_fps"],
+                                              render_json["active_fps"], render_json["idle_fps"])
         self.render_thread = RenderThread(self)
+        self.headless_time = 0.0  # Virtual clock of self.scheduler in headless mode, seconds
+        if self.headless:
+            self.scheduler = scheduler.Scheduler(clock=self.get_headless_time)
+        else:
+            self.scheduler = scheduler.Scheduler()
+        gui.AbstractGUI.scheduler = self.scheduler
         self.stopped = False
+        self.state_lock = game_object.GameObject.state_lock
         self.mouse_timestamp = None  # Used for double click calculation
+        self.frame_stats = None  # FrameStats object, set by enable_instrumentation()
+        self.recorder = None  # replay.InputRecorder object, set by start_recording()
         self.gui_interface = GameApp.GuiInterface(self.screen)
+        self.game_controller = None
         if isinstance(game_controller, controller.Controller):
             self.game_controller = game_controller
             self.game_controller.gui_interface = self.gui_interface
+            self.game_controller.frame_scheduler = self.frame_scheduler
+            self.game_controller.scheduler = self.scheduler
             self.game_controller.settings_json = self.settings_json
             self.game_controller.build_objects()
+            logging.debug("Card textures after build_objects(): " +
+                          str(card_sprite.CardSprite.textures.get_stats()))
 
     def is_double_click(self):
         if self.mouse_timestamp is None:
@@ -233,18 +455,58 @@ class GameApp(object, metaclass=abc.ABCMeta):
                 return True
         return False
 
+    def get_headless_time(self):
+        """ Returns time of the virtual clock used by self.scheduler in headless mode.
+        :return: seconds, advanced by run_headless()
+        """
+        return self.headless_time
+
     def process_events(self):
-        """ Processes mouse events and quit event """
-        for event in pygame.event.get():
+        """ Waits for events (see FrameScheduler.get_events()) and processes them,
+            see handle_events().
+        """
+        self.handle_events(self.frame_scheduler.get_events())
+
+    def handle_events(self, events):
+        """ Processes mouse events and quit event.
+            Events are processed while GameObject.state_lock is held. A new frame is requested
+            after events that can change game state are processed, so the frame shows their result.
+            In headless mode quit event only sets self.stopped, so run_headless() returns.
+        :param events: list of pygame events
+        """
+        stats = self.frame_stats
+        if stats is not None:
+            start = stats.now()
+        for event in events:
             if event.type == pygame.QUIT:
                 self.stopped = True
-                self.render_thread.join()
+                if self.headless:
+                    break
+                self.frame_scheduler.request_frame()
+                if self.render_thread.is_alive():
+                    self.render_thread.join()
+                self.stop_recording()
                 self.game_controller.cleanup()
                 sys.exit()
-            elif event.type == pygame.MOUSEBUTTONUP:
-                self.process_mouse_event(False, self.is_double_click())
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                self.process_mouse_event(True)
+            with self.state_lock:
+                if event.type == pygame.MOUSEBUTTONUP:
+                    self.process_mouse_event(False, self.is_double_click(), event.pos)
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    self.process_mouse_event(True, pos=event.pos)
+                elif event.type == pygame.VIDEOEXPOSE:
+                    self.mark_screen_dirty()
+                if stats is not None and event.type in (pygame.MOUSEBUTTONUP,
+                                                        pygame.MOUSEBUTTONDOWN):
+                    stats.add_input_event()
+                if event.type != pygame.MOUSEMOTION:
+                    self.frame_scheduler.request_frame()
+        if stats is not None and len(events) > 0:
+            stats.add_phase_time("events", start)
+
+    def mark_screen_dirty(self):
+        """ Forces repainting of the whole window in the next frame. """
+        if isinstance(self.renderer, renderer.DirtyRectRenderer):
+            self.renderer.dirty_rects.add_all()
 
     def load_settings_from_json(self):
         """ Parses configuration json file and sets properties with values from the json.
@@ -262,35 +524,193 @@ class GameApp(object, metaclass=abc.ABCMeta):
         # Init class members from other modules to avoid having a global varialbe for settings_json
         card_holder.CardsHolder.card_json = self.settings_json["card"]
         card_sprite.CardSprite.card_json = self.settings_json["card"]
-
-    def process_mouse_event(self, down, double_click=False):
+        card_sprite.CardSprite.pixel_format = self.settings_json["card"]["pixel_format"]
+        texture_cache.TextureCache.alpha_tolerance = self.settings_json["card"]["alpha_tolerance"]
+        texture_cache.TextureCache.premultiply = self.settings_json["card"]["premultiply_alpha"]
+
+    def create_renderer(self, mode):
+        """ Creates renderer object for the render mode from settings json.
+        :param mode: string with render mode: "full" - the whole window is repainted every frame,
+                     "dirty" - only changed areas of the window are repainted,
+                     "layered" - cards are rendered by pygame.sprite.LayeredDirty group, which
+                     repaints only changed areas (see renderer.LayeredRenderer).
+        :return: renderer object
+        """
+        if mode == "dirty":
+            dirty_rects = renderer.DirtyRects()
+            card_sprite.AbstractPygameCardSprite.dirty_rects = dirty_rects
+            card_holder.CardsHolder.dirty_rects = dirty_rects
+            gui.AbstractGUI.dirty_rects = dirty_rects
+            return renderer.DirtyRectRenderer(self, dirty_rects)
+        elif mode == "layered":
+            # Sprites are tracked by the group, holders and GUI elements mark changed areas
+            dirty_rects = renderer.DirtyRects()
+            card_sprite.AbstractPygameCardSprite.dirty_rects = None
+            card_holder.CardsHolder.dirty_rects = dirty_rects
+            gui.AbstractGUI.dirty_rects = dirty_rects
+            return renderer.LayeredRenderer(self, dirty_rects)
+        elif mode != "full":
+            logging.warning("Unknown render mode '" + str(mode) + "', using 'full'")
+        card_sprite.AbstractPygameCardSprite.dirty_rects = None
+        card_holder.CardsHolder.dirty_rects = None
+        gui.AbstractGUI.dirty_rects = None
+        return renderer.FullRenderer(self)
+
+    def load_card_atlas(self):
+        """ Loads card atlas if "atlas_file" is set in the "card" node of settings json.
+            Cards' sprites are sliced from the atlas instead of being loaded from separate files.
+            If the atlas doesn't exist, cards' sprites are loaded from separate files.
+        """
+        card_atlas = atlas.CardAtlas.load(self.settings_json["card"])
+        if card_atlas is not None:
+            card_atlas.install(card_sprite.CardSprite.textures,
+                               card_sprite.CardSprite.pixel_format)
+        elif self.settings_json["card"]["atlas_file"] != "":
+            logging.info("Card atlas " + self.settings_json["card"]["atlas_file"] +
+                         " is not found, loading separate sprite files")
+
+    def process_mouse_event(self, down, double_click=False, pos=None):
         """ Processes mouse events, invokes mouse events handlers in game_controller
             and gui_interfaces
         :param down: boolean, True for mouse down event, False for mouse up event
         :param double_click: boolean, True if it's a double click event
+        :param pos: tuple with mouse coordinates (x, y), the current mouse position by default
         """
+        if pos is None:
+            pos = pygame.mouse.get_pos()
+        if self.recorder is not None:
+            self.recorder.record(down, pos, double_click)
+        card_sprite.AbstractPygameCardSprite.update_clicked(pos)
         if self.gui_interface is not None:
-            self.gui_interface.check_mouse(down)
+            self.gui_interface.check_mouse(down, pos)
         if self.game_controller is not None:
-            self.game_controller.process_mouse_event(pygame.mouse.get_pos(), down, double_click)
+            self.game_controller.process_mouse_event(pos, down, double_click)
+
+    def start_recording(self, path, seed=None):
+        """ Starts recording of mouse events to a file, which can be replayed with
+            replay.replay(). Should be called before the game is started: decks get a random
+            generator seeded with the seed (see seed_decks()), so cards are dealt the same way
+            in replay.
+        :param path: path to the recording file
+        :param seed: int seed of the decks' random generator, random by default
+        """
+        if seed is None:
+            seed = random.randrange(1 << 32)
+        with self.state_lock:
+            self.seed_decks(seed)
+            self.recorder = replay.InputRecorder(path, seed)
+
+    def seed_decks(self, seed):
+        """ Sets a random generator seeded with a seed to decks among rendered objects of
+            the game controller (see Deck.set_rng()). The global random module is not changed.
+        :param seed: int seed
+        :return: random.Random object
+        """
+        rng = random.Random(seed)
+        if self.game_controller is not None and self.game_controller.rendered_objects is not None:
+            for obj in self.game_controller.rendered_objects:
+                if isinstance(obj, deck.Deck):
+                    obj.set_rng(rng)
+        return rng
+
+    def stop_recording(self):
+        """ Stops recording of mouse events, the final game state is saved to the recording.
+            Called when the app is closed.
+        """
+        with self.state_lock:
+            if self.recorder is not None:
+                state = None
+                if self.game_controller is not None:
+                    self.game_controller.moves.cancel_all(finish=True)
+                    state = self.game_controller.save_state()
+                self.recorder.close(state)
+                self.recorder = None
 
     def init_game(self):
         """ Initializes game and gui objects """
         #self.init_gui()
-        self.game_controller.start_game()
+        with self.state_lock:
+            self.game_controller.start_game()
 
     def render(self):
-        """ Renders game objects and gui elements """
-        pygame.draw.rect(self.screen, self.background_color, (0, 0, self.size[0], self.size[1]))
+        """ Updates and renders game objects and gui elements.
+        :return: list of updated screen areas that should be passed to update_display()
+        """
+        stats = self.frame_stats
+        if stats is not None:
+            start = stats.now()
         if self.game_controller is not None:
-            self.game_controller.render_objects(self.screen)
+            self.game_controller.update_objects()
         if self.gui_interface is not None:
-            self.gui_interface.render()
+            self.gui_interface.update()
+        if self.headless:
+            return []
+        if stats is None:
+            return self.renderer.render()
+        stats.add_phase_time("update", start)
+        start = stats.now()
+        rects = self.renderer.render()
+        stats.add_phase_time("render", start)
+        return rects
+
+    def update_display(self, rects):
+        """ Shows rendered frame on the display.
+        :param rects: list of updated screen areas returned by render()
+        """
+        self.renderer.update_display(rects)
+
+    def get_fps(self):
+        """ Returns actual frame rate.
+        :return: float number of frames rendered during the last second
+        """
+        return self.frame_scheduler.get_fps()
+
+    def enable_instrumentation(self, overlay=False, position=(5, 5), window=300):
+        """ Starts collecting frame statistics: time of game loop phases, frame times, input
+            latency and counters of blits and created surfaces.
+        :param overlay: boolean, if True statistics summary is shown in the window
+        :param position: tuple with coordinates (x,y) of the overlay
+        :param window: number of the latest frames used for averages and histogram
+        :return: instrumentation.FrameStats object
+        """
+        with self.state_lock:
+            self.frame_stats = instrumentation.FrameStats(window)
+            instrumentation.FrameStats.active = self.frame_stats
+            if overlay:
+                self.gui_interface.show_stats(position, self.frame_stats)
+        return self.frame_stats
+
+    def disable_instrumentation(self):
+        """ Stops collecting frame statistics and hides the overlay """
+        with self.state_lock:
+            self.frame_stats = None
+            instrumentation.FrameStats.active = None
+            self.gui_interface.hide_by_id(gui.StatsOverlay.overlay_id)
+
+    def get_frame_stats(self):
+        """ Returns collected frame statistics, see instrumentation.FrameStats.get_report().
+        :return: dictionary with statistics, None if instrumentation is disabled
+        """
+        stats = self.frame_stats
+        if stats is None:
+            return None
+        with self.state_lock:
+            return stats.get_report()
 
     def execute_game_logic(self):
-        """ Executes game logic. Should be called recurrently from the game loop """
-        if self.game_controller is not None:
-            self.game_controller.execute_game()
+        """ Executes game logic: runs due callbacks of self.scheduler and
+            game_controller.execute_game(). Should be called recurrently from the game loop.
+        """
+        stats = self.frame_stats
+        if stats is not None:
+            start = stats.now()
+        with self.state_lock:
+            if self.scheduler.run_due() > 0:
+                self.frame_scheduler.request_frame()
+            if self.game_controller is not None:
+                self.game_controller.execute_game()
+        if stats is not None:
+            stats.add_phase_time("logic", start)
 
     def start_render_thread(self):
         """ Starts game rendering thread (object of RenderThread class) """
@@ -299,12 +719,49 @@ class GameApp(object, metaclass=abc.ABCMeta):
     def run_game_loop(self):
         """ Runs endless loop where game logic and events processing are executed. """
         while 1:
-            self.clock.tick(60)
             self.process_events()
             self.execute_game_logic()
 
+    def run_headless(self, until=None, max_steps=None):
+        """ Runs the game loop without waiting for events or time: each step processes pending
+            events (e.g. posted with pygame.event.post()) and executes game logic. When no events
+            are pending, the virtual clock of self.scheduler jumps to the next deadline, so delayed
+            callbacks run immediately. Can be called in headless mode only, after init_game().
+        :param until: function without arguments, the loop stops when it returns True. If None,
+            the loop stops when there are no pending events and no scheduled callbacks (pass
+            until or max_steps if periodic callbacks are scheduled).
+        :param max_steps: maximal number of steps, unlimited if None
+        :return: number of steps executed
+        """
+        if not self.headless:
+            raise RuntimeError('GameApp.run_headless() requires headless mode')
+        steps = 0
+        while not self.stopped and (max_steps is None or steps < max_steps):
+            if until is not None and until():
+                break
+            self.handle_events(pygame.event.get())
+            self.execute_game_logic()
+            steps += 1
+            if pygame.event.peek():
+                continue
+            delay = self.scheduler.get_delay()
+            if delay is not None:
+                self.headless_time += delay
+            elif until is None:
+                break
+        return steps
+
     def execute(self):
-        """ Initializes game, starts rendering thread and starts game endless loop """
+        """ Initializes game, starts rendering thread and starts game endless loop.
+            In headless mode rendering thread is not started and the game is run with
+            run_headless(), so execute() returns when the game has nothing more to do or quit
+            event is posted.
+        """
         self.init_game()
+        if self.headless:
+            self.run_headless()
+            self.stop_recording()
+            self.game_controller.cleanup()
+            return
         self.start_render_thread()
         self.run_game_loop()
@@ -2,6 +2,8 @@
 try:
     import sys
     import abc
+    import threading
+    import functools
 
     from pygame_cards import enums
 except ImportError as err:
@@ -9,15 +11,44 @@ except ImportError as err:
     sys.exit(2)
 
 
+def synchronized(method):
+    """ Decorator that makes a method hold GameObject.state_lock while it's executed.
+    :param method: function or method to decorate
+    :return: decorated function
+    """
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with GameObject.state_lock:
+            return method(*args, **kwargs)
+    return wrapper
+
+
 class GameObject(object, metaclass=abc.ABCMeta):
     """ Game object interface, implements Composite design pattern.
         An instance can be a single object (e.g. card) or a structure of objects (e.g. deck).
+
+    Attributes:
+        state_lock - re-entrant lock that protects state of all game objects and GUI elements.
+            Game objects are rendered in a separate thread (see game_app.RenderThread), so:
+            - the rendering thread holds the lock while it updates and renders a frame;
+            - GameApp holds the lock while it processes events and calls Controller methods;
+            - CardsHolder and GuiInterface methods that modify their lists hold the lock
+              (see synchronized decorator);
+            - any other thread (timers, bots etc.) must hold the lock while it changes game
+              objects, e.g. "with GameObject.state_lock: ...". It's re-entrant, so holding it
+              when calling CardsHolder methods is safe.
     """
 
-    def __init__(self, children=[], grab_policy=enums.GrabPolicy.no_grab):
+    __slots__ = ()  # Lets lightweight derived classes (e.g. Card) define __slots__
+
+    state_lock = threading.RLock()
+
+    def __init__(self, children=None, grab_policy=enums.GrabPolicy.no_grab):
         """
         :param children: list of children objects
         """
+        if children is None:
+            children = []
         self.children = children
         self.grab_policy = grab_policy
 
@@ -28,6 +59,13 @@ class GameObject(object, metaclass=abc.ABCMeta):
         if isinstance(child, GameObject):
             self.children.append(child)
 
+    def update(self):
+        """ Updates state of the object (e.g. position) before it's rendered. Called every frame
+            before render_all(). Does nothing by default, can be overridden in derived classes.
+            Objects should not change their position in render(), only in this method.
+        """
+        pass
+
     def render_all(self, screen):
         """ Renders current object and children objects.
             Internally calls abstract method render() that should be implemented in derived classes.
@@ -2,25 +2,134 @@
 try:
     import sys
     import abc
+    import collections
     import pygame
-    from threading import Timer
+    from pygame_cards import instrumentation
 except ImportError as err:
     print("Fail loading a module in file:", __file__, "\n", err)
     sys.exit(2)
 
 
+class FontRegistry(object):
+    """ Fonts shared by GUI elements. pygame.font.SysFont() scans system fonts, so each font is
+    created once and reused by all elements with the same font name, size and weight.
+    """
+
+    def __init__(self):
+        self.fonts = {}
+
+    def get(self, size, name='arial', bold=True):
+        """ Returns a font, creates it on the first request.
+        :param size: integer text size
+        :param name: string with system font name
+        :param bold: boolean, True for bold font
+        :return: tuple (key, pygame.font.Font object), key identifies the font in TextCache
+        """
+        key = name, size, bold
+        font = self.fonts.get(key)
+        if font is None:
+            font = pygame.font.SysFont(name, size, bold=bold)
+            self.fonts[key] = font
+        return key, font
+
+
+class TextCache(object):
+    """ LRU cache of rendered text surfaces keyed by (text, font key, color), so GUI elements
+    with the same text don't rasterize it again.
+
+    Attributes:
+        hits - number of render() calls served from the cache
+        misses - number of render() calls that rendered text
+    """
+
+    def __init__(self, capacity=256):
+        """
+        :param capacity: max number of cached surfaces
+        """
+        self.capacity = capacity
+        self.surfaces = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, text, font_key, font, color):
+        """ Returns surface with rendered text.
+        :param text: string with text
+        :param font_key: key of the font returned by FontRegistry.get()
+        :param font: pygame.font.Font object
+        :param color: text color, tuple (R, G, B) or color name
+        :return: pygame.Surface object, should not be modified
+        """
+        key = text, font_key, color
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = font.render(text, True, color)
+        if instrumentation.FrameStats.active is not None:
+            instrumentation.FrameStats.active.surfaces_created += 1
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+
 class AbstractGUI(metaclass=abc.ABCMeta):
+    """ Base class for GUI elements.
+
+    Attributes:
+        dirty_rects - renderer.DirtyRects object where GUI elements mark changed screen areas.
+                      None if dirty rectangles rendering is not used.
+        fonts - FontRegistry shared by all GUI elements.
+        texts - TextCache shared by all GUI elements.
+        scheduler - scheduler.Scheduler object that expires labels, set by GameApp.
+    """
+
+    dirty_rects = None
+    scheduler = None
+    fonts = FontRegistry()
+    texts = TextCache()
+
     def __init__(self, screen, text="", text_size=15, color=(0, 0, 0), id_=""):
         self.screen = screen
         self.text = text
         self.text_size = text_size
-        self.color = color
+        self.color = tuple(color) if isinstance(color, list) else color
         self.id_ = id_
 
     @abc.abstractmethod
     def check_mouse(self, p, down):
         pass
 
+    def update(self):
+        """ Updates state of the element before a frame is rendered. Does nothing by default. """
+        pass
+
+    def get_rect(self):
+        """ Returns area occupied by the element on the screen.
+        :return: tuple (x, y, width, height)
+        """
+        return 0, 0, 0, 0
+
+    def mark_dirty(self):
+        """ Marks area of the element as changed if dirty rectangles rendering is used. """
+        if AbstractGUI.dirty_rects is not None:
+            AbstractGUI.dirty_rects.add(self.get_rect())
+
+    def release(self):
+        """ Called when the element is removed from the screen. Does nothing by default. """
+        pass
+
+    def render_text(self, text, color):
+        """ Returns surface with text rendered with the element's font, see TextCache.render()
+        :param text: string with text
+        :param color: text color, tuple (R, G, B) or color name
+        :return: pygame.Surface object, should not be modified
+        """
+        font_key, font = AbstractGUI.fonts.get(self.text_size)
+        return AbstractGUI.texts.render(text, font_key, font, color)
+
 
 class Button(AbstractGUI):
     inner_color = (191, 191, 191)
@@ -35,9 +144,8 @@ class Button(AbstractGUI):
     def __init__(self, screen, rect, onclick, text="", text_size=15, color=(0, 0, 0), id_=""):
         AbstractGUI.__init__(self, screen, text, text_size, color, id_)
         self.onclick = onclick
-        self.font = pygame.font.SysFont('arial', self.text_size, bold=1)
-        self.text_surface = self.font.render(self.text, True, color)
-        text_size = self.font.size(self.text)
+        self.text_surface = self.render_text(self.text, self.color)
+        text_size = self.text_surface.get_size()
         self.rect = (rect[0], rect[1],
                      text_size[0] + 2 * Button.text_margin[0],
                      text_size[1] + 2 * Button.text_margin[1])
@@ -45,6 +153,9 @@ class Button(AbstractGUI):
                          self.rect[1] + (self.rect[3] - text_size[1])/2)
         self.pressed = False
 
+    def get_rect(self):
+        return self.rect
+
     def render(self):
         if self.pressed:
             pygame.draw.rect(self.screen, Button.inner_pressed_color, self.rect)
@@ -55,6 +166,8 @@ class Button(AbstractGUI):
             pygame.draw.rect(self.screen, Button.frame_color, self.rect, Button.frame_thickness)
 
         self.screen.blit(self.text_surface, self.text_pos)
+        if instrumentation.FrameStats.active is not None:
+            instrumentation.FrameStats.active.blits += 1
 
     def check_mouse(self, pos, down):
         if (self.rect[0] < pos[0] < self.rect[0] + self.rect[2] and
@@ -64,26 +177,75 @@ class Button(AbstractGUI):
             else:
                 self.pressed = False
                 self.onclick()
+            self.mark_dirty()
 
 
 class Label(AbstractGUI):
+    """ Text label. The text surface is rendered when the text changes, not every frame. """
+
     def __init__(self, screen, pos, text="", text_size=15, color=(0, 0, 0), timeout=3, id_=""):
+        self.text_surface = None
         AbstractGUI.__init__(self, screen, text, text_size, color, id_)
-        self.font = pygame.font.SysFont('arial', self.text_size, bold=1)
         self.pos = pos
         self.expired = False
-        if timeout != 0:
-            self.timer = Timer(timeout, self.expire)
-            self.timer.start()
+        self.timer = None
+        if timeout != 0 and AbstractGUI.scheduler is not None:
+            self.timer = AbstractGUI.scheduler.call_later(timeout, self.expire)
 
     def expire(self):
         self.expired = True
+        self.timer = None
+
+    def release(self):
+        if self.timer is not None:
+            AbstractGUI.scheduler.cancel(self.timer)
+            self.timer = None
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, text):
+        if self.text_surface is None or text != self._text:
+            self._text = text
+            self.text_surface = None
+
+    def get_text_surface(self):
+        if self.text_surface is None:
+            self.text_surface = self.render_text(self._text, self.color)
+        return self.text_surface
+
+    def get_rect(self):
+        size = self.get_text_surface().get_size()
+        return self.pos[0], self.pos[1], size[0], size[1]
 
     def render(self):
-        if self.text != "":
-            text_surface = self.font.render(self.text, True, Button.text_color)
-            self.screen.blit(text_surface, self.pos)
+        if self._text != "":
+            self.screen.blit(self.get_text_surface(), self.pos)
+            if instrumentation.FrameStats.active is not None:
+                instrumentation.FrameStats.active.blits += 1
 
     def check_mouse(self, pos, down):
         """ No action on click for text label """
         pass
+
+
+class StatsOverlay(Label):
+    """ Label that shows summary of frame statistics (see instrumentation.FrameStats) """
+
+    overlay_id = "frame_stats_overlay"
+    refresh_interval = 250  # milliseconds between text updates
+
+    def __init__(self, screen, pos, stats, text_size=14, color=(255, 255, 255)):
+        Label.__init__(self, screen, pos, "", text_size, color, 0, StatsOverlay.overlay_id)
+        self.stats = stats
+        self.refresh_ticks = None
+
+    def update(self):
+        now = pygame.time.get_ticks()
+        if self.refresh_ticks is None or now - self.refresh_ticks >= StatsOverlay.refresh_interval:
+            self.refresh_ticks = now
+            self.mark_dirty()
+            self.text = self.stats.get_summary()
+            self.mark_dirty()
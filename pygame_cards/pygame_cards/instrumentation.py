@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+try:
+    import sys
+    import time
+    import collections
+except ImportError as err:
+    print("Fail loading a module in file:", __file__, "\n", err)
+    sys.exit(2)
+
+
+class FrameStats(object):
+    """ Collects frame timing statistics: time spent in each phase of the game loop, rolling
+    histogram of frame times, latency between a mouse event and the frame that shows its result,
+    and counters of blits and created surfaces.
+
+    Instrumentation is disabled by default and costs a single attribute check in instrumented
+    places. It's enabled by GameApp.enable_instrumentation(), which sets FrameStats.active.
+
+    Attributes:
+        active - FrameStats object that collects statistics, None if instrumentation is disabled
+    """
+
+    active = None
+
+    phases = ("events", "logic", "update", "render", "flip")
+
+    # Upper bounds (in milliseconds) of frame time histogram buckets, the last bucket is open
+    histogram_bounds = (5, 10, 17, 34, 50, 100)
+
+    def __init__(self, window=300):
+        """
+        :param window: number of the latest samples used for averages and histogram
+        """
+        self.window = window
+        self.phase_times = dict((phase, collections.deque(maxlen=window))
+                                for phase in FrameStats.phases)
+        self.frame_times = collections.deque(maxlen=window)
+        self.input_latencies = collections.deque(maxlen=window)
+        self.last_frame_end = None
+        self.pending_input = None
+        self.frames = 0
+        self.blits = 0
+        self.surfaces_created = 0
+
+    @staticmethod
+    def now():
+        """ Returns current value of the performance counter in seconds """
+        return time.perf_counter()
+
+    def add_phase_time(self, phase, start):
+        """ Records duration of a phase.
+        :param phase: string, one of FrameStats.phases
+        :param start: value of FrameStats.now() when the phase started
+        """
+        self.phase_times[phase].append((time.perf_counter() - start) * 1000.0)
+
+    def add_input_event(self):
+        """ Records that an input event was processed and should appear in the next frame. """
+        if self.pending_input is None:
+            self.pending_input = time.perf_counter()
+
+    def add_frame(self, start):
+        """ Records a frame shown on the display.
+        :param start: value of FrameStats.now() when rendering of the frame started
+        """
+        end = time.perf_counter()
+        if self.last_frame_end is not None:
+            self.frame_times.append((end - self.last_frame_end) * 1000.0)
+        self.last_frame_end = end
+        if self.pending_input is not None and self.pending_input <= start:
+            self.input_latencies.append((end - self.pending_input) * 1000.0)
+            self.pending_input = None
+        self.frames += 1
+
+    def get_histogram(self):
+        """ Returns histogram of the latest frame times.
+        :return: list of tuples (upper bound in ms or None for the last bucket, number of frames)
+        """
+        bounds = FrameStats.histogram_bounds
+        counts = [0] * (len(bounds) + 1)
+        for frame_time in self.frame_times:
+            bucket = 0
+            while bucket < len(bounds) and frame_time > bounds[bucket]:
+                bucket += 1
+            counts[bucket] += 1
+        return list(zip(list(bounds) + [None], counts))
+
+    @staticmethod
+    def get_average(values):
+        """ Returns average of values or 0 if there are no values """
+        return sum(values) / len(values) if len(values) > 0 else 0.0
+
+    def get_report(self):
+        """ Returns collected statistics.
+        :return: dictionary with average phase times, frame time and input latency (in ms),
+                 frame time histogram and counters
+        """
+        return {
+            "phases": dict((phase, FrameStats.get_average(times))
+                           for phase, times in self.phase_times.items()),
+            "frame_time": FrameStats.get_average(self.frame_times),
+            "frame_time_max": max(self.frame_times) if len(self.frame_times) > 0 else 0.0,
+            "histogram": self.get_histogram(),
+            "input_latency": FrameStats.get_average(self.input_latencies),
+            "input_latency_max": (max(self.input_latencies)
+                                  if len(self.input_latencies) > 0 else 0.0),
+            "frames": self.frames,
+            "blits": self.blits,
+            "surfaces_created": self.surfaces_created
+        }
+
+    def get_summary(self):
+        """ Returns short text summary of the statistics, e.g. for an overlay.
+        :return: string
+        """
+        report = self.get_report()
+        text = "frame %.1f ms (max %.1f), input %.1f ms | " % (
+            report["frame_time"], report["frame_time_max"], report["input_latency"])
+        text += " ".join("%s %.2f" % (phase, report["phases"][phase])
+                         for phase in FrameStats.phases)
+        text += " | blits %d, surfaces %d" % (self.blits, self.surfaces_created)
+        return text
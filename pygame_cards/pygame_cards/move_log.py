@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+""" Undo/redo log of changes of cards holders.
+
+Each change is a 32-bit record in a ring buffer:
+    bits 0..2   operation: ADD, POP, FLIP, MOVE_ALL or ACTION_END (marks the end of a user action)
+    bits 3..10  index of the holder in the list of logged holders
+    bits 11..   argument of the operation:
+                ADD, POP - card code | face_up << 6 | top << 7 (card was added to/removed from top)
+                FLIP - index of the card in the holder
+                MOVE_ALL - index of the target holder | number of cards << 8
+
+When the ring buffer is full, the oldest actions are dropped up to a checkpoint: contents of
+holders encoded by the serialization module, taken every checkpoint_interval actions. Checkpoints
+also restore holders if a record doesn't match their contents (e.g. a holder was changed by code
+that isn't logged). Changes that records don't touch, like the order of cards shuffled by
+Deck.shuffle(), aren't detected, so holders should be changed only by logged methods or the log
+should be cleared.
+"""
+try:
+    import sys
+    import array
+
+    from pygame_cards import card, game_object, serialization
+except ImportError as err:
+    print("Fail loading a module in file:", __file__, "\n", err)
+    sys.exit(2)
+
+ACTION_END = 0
+ADD = 1
+POP = 2
+FLIP = 3
+MOVE_ALL = 4
+
+_FACE_UP = 1 << 6
+_TOP = 1 << 7
+
+
+class MoveLog(object):
+    """ Records changes of cards holders, grouped into user actions, and undoes/redoes them.
+    Changes are reported by CardsHolder methods (add_card(), pop_card(), flip_card(),
+    move_all_cards(), try_grab_card()) when the log is set as CardsHolder.move_log.
+    Changes of holders that are not logged are ignored, so cards can pass through temporary holders
+    (e.g. grabbed cards) within an action.
+    """
+
+    def __init__(self, holders, capacity=65536, checkpoint_interval=256):
+        """
+        :param holders: list of CardsHolder objects which changes are logged (up to 256)
+        :param capacity: max number of records kept
+        :param checkpoint_interval: number of actions between checkpoints
+        """
+        if len(holders) > 256:
+            raise ValueError('Move log supports up to 256 holders')
+        self.holders = list(holders)
+        self.holder_index = dict((id(holder), i) for i, holder in enumerate(self.holders))
+        self.capacity = capacity
+        self.checkpoint_interval = checkpoint_interval
+        self.records = array.array('I', bytes(4 * capacity))
+        # Absolute positions of records: [first, end) are kept, records before pos are applied
+        self.first = 0
+        self.pos = 0
+        self.end = 0
+        self.checkpoints = []  # List of tuples (position, encoded state)
+        self.actions_since_checkpoint = 0
+        self.suspended = 0
+        self.hand = dict()  # Cards removed from logged holders during undo/redo by card code
+        self.clear()
+
+    def clear(self):
+        """ Clears the history and takes a checkpoint of the current contents of holders.
+        Should be called when a new game is started.
+        """
+        self.first = self.pos = self.end = 0
+        self.checkpoints = []
+        self.take_checkpoint()
+
+    def __len__(self):
+        """ Returns number of kept records """
+        return self.end - self.first
+
+    def take_checkpoint(self):
+        """ Saves contents of holders at the current position """
+        self.checkpoints.append((self.pos, serialization.encode(self.holders)))
+        self.actions_since_checkpoint = 0
+
+    def suspend(self):
+        """ Stops recording until resume() is called. Calls can be nested. """
+        self.suspended += 1
+
+    def resume(self):
+        self.suspended -= 1
+
+    def write(self, op, holder, arg):
+        """ Appends a record, drops records that can be redone.
+        :param op: operation
+        :param holder: CardsHolder object
+        :param arg: argument of the operation
+        :return: True if the record is written, False if the holder is not logged
+        """
+        index = self.holder_index.get(id(holder))
+        if index is None or self.suspended:
+            return False
+        if self.pos != self.end:
+            self.end = self.pos
+            while len(self.checkpoints) > 1 and self.checkpoints[-1][0] > self.pos:
+                self.checkpoints.pop()
+        if self.end - self.first >= self.capacity:
+            self.compact()
+        self.records[self.end % self.capacity] = op | index << 3 | arg << 11
+        self.end += 1
+        self.pos = self.end
+        return True
+
+    def compact(self):
+        """ Drops the oldest records up to the next checkpoint """
+        later = [i for i, checkpoint in enumerate(self.checkpoints) if checkpoint[0] > self.first]
+        if len(later) > 0:
+            del self.checkpoints[:later[0]]
+            self.first = self.checkpoints[0][0]
+        else:
+            # A single action is longer than the buffer, the history starts from the middle of it
+            self.first = self.end
+            self.checkpoints = []
+            self.take_checkpoint()
+
+    def add(self, holder, card_, on_top):
+        """ Records that a card was added to a holder """
+        self.write(ADD, holder, card_.code | (0 if card_.back_up else _FACE_UP) |
+                   (_TOP if on_top else 0))
+
+    def pop(self, holder, card_, top):
+        """ Records that a card was removed from a holder """
+        self.write(POP, holder, card_.code | (0 if card_.back_up else _FACE_UP) |
+                   (_TOP if top else 0))
+
+    def flip(self, holder, index):
+        """ Records that a card of a holder was flipped """
+        self.write(FLIP, holder, index)
+
+    def move_all(self, source, target, first, flipped):
+        """ Records that all cards of a holder were moved to another holder
+        (see CardsHolder.move_all_cards()).
+        :param source: CardsHolder object cards were moved from
+        :param target: CardsHolder object cards were moved to
+        :param first: index of the first moved card in the target
+        :param flipped: list of indices of cards in the target flipped when moved
+        """
+        if self.suspended:
+            return
+        target_index = self.holder_index.get(id(target))
+        if self.holder_index.get(id(source)) is not None and target_index is not None:
+            self.write(MOVE_ALL, source, target_index | (len(target.cards) - first) << 8)
+            for index in flipped:
+                self.write(FLIP, target, index)
+            return
+        # One of the holders isn't logged: log moves of single cards
+        for index in range(first, len(target.cards)):
+            card_ = target.cards[index]
+            face_up = card_.back_up == (index in flipped)  # Side of the card in the source
+            self.write(POP, source, card_.code | (_FACE_UP if face_up else 0) | _TOP)
+            self.add(target, card_, True)
+
+    def end_action(self):
+        """ Marks the end of a user action, changes recorded since the previous action are undone
+        and redone together. Does nothing if there are no changes.
+        """
+        if self.pos == self.first or self.records[(self.pos - 1) % self.capacity] == ACTION_END:
+            return
+        self.write(ACTION_END, self.holders[0], 0)
+        self.actions_since_checkpoint += 1
+        if self.actions_since_checkpoint >= self.checkpoint_interval or \
+                self.pos - self.checkpoints[-1][0] >= self.capacity // 4:
+            self.take_checkpoint()
+
+    def can_undo(self):
+        return self.pos > self.first
+
+    def can_redo(self):
+        return self.pos < self.end
+
+    @game_object.synchronized
+    def undo(self):
+        """ Undoes the last action, including changes not marked by end_action() yet.
+        :return: True if an action is undone, False if there is nothing to undo
+        """
+        self.end_action()
+        if not self.can_undo():
+            return False
+        start = self.pos - 1  # ACTION_END of the action
+        while start > self.first and self.records[(start - 1) % self.capacity] != ACTION_END:
+            start -= 1
+        self.suspend()
+        try:
+            for position in range(self.pos - 2, start - 1, -1):
+                self.undo_record(self.records[position % self.capacity])
+        except (ValueError, IndexError):
+            self.seek(start)
+        finally:
+            self.resume()
+            self.hand.clear()
+        self.pos = start
+        return True
+
+    @game_object.synchronized
+    def redo(self):
+        """ Redoes the last undone action.
+        :return: True if an action is redone, False if there is nothing to redo
+        """
+        if not self.can_redo():
+            return False
+        end = self.pos
+        while self.records[end % self.capacity] != ACTION_END:
+            end += 1
+        self.suspend()
+        try:
+            for position in range(self.pos, end):
+                self.redo_record(self.records[position % self.capacity])
+        except (ValueError, IndexError):
+            self.seek(end)
+        finally:
+            self.resume()
+            self.hand.clear()
+        self.pos = end + 1
+        return True
+
+    def seek(self, position):
+        """ Restores contents of holders at a position from the nearest checkpoint.
+        :param position: absolute position of a record
+        """
+        checkpoint = [c for c in self.checkpoints if self.first <= c[0] <= position][-1]
+        serialization.restore(checkpoint[1], self.holders)
+        self.hand.clear()
+        for index in range(checkpoint[0], position):
+            record = self.records[index % self.capacity]
+            if record != ACTION_END:
+                self.redo_record(record)
+
+    def take_card(self, code):
+        """ Takes a card removed by undo/redo from the hand, creates a new card if there isn't """
+        cards = self.hand.get(code)
+        if cards:
+            return cards.pop()
+        return card.Card(code & 3, code >> 2, (0, 0))
+
+    def put_card(self, card_, code):
+        """ Puts a card removed by undo/redo to the hand """
+        if self.check_card(card_).code != code:
+            raise ValueError('Holder contents do not match the move log')
+        self.hand.setdefault(code, []).append(card_)
+
+    @staticmethod
+    def check_card(card_):
+        if card_ is None:
+            raise ValueError('Holder contents do not match the move log')
+        return card_
+
+    def undo_record(self, record):
+        op = record & 7
+        holder = self.holders[(record >> 3) & 0xff]
+        arg = record >> 11
+        if op == ADD:
+            self.put_card(holder.pop_card(bool(arg & _TOP)), arg & 0x3f)
+        elif op == POP:
+            card_ = self.take_card(arg & 0x3f)
+            card_.back_up = not arg & _FACE_UP
+            holder.add_card(card_, bool(arg & _TOP))
+        elif op == FLIP:
+            holder.flip_card(arg)
+        elif op == MOVE_ALL:
+            target = self.holders[arg & 0xff]
+            for _ in range(arg >> 8):
+                holder.add_card(self.check_card(target.pop_top_card()))
+
+    def redo_record(self, record):
+        op = record & 7
+        holder = self.holders[(record >> 3) & 0xff]
+        arg = record >> 11
+        if op == ADD:
+            card_ = self.take_card(arg & 0x3f)
+            card_.back_up = not arg & _FACE_UP
+            holder.add_card(card_, bool(arg & _TOP))
+        elif op == POP:
+            self.put_card(holder.pop_card(bool(arg & _TOP)), arg & 0x3f)
+        elif op == FLIP:
+            holder.flip_card(arg)
+        elif op == MOVE_ALL:
+            target = self.holders[arg & 0xff]
+            for _ in range(arg >> 8):
+                target.add_card(self.check_card(holder.pop_top_card()))
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+try:
+    import sys
+    import pygame
+
+    from pygame_cards import card_holder, game_object, spatial_index
+except ImportError as err:
+    print("Fail loading a module in file:", __file__, "\n", err)
+    sys.exit(2)
+
+
+class DirtyRects(object):
+    """ Accumulates screen areas changed since the last frame (dirty rectangles).
+    Objects mark areas they occupied before and after a change, renderer repaints only
+    these areas.
+    """
+
+    # If there are more rectangles than this after merging, the bounding rectangle is repainted
+    max_rects = 8
+
+    def __init__(self):
+        self.rects = []
+        self.full = True  # The first frame is always repainted completely
+
+    def add(self, rect):
+        """ Marks an area as changed.
+        :param rect: list, tuple or pygame.Rect with area properties [x, y, width, height]
+        """
+        if rect[2] > 0 and rect[3] > 0:
+            self.rects.append(pygame.Rect(rect))
+
+    def add_all(self):
+        """ Marks the whole screen as changed. """
+        self.full = True
+
+    def pop(self, screen_rect):
+        """ Returns list of changed areas and resets the accumulated state.
+        Overlapping areas are merged.
+        :param screen_rect: pygame.Rect of the screen
+        :return: list of pygame.Rect objects, empty list if nothing changed
+        """
+        rects, self.rects = self.rects, []
+        if self.full:
+            self.full = False
+            return [pygame.Rect(screen_rect)]
+
+        merged = []
+        for rect in rects:
+            rect = rect.clip(screen_rect)
+            if rect.width == 0 or rect.height == 0:
+                continue
+            index = rect.collidelist(merged)
+            while index != -1:
+                rect.union_ip(merged.pop(index))
+                index = rect.collidelist(merged)
+            merged.append(rect)
+
+        if len(merged) > DirtyRects.max_rects:
+            merged = [merged[0].unionall(merged[1:])]
+        return merged
+
+
+class FullRenderer(object):
+    """ Default renderer, repaints the whole window every frame. """
+
+    def __init__(self, app):
+        """
+        :param app: object of GameApp class which objects will be rendered
+        """
+        self.app = app
+
+    def render_scene(self, objects=None):
+        """ Renders background, game objects and gui elements
+        :param objects: list of game objects to render, all objects of the controller by default
+        """
+        app = self.app
+        pygame.draw.rect(app.screen, app.background_color, (0, 0, app.size[0], app.size[1]))
+        if objects is not None:
+            for obj in objects:
+                obj.render_all(app.screen)
+        elif app.game_controller is not None:
+            app.game_controller.render_objects(app.screen)
+        if app.gui_interface is not None:
+            app.gui_interface.render()
+
+    def render(self):
+        """ Renders a frame.
+        :return: list of updated screen areas
+        """
+        self.render_scene()
+        return [self.app.screen.get_rect()]
+
+    def update_display(self, rects):
+        """ Shows rendered frame on the display.
+        :param rects: list of updated screen areas returned by render()
+        """
+        _ = rects
+        pygame.display.flip()
+
+
+class DirtyRectRenderer(FullRenderer):
+    """ Renderer that repaints only areas marked in DirtyRects object. If nothing has changed,
+    nothing is rendered and the display is not updated. Cards holders are rendered only in
+    changed areas they intersect with, other objects are rendered in every changed area.
+    IMPORTANT: game objects should not change their position in render() methods, use
+    GameObject.update() for that. Cards holders should render only within the area of their
+    empty pocket and cards, or override render_all().
+    """
+
+    def __init__(self, app, dirty_rects):
+        """
+        :param app: object of GameApp class which objects will be rendered
+        :param dirty_rects: DirtyRects object where objects mark changed areas
+        """
+        FullRenderer.__init__(self, app)
+        self.dirty_rects = dirty_rects
+
+    def render(self):
+        """ Renders changed areas of the screen.
+        :return: list of updated screen areas, empty list if nothing has changed
+        """
+        screen = self.app.screen
+        rects = self.dirty_rects.pop(screen.get_rect())
+        if len(rects) == 0:
+            return rects
+        objects = self.get_objects_bounds()
+        for rect in rects:
+            screen.set_clip(rect)
+            if objects is None:
+                self.render_scene()
+            else:
+                self.render_scene([obj for obj, bounds in objects
+                                   if bounds is None or bounds.colliderect(rect)])
+        screen.set_clip(None)
+        return rects
+
+    def get_objects_bounds(self):
+        """ Calculates areas occupied by rendered objects. Areas are calculated every frame
+            rather than taken from Controller.spatial_index, because animated and dragged cards
+            move without notifying the index.
+        :return: list of tuples (object, pygame.Rect or None if the object can render anywhere)
+                 in rendering order, None if there are no rendered objects
+        """
+        controller = self.app.game_controller
+        if controller is None or controller.rendered_objects is None:
+            return None
+        objects = []
+        for obj in controller.rendered_objects:
+            if isinstance(obj, card_holder.CardsHolder) and \
+                    type(obj).render_all is card_holder.CardsHolder.render_all:
+                objects.append((obj, spatial_index.SpatialIndex.get_bounds(obj)))
+            elif isinstance(obj, game_object.GameObject):
+                objects.append((obj, None))
+        return objects
+
+    def update_display(self, rects):
+        """ Updates changed areas of the display.
+        :param rects: list of updated screen areas returned by render()
+        """
+        if len(rects) > 0:
+            pygame.display.update(rects)
+
+
+class LayeredRenderer(DirtyRectRenderer):
+    """ Renderer that registers sprites of cards in a pygame.sprite.LayeredDirty group, which
+    tracks moved and flipped sprites and repaints only changed areas. Sprites are ordered by
+    layers: index of the holder in Controller.rendered_objects * LayeredRenderer.holder_layers
+    + index of the card in the holder.
+
+    Other things are rendered differently than by other renderers:
+        - render() output of holders with render_is_static set is rendered into a background
+          surface, so it is drawn under cards. render() output of such holders doesn't depend on
+          their cards, so the background is rendered again only when the holders are moved;
+        - render() output of other holders, objects which override render_all() and GUI elements
+          are rendered over cards in repainted areas.
+    Static layers and occlusion culling of CardsHolder.render_all() are not used.
+    Which of this mode and DirtyRectRenderer is faster depends on the game, compare them with
+    the render_modes benchmark (python -m benchmarks render_modes).
+    """
+
+    holder_layers = 1024  # Max number of cards in a holder
+
+    def __init__(self, app, dirty_rects):
+        """
+        :param app: object of GameApp class which objects will be rendered
+        :param dirty_rects: DirtyRects object where holders and GUI elements mark changed areas
+        """
+        DirtyRectRenderer.__init__(self, app, dirty_rects)
+        self.group = pygame.sprite.LayeredDirty()
+        self.background = None
+        self.objects = []  # Copy of Controller.rendered_objects
+        self.holders = []  # Tuples (index, holder) of holders which cards are in the group
+        self.overlays = []  # Render methods of objects rendered over cards
+        self.versions = {}  # Holder.cards_version by holder id when the holder was synced
+        self.positions = {}  # Positions of holders in the background by holder id
+        self.holder_sprites = {}  # Lists of sprites by holder id
+        self.owners = {}  # Holder by sprite
+
+    def set_objects(self, objects):
+        """ Registers rendered objects, removes previously registered sprites from the group.
+        :param objects: list of game objects
+        """
+        self.group.empty()
+        self.objects = list(objects)
+        self.holders = []
+        self.overlays = []
+        for index, obj in enumerate(self.objects):
+            if isinstance(obj, card_holder.CardsHolder) and \
+                    type(obj).render_all is card_holder.CardsHolder.render_all:
+                self.holders.append((index, obj))
+                if not obj.render_is_static:
+                    self.overlays.append(obj.render)
+            elif isinstance(obj, game_object.GameObject):
+                self.overlays.append(obj.render_all)
+        self.versions = {}
+        self.positions = {}
+        self.holder_sprites = {}
+        self.owners = {}
+        self.background = None
+        self.dirty_rects.add_all()
+
+    def sync(self):
+        """ Updates sprites in the group for holders changed since the previous frame.
+        :return: True if the background should be rendered again
+        """
+        controller = self.app.game_controller
+        objects = controller.rendered_objects if controller is not None else None
+        if objects is None:
+            objects = []
+        if objects != self.objects:
+            self.set_objects(objects)
+        changed = self.background is None
+        group = self.group
+        owners = self.owners
+        for index, holder in self.holders:
+            if holder.render_is_static and self.positions.get(id(holder)) != tuple(holder.pos):
+                self.positions[id(holder)] = tuple(holder.pos)
+                changed = True
+            if self.versions.get(id(holder)) == holder.cards_version:
+                continue
+            self.versions[id(holder)] = holder.cards_version
+            sprites = [card_.sprite for card_ in holder.cards]
+            layer = index * LayeredRenderer.holder_layers
+            for sprite in sprites:
+                if sprite not in owners:
+                    group.add(sprite, layer=layer)
+                elif group.get_layer_of_sprite(sprite) != layer:
+                    group.change_layer(sprite, layer)
+                    sprite.dirty = 1
+                owners[sprite] = holder
+                layer += 1
+            kept = set(sprites)
+            for sprite in self.holder_sprites.get(id(holder), []):
+                if sprite not in kept and owners.get(sprite) is holder:
+                    group.remove(sprite)
+                    del owners[sprite]
+            self.holder_sprites[id(holder)] = sprites
+        return changed
+
+    def render_background(self):
+        """ Renders background color and render() output of holders with render_is_static set. """
+        app = self.app
+        if self.background is None:
+            self.background = pygame.Surface(app.screen.get_size()).convert()
+        self.background.fill(app.background_color)
+        for _, holder in self.holders:
+            if holder.render_is_static:
+                holder.render(self.background)
+
+    def render(self):
+        """ Renders changed areas of the screen.
+        :return: list of updated screen areas, empty list if nothing has changed
+        """
+        app = self.app
+        screen = app.screen
+        if self.sync():
+            self.render_background()
+            self.dirty_rects.add_all()
+        for rect in self.dirty_rects.pop(screen.get_rect()):
+            self.group.repaint_rect(rect)
+        rects = self.group.draw(screen, self.background)
+        for rect in rects:
+            screen.set_clip(rect)
+            for render in self.overlays:
+                render(screen)
+            if app.gui_interface is not None:
+                app.gui_interface.render()
+        screen.set_clip(None)
+        return rects
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+""" Recording and replay of mouse events.
+
+A recording is a JSON Lines file:
+    {"format": "pygame_cards.replay", "version": 1, "seed": 2016}    header, seed of decks
+    [0.5132, 1, 25, 30, 0]         event: time in seconds, down, x, y, double click
+    ...
+    {"end": 12.25, "state": "..."}  trailer: game state (Controller.save_state()) in hex
+
+Events are written as they happen, so a recording survives a crash (without the trailer).
+Replay seeds random generators of decks (see GameApp.seed_decks()) and feeds events to
+GameApp.process_mouse_event(), so a game that deals cards with Deck.shuffle() and doesn't depend
+on time or background threads (e.g. solver hints) reaches the same state, which is checked
+against the trailer.
+"""
+try:
+    import sys
+    import time
+    import json
+except ImportError as err:
+    print("Fail loading a module in file:", __file__, "\n", err)
+    sys.exit(2)
+
+FORMAT = "pygame_cards.replay"
+VERSION = 1
+
+
+class InputRecorder(object):
+    """ Writes mouse events to a recording file, see GameApp.start_recording() """
+
+    def __init__(self, path, seed):
+        """
+        :param path: path to the recording file
+        :param seed: seed of decks' random generator used for the recorded game
+        """
+        self.file = open(path, "w", encoding="utf-8")
+        self.start = time.perf_counter()
+        self.write({"format": FORMAT, "version": VERSION, "seed": seed})
+
+    def write(self, record):
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.file.flush()
+
+    def record(self, down, pos, double_click):
+        """ Writes a mouse event.
+        :param down: boolean, True for mouse down event, False for mouse up event
+        :param pos: tuple with mouse coordinates (x, y)
+        :param double_click: boolean, True if it's a double click event
+        """
+        self.write([round(time.perf_counter() - self.start, 4), 1 if down else 0,
+                    pos[0], pos[1], 1 if double_click else 0])
+
+    def close(self, state=None):
+        """ Writes the trailer and closes the file.
+        :param state: bytes with the final game state or None
+        """
+        self.write({"end": round(time.perf_counter() - self.start, 4),
+                    "state": state.hex() if state is not None else None})
+        self.file.close()
+
+
+class Recording(object):
+    """ Recording loaded from a file """
+
+    def __init__(self, path):
+        """
+        :param path: path to the recording file
+        """
+        self.seed = None
+        self.events = []  # List of tuples (time, down, pos, double_click)
+        self.state = None  # Final game state, None if the recording has no trailer
+        with open(path, "r", encoding="utf-8") as file_:
+            header = json.loads(file_.readline())
+            if header.get("format") != FORMAT or header.get("version") != VERSION:
+                raise ValueError('Not a recording or unsupported version: ' + path)
+            self.seed = header["seed"]
+            for line in file_:
+                record = json.loads(line)
+                if isinstance(record, list):
+                    self.events.append((record[0], record[1] == 1, (record[2], record[3]),
+                                        record[4] == 1))
+                elif record.get("state") is not None:
+                    self.state = bytes.fromhex(record["state"])
+
+
+class ReplayResult(object):
+    """ Result of replay(): throughput and latency of mouse events processing """
+
+    def __init__(self, latencies, elapsed, state_matched):
+        """
+        :param latencies: list of times of events processing in seconds
+        :param elapsed: duration of the replay in seconds
+        :param state_matched: True if the final state matches the recording, False if it
+            doesn't, None if the recording has no final state
+        """
+        self.latencies = latencies
+        self.elapsed = elapsed
+        self.state_matched = state_matched
+
+    def get_report(self):
+        """ Returns dictionary with events count, events per second, latency (min, median, 99th
+        percentile and max in microseconds) and state_matched
+        """
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+
+        def percentile(p):
+            return latencies[min(int(count * p), count - 1)] * 1e6 if count > 0 else 0.0
+
+        return {
+            "events": count,
+            "elapsed": self.elapsed,
+            "events_per_sec": count / self.elapsed if self.elapsed > 0 else 0.0,
+            "latency_min": percentile(0),
+            "latency_median": percentile(0.5),
+            "latency_p99": percentile(0.99),
+            "latency_max": percentile(1),
+            "state_matched": self.state_matched
+        }
+
+
+def replay(app, path, mode="fast", render=False):
+    """ Replays a recording: starts the game with decks seeded with the recorded seed and feeds
+        recorded mouse events to app.process_mouse_event(). Should be called instead of
+        app.execute().
+    :param app: GameApp object, not started yet. Create it with headless=True to replay without
+        a window.
+    :param path: path to the recording file
+    :param mode: "fast" - events are processed back to back, as fast as possible;
+                 "realtime" - events are processed at recorded times, the game loop and (if the
+                 app isn't headless) rendering thread run meanwhile.
+    :param render: boolean, in "fast" mode renders a frame after each event (headless app
+        renders nothing)
+    :return: ReplayResult object
+    """
+    if mode not in ("fast", "realtime"):
+        raise ValueError('Unknown replay mode: ' + str(mode))
+    recording = Recording(path)
+    with app.state_lock:
+        app.seed_decks(recording.seed)
+    app.init_game()
+    realtime = mode == "realtime"
+    render_thread = realtime and not app.headless
+    if render_thread:
+        app.start_render_thread()
+
+    latencies = []
+    start = time.perf_counter()
+    try:
+        for event_time, down, pos, double_click in recording.events:
+            if realtime:
+                while True:
+                    delay = start + event_time - time.perf_counter()
+                    if delay <= 0:
+                        break
+                    app.execute_game_logic()
+                    time.sleep(min(delay, 0.005))
+            event_start = time.perf_counter()
+            with app.state_lock:
+                app.process_mouse_event(down, double_click, pos)
+            latencies.append(time.perf_counter() - event_start)
+            if render and not realtime:
+                with app.state_lock:
+                    app.update_display(app.render())
+        elapsed = time.perf_counter() - start
+    finally:
+        if render_thread:
+            app.stopped = True
+            app.frame_scheduler.request_frame()
+            app.render_thread.join()
+
+    state_matched = None
+    if recording.state is not None and app.game_controller is not None:
+        with app.state_lock:
+            app.game_controller.moves.cancel_all(finish=True)
+            state_matched = app.game_controller.save_state() == recording.state
+    return ReplayResult(latencies, elapsed, state_matched)
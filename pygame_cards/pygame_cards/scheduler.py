@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+try:
+    import sys
+    import time
+    import heapq
+    import itertools
+
+    from pygame_cards import game_object
+except ImportError as err:
+    print("Fail loading a module in file:", __file__, "\n", err)
+    sys.exit(2)
+
+
+class Task(object):
+    """ Callback scheduled by Scheduler. Can be passed to Scheduler.cancel(). """
+
+    __slots__ = ('deadline', 'callback', 'interval', 'cancelled')
+
+    def __init__(self, deadline, callback, interval):
+        self.deadline = deadline
+        self.callback = callback
+        self.interval = interval
+        self.cancelled = False
+
+
+class Scheduler(object):
+    """ Cooperative scheduler of delayed and periodic callbacks, run by the game loop
+    (see GameApp.execute_game_logic()), so callbacks don't need threads and are executed while
+    GameObject.state_lock is held. Deadlines are kept in a min-heap: scheduling and running
+    a callback costs O(log n). Cancelled tasks stay in the heap until their deadline or until
+    they make up half of the heap.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        """
+        :param clock: function that returns current time in seconds
+        """
+        self.clock = clock
+        self.heap = []  # Tuples (deadline, sequence number, task)
+        self.counter = itertools.count()  # Keeps order of tasks with the same deadline
+        self.cancelled = 0
+
+    def __len__(self):
+        """ Returns number of scheduled tasks """
+        return len(self.heap) - self.cancelled
+
+    @game_object.synchronized
+    def schedule(self, task):
+        heapq.heappush(self.heap, (task.deadline, next(self.counter), task))
+        return task
+
+    def call_later(self, delay, callback):
+        """ Schedules a callback.
+        :param delay: delay in seconds
+        :param callback: function without arguments
+        :return: Task object
+        """
+        return self.schedule(Task(self.clock() + delay, callback, None))
+
+    def call_every(self, interval, callback, delay=None):
+        """ Schedules a periodic callback. If the game loop falls behind, missed calls are
+        skipped rather than run in a burst.
+        :param interval: interval in seconds between calls
+        :param callback: function without arguments
+        :param delay: delay in seconds before the first call, interval by default
+        :return: Task object
+        """
+        if interval <= 0:
+            raise ValueError('Interval should be positive')
+        return self.schedule(Task(self.clock() + (interval if delay is None else delay),
+                                  callback, interval))
+
+    @game_object.synchronized
+    def cancel(self, task):
+        """ Cancels a task. Cancelling a completed or cancelled task does nothing.
+        :param task: Task object returned by call_later() or call_every()
+        """
+        if task is None or task.cancelled:
+            return
+        task.cancelled = True
+        if task.interval is None and task.deadline is None:
+            return  # Already completed
+        self.cancelled += 1
+        if self.cancelled > len(self.heap) // 2:
+            # Compacted in place: run_due() may be iterating the heap if a callback cancels tasks
+            self.heap[:] = [entry for entry in self.heap if not entry[2].cancelled]
+            heapq.heapify(self.heap)
+            self.cancelled = 0
+
+    @game_object.synchronized
+    def get_delay(self):
+        """ Returns time until the next deadline.
+        :return: seconds (0 if a task is due), None if there are no tasks
+        """
+        while len(self.heap) > 0 and self.heap[0][2].cancelled:
+            heapq.heappop(self.heap)
+            self.cancelled -= 1
+        if len(self.heap) == 0:
+            return None
+        return max(self.heap[0][0] - self.clock(), 0.0)
+
+    @game_object.synchronized
+    def run_due(self):
+        """ Runs callbacks which deadlines have passed, in order of deadlines.
+        :return: number of callbacks run
+        """
+        now = self.clock()
+        count = 0
+        heap = self.heap
+        while len(heap) > 0 and heap[0][0] <= now:
+            task = heapq.heappop(heap)[2]
+            if task.cancelled:
+                self.cancelled -= 1
+                continue
+            if task.interval is None:
+                task.deadline = None
+            else:
+                task.deadline += task.interval
+                if task.deadline <= now:
+                    task.deadline = now + task.interval
+                heapq.heappush(heap, (task.deadline, next(self.counter), task))
+            task.callback()
+            count += 1
+        return count
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+""" Compact binary encoding of cards holders contents, used to save and restore game state and to
+send it to other processes.
+
+Format (little-endian):
+    magic       4 bytes, b"PGCS"
+    version     1 byte
+    count       2 bytes, number of holders
+    lengths     2 bytes per holder, number of cards in the holder
+    cards       1 byte per card, from the bottom card to the top card of each holder:
+                card code (rank << 2 | suit, see Card.code) | face_up << 6
+"""
+try:
+    import sys
+    import struct
+
+    from pygame_cards import card, game_object
+except ImportError as err:
+    print("Fail loading a module in file:", __file__, "\n", err)
+    sys.exit(2)
+
+MAGIC = b"PGCS"
+VERSION = 1
+FACE_UP = 1 << 6
+
+_header = struct.Struct("<4sBH")
+
+
+def encode(holders):
+    """ Encodes contents of cards holders.
+    :param holders: list of CardsHolder objects
+    :return: bytes
+    """
+    lengths = [len(holder.cards) for holder in holders]
+    data = bytearray(_header.pack(MAGIC, VERSION, len(holders)))
+    data += struct.pack("<%dH" % len(lengths), *lengths)
+    for holder in holders:
+        # Card.state is rank << 3 | suit << 1 | back_up
+        data += bytes((card_.state >> 1) | (0 if card_.state & 1 else FACE_UP)
+                      for card_ in holder.cards)
+    return bytes(data)
+
+
+def decode(data):
+    """ Decodes contents of cards holders without creating cards.
+    :param data: bytes returned by encode()
+    :return: list of bytes objects, one per holder, with one byte per card
+             (code | face_up << 6) from the bottom card to the top card
+    """
+    if len(data) < _header.size:
+        raise ValueError('Game state is too short')
+    magic, version, count = _header.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('Not a game state')
+    if version != VERSION:
+        raise ValueError('Unsupported game state version: ' + str(version))
+    offset = _header.size
+    lengths = struct.unpack_from("<%dH" % count, data, offset)
+    offset += 2 * count
+    if len(data) != offset + sum(lengths):
+        raise ValueError('Game state length doesn\'t match number of cards')
+    holders = []
+    for length in lengths:
+        holders.append(bytes(data[offset:offset + length]))
+        offset += length
+    return holders
+
+
+@game_object.synchronized
+def restore(data, holders):
+    """ Restores contents of cards holders. Card objects that are already in the holders are
+    reused, missing cards are created.
+    :param data: bytes returned by encode()
+    :param holders: list of CardsHolder objects, in the same order as passed to encode()
+    """
+    contents = decode(data)
+    if len(contents) != len(holders):
+        raise ValueError('Game state has ' + str(len(contents)) + ' holders, expected ' +
+                         str(len(holders)))
+    pool = dict()
+    for holder in holders:
+        for card_ in holder.cards:
+            pool.setdefault(card_.code, []).append(card_)
+        holder.mark_dirty()
+        for card_ in holder.cards:
+            holder.mark_dirty(card_)
+        del holder.cards[:]
+
+    for holder, content in zip(holders, contents):
+        for value in content:
+            code = value & (FACE_UP - 1)
+            back_up = not value & FACE_UP
+            cards = pool.get(code)
+            if cards:
+                card_ = cards.pop()
+                card_.unclick()
+                card_.back_up = back_up
+            else:
+                card_ = card.Card(code & 3, code >> 2, holder.pos, back_up)
+            holder.cards.append(card_)
+        holder.update_position(holder.offset)
+        for card_ in holder.cards:
+            holder.mark_dirty(card_)
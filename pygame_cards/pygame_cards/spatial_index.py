@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+try:
+    import sys
+    import pygame
+except ImportError as err:
+    print("Fail loading a module in file:", __file__, "\n", err)
+    sys.exit(2)
+
+
+class SpatialIndex(object):
+    """ Uniform grid over areas occupied by cards holders, used for hit-testing and drop-target
+    lookup without walking all holders.
+
+    Holders notify the index about changes of their cards (see CardsHolder.bounds_changed()),
+    area of a changed holder is recalculated lazily, on the next query.
+    Holders are returned in the order they were added to the index (i.e. rendering order),
+    so the last returned holder is the topmost one.
+    """
+
+    def __init__(self, cell_size=64):
+        """
+        :param cell_size: size of a grid cell in pixels
+        """
+        self.cell_size = cell_size
+        self.grid = dict()      # (column, row) -> set of holders
+        self.holders = dict()   # holder -> [order, bounds rect, list of cells]
+        self.stale = set()      # holders which area should be recalculated
+        self.next_order = 0
+
+    def add(self, holder):
+        """ Adds cards holder to the index.
+        :param holder: CardsHolder object
+        """
+        if holder not in self.holders:
+            self.holders[holder] = [self.next_order, None, []]
+            self.next_order += 1
+            holder.spatial_index = self
+            self.stale.add(holder)
+
+    def remove(self, holder):
+        """ Removes cards holder from the index.
+        :param holder: CardsHolder object
+        """
+        entry = self.holders.pop(holder, None)
+        if entry is not None:
+            for cell in entry[2]:
+                self.grid[cell].discard(holder)
+            self.stale.discard(holder)
+            holder.spatial_index = None
+
+    def invalidate(self, holder):
+        """ Marks area of a holder as changed.
+        :param holder: CardsHolder object
+        """
+        self.stale.add(holder)
+
+    def get_cells(self, rect):
+        """ Returns grid cells that intersect with a rectangle.
+        :param rect: pygame.Rect object
+        :return: list of tuples (column, row)
+        """
+        size = self.cell_size
+        return [(column, row)
+                for column in range(rect[0] // size, (rect[0] + rect[2] - 1) // size + 1)
+                for row in range(rect[1] // size, (rect[1] + rect[3] - 1) // size + 1)]
+
+    @staticmethod
+    def get_bounds(holder):
+        """ Calculates area occupied by a holder: its empty pocket and all its cards.
+        :param holder: CardsHolder object
+        :return: pygame.Rect object
+        """
+        size = holder.card_json["size"]
+        bounds = pygame.Rect(holder.pos[0], holder.pos[1], size[0], size[1])
+        for card_ in holder.cards:
+            bounds.union_ip(card_.get_rect())
+        return bounds
+
+    def refresh(self):
+        """ Recalculates areas of changed holders. """
+        while len(self.stale) > 0:
+            holder = self.stale.pop()
+            entry = self.holders.get(holder)
+            if entry is None:
+                continue
+            for cell in entry[2]:
+                self.grid[cell].discard(holder)
+            entry[1] = SpatialIndex.get_bounds(holder)
+            entry[2] = self.get_cells(entry[1])
+            for cell in entry[2]:
+                self.grid.setdefault(cell, set()).add(holder)
+
+    def query_rect(self, rect):
+        """ Returns holders which area intersects with a rectangle.
+        :param rect: pygame.Rect or tuple (x, y, width, height)
+        :return: list of holders in rendering order
+        """
+        self.refresh()
+        rect = pygame.Rect(rect)
+        candidates = set()
+        for cell in self.get_cells(rect):
+            holders = self.grid.get(cell)
+            if holders:
+                candidates.update(holders)
+        result = [h for h in candidates if self.holders[h][1].colliderect(rect)]
+        result.sort(key=lambda h: self.holders[h][0])
+        return result
+
+    def holders_at(self, pos):
+        """ Returns holders which area contains a point.
+        :param pos: tuple with coordinates (x, y)
+        :return: list of holders in rendering order
+        """
+        self.refresh()
+        holders = self.grid.get((int(pos[0]) // self.cell_size, int(pos[1]) // self.cell_size))
+        if not holders:
+            return []
+        result = [h for h in holders if self.holders[h][1].collidepoint(pos)]
+        result.sort(key=lambda h: self.holders[h][0])
+        return result
+
+    def card_at(self, pos):
+        """ Returns the topmost card which contains a point.
+        :param pos: tuple with coordinates (x, y)
+        :return: tuple (holder, card), or (None, None) if there is no card at the point
+        """
+        for holder in reversed(self.holders_at(pos)):
+            for card_ in reversed(holder.cards):
+                if card_.is_clicked(pos):
+                    return holder, card_
+        return None, None
+
+    def holder_at(self, pos):
+        """ Returns the topmost holder which has a card or an empty pocket at a point.
+        :param pos: tuple with coordinates (x, y)
+        :return: holder object or None
+        """
+        for holder in reversed(self.holders_at(pos)):
+            if holder.is_clicked(pos):
+                return holder
+            for card_ in holder.cards:
+                if card_.is_clicked(pos):
+                    return holder
+        return None
+
+    def drop_targets_for(self, rect):
+        """ Returns holders which top card (or empty pocket if there are no cards) collides with
+        a rectangle, same as CardsHolder.check_collide() does.
+        :param rect: pygame.Rect or tuple (x, y, width, height), e.g. area of a dragged card
+        :return: list of holders in rendering order
+        """
+        rect = pygame.Rect(rect)
+        result = []
+        for holder in self.query_rect(rect):
+            if len(holder.cards) > 0:
+                target = holder.cards[-1].get_rect()
+            else:
+                size = holder.card_json["size"]
+                target = holder.pos[0], holder.pos[1], size[0], size[1]
+            if rect.colliderect(target):
+                result.append(holder)
+        return result
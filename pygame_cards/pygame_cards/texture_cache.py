@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+try:
+    import sys
+    import logging
+    import pygame
+    from pygame_cards import instrumentation
+except ImportError as err:
+    print("Fail loading a module in file:", __file__, "\n", err)
+    sys.exit(2)
+
+
+class TextureCache(object):
+    """ Process-wide cache of decoded and scaled image surfaces.
+    Surfaces are keyed by (path, size, pixel format), so all cards that use the same image
+    (for example the back side sprite) share a single surface.
+
+    Supported pixel formats:
+        - "alpha" - surface converted with convert_alpha() (per-pixel alpha)
+        - "opaque" - surface converted with convert() (no alpha channel)
+        - "colorkey" - surface converted with convert(), transparent pixels are set to
+          TextureCache.colorkey, RLE accelerated
+        - "premultiplied" - per-pixel alpha premultiplied into colors, the surface should be
+          blitted with pygame.BLEND_PREMULTIPLIED flag (see get_blend_flags())
+        - "auto" - the cheapest of the formats above that renders the image the same,
+          see resolve_pixel_format()
+
+    Attributes:
+        hits - number of get() calls served from the cache
+        misses - number of get() calls that had to load an image from disk
+        bytes - approximate amount of memory (in bytes) taken by cached surfaces
+        formats - pixel formats of cached surfaces by cache keys, for "auto" the chosen format
+        alpha_tolerance - number of partly transparent pixels (e.g. antialiased rounded corners)
+                          which "auto" format can make opaque or transparent to use "colorkey"
+        premultiply - if True, "auto" format uses "premultiplied" instead of "alpha"
+    """
+
+    pixel_formats = ("alpha", "opaque", "colorkey", "premultiplied", "auto")
+    colorkey = (255, 0, 255)  # Color of transparent pixels of "colorkey" surfaces
+    alpha_tolerance = 0
+    premultiply = False
+
+    def __init__(self):
+        self.surfaces = {}
+        self.surfaces_bytes = {}
+        self.formats = {}
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+
+    @staticmethod
+    def make_key(path, size, pixel_format="alpha"):
+        """ Builds cache key.
+        :param path: path to the image file
+        :param size: tuple or list (width, height) to which the image is scaled
+        :param pixel_format: string, one of TextureCache.pixel_formats
+        :return: hashable tuple (path, (width, height), pixel_format)
+        """
+        return path, (int(size[0]), int(size[1])), pixel_format
+
+    @staticmethod
+    def get_surface_bytes(surface):
+        """ Returns approximate amount of memory used by pixels of a surface.
+        :param surface: pygame.Surface object
+        :return: integer number of bytes
+        """
+        return surface.get_pitch() * surface.get_height()
+
+    @staticmethod
+    def detect_pixel_format(surface, tolerance=0):
+        """ Detects the cheapest pixel format a surface can be blitted with without changing
+        the result: "opaque" if all pixels are opaque, "colorkey" if pixels are either opaque or
+        fully transparent (and opaque pixels don't have TextureCache.colorkey color), "alpha"
+        otherwise.
+        :param surface: pygame.Surface object
+        :param tolerance: number of partly transparent pixels allowed in a "colorkey" surface,
+                          they are rounded to opaque or transparent
+        :return: string, pixel format
+        """
+        if not surface.get_flags() & pygame.SRCALPHA:
+            return "opaque" if surface.get_colorkey() is None else "colorkey"
+        opaque = pygame.mask.from_surface(surface, 254).count()
+        if opaque == surface.get_width() * surface.get_height():
+            return "opaque"
+        if pygame.mask.from_surface(surface, 0).count() - opaque > tolerance:
+            return "alpha"
+        key = pygame.mask.from_threshold(surface, TextureCache.colorkey + (255,), (1, 1, 1, 255))
+        if key.overlap_area(pygame.mask.from_surface(surface, 127), (0, 0)) > 0:
+            return "alpha"
+        return "colorkey"
+
+    @staticmethod
+    def resolve_pixel_format(surface, pixel_format):
+        """ Chooses pixel format for "auto": detect_pixel_format() with
+        TextureCache.alpha_tolerance, "premultiplied" instead of "alpha" if TextureCache.premultiply
+        is set. Other formats are returned as is.
+        :param surface: pygame.Surface object with per-pixel alpha
+        :param pixel_format: string, one of TextureCache.pixel_formats
+        :return: string, pixel format
+        """
+        if pixel_format != "auto":
+            return pixel_format
+        pixel_format = TextureCache.detect_pixel_format(surface, TextureCache.alpha_tolerance)
+        if pixel_format == "alpha" and TextureCache.premultiply:
+            return "premultiplied"
+        return pixel_format
+
+    @staticmethod
+    def convert_surface(surface, pixel_format):
+        """ Converts a surface with per-pixel alpha to the display pixel format.
+        :param surface: pygame.Surface object
+        :param pixel_format: "opaque" - converted with convert(), alpha is dropped;
+                             "colorkey" - pixels with alpha below 128 are replaced with
+                             TextureCache.colorkey, the surface is RLE accelerated;
+                             "premultiplied" - converted with convert_alpha(), alpha is
+                             premultiplied;
+                             "alpha" - converted with convert_alpha()
+        :return: new pygame.Surface object
+        """
+        if pixel_format == "opaque":
+            return surface.convert()
+        elif pixel_format == "colorkey":
+            converted = surface.convert()
+            transparent = pygame.mask.from_surface(surface, 127)
+            transparent.invert()
+            transparent.to_surface(converted, setcolor=TextureCache.colorkey, unsetcolor=None)
+            converted.set_colorkey(TextureCache.colorkey, pygame.RLEACCEL)
+            return converted
+        elif pixel_format == "premultiplied":
+            return surface.convert_alpha().premul_alpha()
+        return surface.convert_alpha()
+
+    @staticmethod
+    def get_blend_flags(pixel_format):
+        """ Returns flags for Surface.blit() of surfaces in a pixel format.
+        :param pixel_format: string, pixel format of the surface
+        :return: pygame.BLEND_PREMULTIPLIED for "premultiplied" format, 0 otherwise
+        """
+        return pygame.BLEND_PREMULTIPLIED if pixel_format == "premultiplied" else 0
+
+    @staticmethod
+    def load_image(path, size):
+        """ Loads image from disk, converts it to the display pixel format with per-pixel alpha
+        and scales it.
+        :param path: path to the image file
+        :param size: tuple or list (width, height) to which the image is scaled
+        :return: pygame.Surface object
+        """
+        image = pygame.image.load(path).convert_alpha()
+        if instrumentation.FrameStats.active is not None:
+            instrumentation.FrameStats.active.surfaces_created += 1
+        return pygame.transform.scale(image, (int(size[0]), int(size[1])))
+
+    @staticmethod
+    def load_surface(path, size, pixel_format="alpha"):
+        """ Loads image from disk, converts it to the display pixel format and scales it.
+        :param path: path to the image file
+        :param size: tuple or list (width, height) to which the image is scaled
+        :param pixel_format: string, one of TextureCache.pixel_formats
+        :return: pygame.Surface object
+        """
+        if pixel_format not in TextureCache.pixel_formats:
+            raise ValueError('Unknown pixel format: ' + str(pixel_format))
+        image = TextureCache.load_image(path, size)
+        return TextureCache.convert_surface(
+            image, TextureCache.resolve_pixel_format(image, pixel_format))
+
+    def load(self, key, path, size, pixel_format):
+        """ Loads image and stores it in the cache.
+        :param key: tuple returned by make_key()
+        :param path: path to the image file
+        :param size: tuple or list (width, height) to which the image is scaled
+        :param pixel_format: string, one of TextureCache.pixel_formats
+        :return: pygame.Surface object
+        """
+        if pixel_format not in TextureCache.pixel_formats:
+            raise ValueError('Unknown pixel format: ' + str(pixel_format))
+        image = TextureCache.load_image(path, size)
+        surface_format = TextureCache.resolve_pixel_format(image, pixel_format)
+        surface = TextureCache.convert_surface(image, surface_format)
+        self.store(key, surface, TextureCache.get_surface_bytes(surface), surface_format)
+        return surface
+
+    def get(self, path, size, pixel_format="alpha"):
+        """ Returns cached surface, loads the image if it's not cached yet.
+        :param path: path to the image file
+        :param size: tuple or list (width, height) to which the image is scaled
+        :param pixel_format: string, one of TextureCache.pixel_formats
+        :return: pygame.Surface object. The surface is shared, do not draw on it.
+        """
+        key = TextureCache.make_key(path, size, pixel_format)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+        self.misses += 1
+        return self.load(key, path, size, pixel_format)
+
+    def get_format(self, path, size, pixel_format="alpha"):
+        """ Returns pixel format of a cached surface, e.g. the format chosen for "auto".
+        :param path: path to the image file
+        :param size: tuple or list (width, height) to which the image is scaled
+        :param pixel_format: string, pixel format the surface was requested with
+        :return: string, pixel format, None if the surface is not cached
+        """
+        return self.formats.get(TextureCache.make_key(path, size, pixel_format))
+
+    def store(self, key, surface, size_bytes, surface_format=None):
+        """ Stores surface in the cache and updates memory counter.
+        :param key: tuple returned by make_key()
+        :param surface: pygame.Surface object
+        :param size_bytes: memory taken by the surface
+        :param surface_format: pixel format of the surface, pixel format of the key by default
+        """
+        self.surfaces[key] = surface
+        self.surfaces_bytes[key] = size_bytes
+        self.formats[key] = surface_format if surface_format is not None else key[2]
+        self.bytes += size_bytes
+        logging.debug("Texture %s %s: %s pixel format (requested %s)" %
+                      (key[0], key[1], self.formats[key], key[2]))
+
+    def add(self, path, size, surface, pixel_format="alpha", size_bytes=None,
+            surface_format=None):
+        """ Puts an already prepared surface to the cache, e.g. a subsurface of a card atlas.
+        :param path: path to the image file the surface stands for
+        :param size: tuple or list (width, height) of the surface
+        :param surface: pygame.Surface object
+        :param pixel_format: string, one of TextureCache.pixel_formats
+        :param size_bytes: memory taken by the surface. Should be 0 for subsurfaces, which
+                           share pixels with their parent. If None, calculated from the surface.
+        :param surface_format: pixel format of the surface if pixel_format is "auto"
+        """
+        key = TextureCache.make_key(path, size, pixel_format)
+        if key in self.surfaces:
+            self.evict(*key)
+        if size_bytes is None:
+            size_bytes = TextureCache.get_surface_bytes(surface)
+        self.store(key, surface, size_bytes, surface_format)
+
+    def preload(self, paths, size, pixel_format="alpha"):
+        """ Warms up the cache by loading a list of images.
+        :param paths: list of paths to image files
+        :param size: tuple or list (width, height) to which images are scaled
+        :param pixel_format: string, one of TextureCache.pixel_formats
+        """
+        for path in paths:
+            key = TextureCache.make_key(path, size, pixel_format)
+            if key not in self.surfaces:
+                self.load(key, path, size, pixel_format)
+
+    def evict(self, path=None, size=None, pixel_format=None):
+        """ Removes surfaces from the cache. Arguments work as filters, surfaces that match
+        all specified arguments are removed. If no arguments are passed, the cache is cleared.
+        Sprites that already use evicted surfaces keep them alive until they are destroyed.
+        :param path: path to the image file
+        :param size: tuple or list (width, height)
+        :param pixel_format: string, one of TextureCache.pixel_formats
+        :return: number of evicted surfaces
+        """
+        if size is not None:
+            size = (int(size[0]), int(size[1]))
+        evicted = 0
+        for key in list(self.surfaces.keys()):
+            if ((path is None or key[0] == path) and (size is None or key[1] == size) and
+                    (pixel_format is None or key[2] == pixel_format)):
+                del self.surfaces[key]
+                del self.formats[key]
+                self.bytes -= self.surfaces_bytes.pop(key)
+                evicted += 1
+        return evicted
+
+    def clear(self):
+        """ Removes all surfaces from the cache and resets counters. """
+        self.surfaces = {}
+        self.surfaces_bytes = {}
+        self.formats = {}
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+
+    def get_stats(self):
+        """ Returns cache counters.
+        :return: dictionary with "hits", "misses", "bytes", "entries" values and "formats" -
+                 dictionary with number of surfaces in each pixel format
+        """
+        formats = {}
+        for surface_format in self.formats.values():
+            formats[surface_format] = formats.get(surface_format, 0) + 1
+        return {"hits": self.hits, "misses": self.misses, "bytes": self.bytes,
+                "entries": len(self.surfaces), "formats": formats}
+
+    def get_report(self):
+        """ Returns pixel format of each cached surface.
+        :return: list of tuples (path, (width, height), requested pixel format, pixel format),
+                 sorted by path
+        """
+        return sorted(key + (surface_format,) for key, surface_format in self.formats.items())
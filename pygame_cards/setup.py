@@ -8,5 +8,6 @@ setup(name='pygame_cards',
       author_email='van.novosad@gmail.com',
       license='MIT',
       packages=['pygame_cards'],
+      install_requires=['pygame>=2.1.4'],
       include_package_data=True,
       zip_safe=False)
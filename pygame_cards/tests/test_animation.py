@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+import unittest
+
+from pygame_cards import animation
+
+
+class FakeCard(object):
+    def __init__(self, pos):
+        self.pos = pos
+
+    def set_pos(self, pos):
+        self.pos = pos
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class AnimatorTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.animator = animation.Animator(clock=self.clock)
+        self.completed = []
+
+    def test_time_based_move(self):
+        card_ = FakeCard((0, 0))
+        self.animator.move([card_], (100, 0), 1.0,
+                           on_complete=lambda: self.completed.append('move'))
+        self.clock.now = 0.5
+        self.animator.update()
+        self.assertEqual(card_.pos, (50.0, 0.0))
+        self.assertEqual(self.completed, [])
+        self.clock.now = 1.0
+        self.animator.update()
+        self.assertEqual(card_.pos, (100, 0))
+        self.assertEqual(self.completed, ['move'])
+        self.assertEqual(len(self.animator), 0)
+
+    def test_superseded_track_completes(self):
+        """ A track which cards were all taken over by a newer track still calls on_complete """
+        cards = [FakeCard((0, 0)), FakeCard((0, 10))]
+        self.animator.move(cards, (100, 0), 1.0, on_complete=lambda: self.completed.append('old'))
+        self.animator.move(cards, (0, 100), 2.0, on_complete=lambda: self.completed.append('new'))
+        self.clock.now = 0.1
+        self.animator.update()
+        self.assertEqual(self.completed, ['old'])
+        self.assertEqual(len(self.animator), 1)
+        self.clock.now = 2.0
+        self.animator.update()
+        self.assertEqual(self.completed, ['old', 'new'])
+        self.assertEqual([card_.pos for card_ in cards], [(0, 100), (0, 100)])
+
+    def test_cancel_finish(self):
+        card_ = FakeCard((0, 0))
+        track = self.animator.move([card_], (10, 10), 1.0,
+                                   on_complete=lambda: self.completed.append('move'))
+        self.animator.cancel(track, finish=True)
+        self.assertEqual(card_.pos, (10, 10))
+        self.assertEqual(self.completed, ['move'])
+
+
+@unittest.skipIf(animation.numpy is None, "NumPy is not installed")
+class BatchAnimatorTest(unittest.TestCase):
+    def test_same_positions_as_animator(self):
+        """ BatchAnimator moves cards to the same pixels as Animator with every easing and with
+        a custom easing function
+        """
+        easings = list(animation.EASINGS) + [lambda t: t ** 0.5]
+        clock = FakeClock()
+        animators = [animation.Animator(clock), animation.BatchAnimator(clock)]
+        cards = []
+        completed = []
+        for animator in animators:
+            cards.append([])
+            for i, easing in enumerate(easings):
+                moved = [FakeCard((10 * i, 7 * k)) for k in range(3)]
+                animator.move(moved, (500 - 31 * i, 300), 1.0 + 0.25 * i, easing,
+                              on_complete=lambda: completed.append(1), delay=0.1 * i)
+                cards[-1].extend(moved)
+        for now in (0.05, 0.3, 0.77, 1.2, 1.6, 2.5):
+            clock.now = now
+            for animator in animators:
+                animator.update()
+            self.assertEqual([tuple(round(x) for x in card_.pos) for card_ in cards[0]],
+                             [tuple(round(x) for x in card_.pos) for card_ in cards[1]], now)
+        self.assertEqual(len(completed), 2 * len(easings))
+        self.assertEqual(len(animators[1]), 0)
+
+    def test_create_animator(self):
+        self.assertIsInstance(animation.create_animator(), animation.BatchAnimator)
+
+
+if __name__ == '__main__':
+    unittest.main()
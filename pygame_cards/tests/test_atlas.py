@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+import os
+import shutil
+import tempfile
+import unittest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+
+from pygame_cards import atlas, card_sprite, texture_cache
+
+CARD_JSON = {
+    "size": [26, 34],
+    "front_sprite_path": "img/cards/",
+    "back_sprite_file": "img/back-side.png"
+}
+
+
+class CardAtlasTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        pygame.display.init()
+        pygame.display.set_mode((1, 1))
+
+    @classmethod
+    def tearDownClass(cls):
+        pygame.display.quit()
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.card_json = dict(CARD_JSON, atlas_file=os.path.join(self.directory, "atlas.png"))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_build_and_install(self):
+        atlas.CardAtlas.build(self.card_json)
+        card_atlas = atlas.CardAtlas.load(self.card_json)
+        self.assertEqual(card_atlas.image.get_size(), (26 * 13, 34 * 5))
+        self.assertEqual(len(card_atlas.index["rects"]), 53)
+
+        textures = texture_cache.TextureCache()
+        card_atlas.install(textures)
+        back_path = card_sprite.get_img_full_path(CARD_JSON["back_sprite_file"])
+        back = textures.get(back_path, CARD_JSON["size"])
+        self.assertEqual(textures.misses, 0)  # Served from the atlas, not loaded from disk
+        self.assertEqual(back.get_parent(), card_atlas.image)
+        expected = pygame.transform.scale(pygame.image.load(back_path), CARD_JSON["size"])
+        self.assertEqual(back.get_at((13, 17)), expected.get_at((13, 17)))
+
+    def test_outdated_atlas(self):
+        atlas.CardAtlas.build(self.card_json)
+        resized = dict(self.card_json, size=[30, 40])
+        self.assertIsNone(atlas.CardAtlas.load(resized, rebuild=False))
+        self.assertEqual(atlas.CardAtlas.load(resized).index["size"], [30, 40])
+        self.assertIsNone(atlas.CardAtlas.load(dict(self.card_json, atlas_file="")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from benchmarks import __main__ as benchmarks_main
+from benchmarks import common
+
+
+def make_results(times):
+    return {"meta": {}, "results": dict((name, {"min": value, "median": value})
+                                        for name, value in times.items())}
+
+
+class BenchmarksTest(unittest.TestCase):
+    def test_measure(self):
+        calls = []
+        result = common.measure(lambda: calls.append(1), number=10, repeat=3,
+                                setup=lambda: calls.append(0))
+        self.assertEqual(calls.count(0), 3)
+        self.assertEqual(calls.count(1), 30)
+        self.assertEqual((result["number"], result["repeat"], result["unit"]), (10, 3, "us"))
+        self.assertLessEqual(result["min"], result["median"])
+
+    def test_compare(self):
+        baseline = make_results({"a": 100.0, "b": 100.0, "c": 100.0, "removed": 1.0})
+        current = make_results({"a": 124.0, "b": 126.0, "c": 50.0, "new": 1.0})
+        self.assertEqual(benchmarks_main.compare(current, baseline, 1.25), ["b"])
+        self.assertEqual(benchmarks_main.compare(current, baseline, 1.1), ["a", "b"])
+
+    def test_run(self):
+        current = benchmarks_main.run(["deck_build"])
+        self.assertEqual(sorted(current["results"]), ["deck_build.full", "deck_build.short"])
+        self.assertEqual(current["meta"]["seed"], common.SEED)
+        self.assertGreater(current["results"]["deck_build.full"]["min"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
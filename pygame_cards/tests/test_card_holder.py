@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+import unittest
+
+from pygame_cards import card_holder
+
+SIZE = 65, 85
+
+
+class FakeCard(object):
+    """ Records areas passed to render() """
+
+    def __init__(self, pos, rendered):
+        self.pos = pos
+        self.rendered = rendered
+
+    def get_rect(self):
+        return self.pos[0], self.pos[1], SIZE[0], SIZE[1]
+
+    def render(self, screen, area=None):
+        self.rendered.append((self, area))
+
+
+class OcclusionCullingTest(unittest.TestCase):
+    def setUp(self):
+        self.margin = card_holder.CardsHolder.occlusion_margin
+
+    def visible_area(self, dx, dy):
+        return card_holder.CardsHolder.get_visible_area((10, 10) + SIZE, (10 + dx, 10 + dy) + SIZE)
+
+    def test_visible_area(self):
+        margin = self.margin
+        self.assertEqual(self.visible_area(0, 0), (0, 0, 0, 0))
+        self.assertEqual(self.visible_area(0, 20), (0, 0, SIZE[0], 20 + margin))
+        self.assertEqual(self.visible_area(0, -20), (0, SIZE[1] - 20 - margin, SIZE[0], 20 + margin))
+        self.assertEqual(self.visible_area(15, 0), (0, 0, 15 + margin, SIZE[1]))
+        self.assertEqual(self.visible_area(-15, 0), (SIZE[0] - 15 - margin, 0, 15 + margin, SIZE[1]))
+
+    def test_rendered_completely(self):
+        # Closer than the margin, not overlapping or offset diagonally
+        for dx, dy in ((0, 1), (self.margin - 1, 0), (0, SIZE[1] - self.margin), (SIZE[0], 0),
+                       (10, 10)):
+            self.assertIsNone(self.visible_area(dx, dy))
+        self.assertIsNone(card_holder.CardsHolder.get_visible_area((0, 0, 65, 85), (0, 20, 70, 85)))
+
+    def render_all(self, positions):
+        holder = card_holder.CardsHolder()
+        holder.render_is_static = False
+        rendered = []
+        holder.cards.extend(FakeCard(pos, rendered) for pos in positions)
+        holder.render_all(None)
+        return [(holder.cards.index(card_), area) for card_, area in rendered]
+
+    def test_render_stack(self):
+        """ Of a run of cards at the same position only the top card is rendered, completely """
+        self.assertEqual(self.render_all([(0, 0)] * 13), [(12, None)])
+
+    def test_render_fanned_pile(self):
+        self.assertEqual(self.render_all([(0, 20), (0, 40), (0, 60)]),
+                         [(0, (0, 0, SIZE[0], 20 + self.margin)),
+                          (1, (0, 0, SIZE[0], 20 + self.margin)), (2, None)])
+        # The top card of a run is rendered completely even if the next card covers it partly
+        self.assertEqual(self.render_all([(0, 0), (0, 0), (0, 20), (0, 40)]),
+                         [(1, None), (2, (0, 0, SIZE[0], 20 + self.margin)), (3, None)])
+
+    def test_culling_disabled(self):
+        card_holder.CardsHolder.occlusion_culling = False
+        try:
+            self.assertEqual(self.render_all([(0, 0)] * 3), [(0, None), (1, None), (2, None)])
+        finally:
+            card_holder.CardsHolder.occlusion_culling = True
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+import random
+import unittest
+
+from pygame_cards import deck, enums
+
+RANKS = {"A": enums.Rank.ace, "T": enums.Rank.ten, "J": enums.Rank.jack, "Q": enums.Rank.queen,
+         "K": enums.Rank.king}
+SUITS = {"H": enums.Suit.hearts, "D": enums.Suit.diamonds, "C": enums.Suit.clubs,
+         "S": enums.Suit.spades}
+
+# Microsoft FreeCell deals, cards in the order they are dealt
+FREECELL_DEALS = {
+    1: "JD 2D 9H JC 5D 7H 7C 5H KD KC 9S 5S AD QC KH 3H 2S KS 9D QD JS AS AH 3C 4C 5C TS QH 4H AC "
+       "4D 7S 3S TD 4S TH 8H 2C JH 7D 6D 8S 8D QS 6C 3D 8C TC 6S 9C 2H 6H",
+    617: "7D AD 5C 3S 5S 8C 2D AH TD 7S QD AC 6D 8H AS KH TH QC 3H 9D 6S 8D 3D TC KD 5H 9S 3C 8S "
+         "7H 4D JS 4C QS 9C 9H 7C 6H 2C 2S 4S TS 2H 5D JC 6C JH QH JD KS KC 4H"
+}
+
+
+def parse_cards(text):
+    """ Converts cards like "TD" to card codes """
+    return [(RANKS[name[0]] if name[0] in RANKS else int(name[0])) << 2 | SUITS[name[1]]
+            for name in text.split()]
+
+
+class DeckTest(unittest.TestCase):
+    def test_freecell_deals(self):
+        for number, cards in FREECELL_DEALS.items():
+            self.assertEqual(deck.Deck.deal_permutation(number), parse_cards(cards))
+
+    def test_set_deal(self):
+        deck_ = deck.Deck(enums.DeckType.full, (0, 0), (0, 0))
+        deck_.set_deal(1)
+        self.assertEqual([card_.code for card_ in reversed(deck_.cards)],
+                         parse_cards(FREECELL_DEALS[1]))
+
+    def test_seeded_shuffle(self):
+        first = deck.Deck(enums.DeckType.full, (0, 0), (0, 0), rng=2016)
+        second = deck.Deck(enums.DeckType.full, (0, 0), (0, 0), rng=random.Random(2016))
+        first.shuffle()
+        second.shuffle()
+        self.assertEqual(first.get_permutation(), second.get_permutation())
+
+    def test_permutation_round_trip(self):
+        deck_ = deck.Deck(enums.DeckType.short, (0, 0), (1, 0), rng=1)
+        deck_.shuffle()
+        permutation = deck_.get_permutation()
+        other = deck.Deck(enums.DeckType.short, (0, 0), (1, 0))
+        other.set_permutation(permutation)
+        self.assertEqual(other.get_permutation(), permutation)
+        self.assertEqual([card_.pos for card_ in other.cards], [(i, 0) for i in range(36)])
+
+    def test_invalid_permutation(self):
+        deck_ = deck.Deck(enums.DeckType.short, (0, 0), (0, 0))
+        with self.assertRaises(ValueError):
+            deck_.set_permutation(deck.Deck.deal_permutation(1))  # Full deck
+        with self.assertRaises(ValueError):
+            deck_.set_permutation(deck_.get_permutation()[1:])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+import os
+import sys
+import unittest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+KLONDIKE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "examples",
+                            "klondike")
+sys.path.insert(0, KLONDIKE_DIR)
+import main as klondike
+import pygame
+from pygame_cards import game_app
+
+
+class HeadlessGameAppTest(unittest.TestCase):
+    def setUp(self):
+        self.app = game_app.GameApp(json_path=os.path.join(KLONDIKE_DIR, "settings.json"),
+                                    game_controller=klondike.KlondikeController(), headless=True)
+        pygame.event.clear()
+
+    def test_execute_returns(self):
+        app = self.app
+        self.assertIsNot(app.screen, pygame.display.get_surface())
+        app.execute()
+        self.assertFalse(app.stopped)
+        self.assertEqual(app.render(), [])
+
+    def test_scheduled_callbacks_use_virtual_clock(self):
+        app = self.app
+        app.init_game()
+        calls = []
+        app.scheduler.call_later(60, lambda: calls.append(app.get_headless_time()))
+        label = app.gui_interface.show_label((0, 0), "label", timeout=3)
+        app.run_headless()
+        self.assertEqual(calls, [60])
+        self.assertTrue(label.expired)
+
+    def test_periodic_callbacks_and_quit(self):
+        app = self.app
+        app.init_game()
+        calls = []
+        app.scheduler.call_every(1, lambda: calls.append(app.get_headless_time()))
+        self.assertEqual(app.run_headless(until=lambda: len(calls) == 5), 6)
+        self.assertEqual(calls, [1, 2, 3, 4, 5])
+        self.assertEqual(app.run_headless(max_steps=2), 2)
+
+        pygame.event.post(pygame.event.Event(pygame.QUIT))
+        app.run_headless(until=lambda: False)
+        self.assertTrue(app.stopped)
+        self.assertEqual(app.run_headless(max_steps=1), 0)
+
+    def test_posted_mouse_events(self):
+        app = self.app
+        app.init_game()
+        stock = app.game_controller.custom_dict["deck"]
+        pos = (stock.pos[0] + 5, stock.pos[1] + 5)
+        count = len(stock.cards)
+        pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1))
+        pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONUP, pos=pos, button=1))
+        app.run_headless()
+        self.assertLess(len(stock.cards), count)
+
+
+if __name__ == '__main__':
+    unittest.main()
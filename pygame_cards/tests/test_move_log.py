@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+import unittest
+
+from pygame_cards import card_holder, deck, enums, move_log
+
+
+def contents(holders):
+    return [[(card_.code, card_.back_up) for card_ in holder.cards] for holder in holders]
+
+
+class MoveLogTest(unittest.TestCase):
+    def setUp(self):
+        self.deck = deck.Deck(enums.DeckType.full, (0, 0), (0, 0), rng=3)
+        self.deck.shuffle()
+        self.discard = card_holder.CardsHolder((100, 0), (0, 0))
+        self.pile = card_holder.CardsHolder((200, 0), (0, 20))
+        self.temp = card_holder.CardsHolder()  # Not logged, like grabbed cards
+        self.holders = [self.deck, self.discard, self.pile]
+
+    def tearDown(self):
+        card_holder.CardsHolder.move_log = None
+
+    def start_log(self, **kwargs):
+        log = move_log.MoveLog(self.holders, **kwargs)
+        card_holder.CardsHolder.move_log = log
+        return log
+
+    def draw_card(self, log):
+        """ Action: moves the top card of the deck face up to the discard pile """
+        self.discard.add_card(self.deck.pop_top_card())
+        self.discard.flip_card()
+        log.end_action()
+
+    def test_undo_redo(self):
+        log = self.start_log()
+        states = [contents(self.holders)]
+        for _ in range(3):
+            self.draw_card(log)
+            states.append(contents(self.holders))
+        # A card passes through a holder that isn't logged
+        self.temp.add_card(self.discard.pop_top_card())
+        self.pile.add_card(self.temp.pop_top_card())
+        log.end_action()
+        states.append(contents(self.holders))
+
+        for state in reversed(states[:-1]):
+            self.assertTrue(log.undo())
+            self.assertEqual(contents(self.holders), state)
+        self.assertFalse(log.undo())
+        for state in states[1:]:
+            self.assertTrue(log.redo())
+            self.assertEqual(contents(self.holders), state)
+        self.assertFalse(log.redo())
+
+    def test_new_action_drops_redo(self):
+        log = self.start_log()
+        self.draw_card(log)
+        self.draw_card(log)
+        log.undo()
+        self.discard.move_all_cards(self.pile, False)
+        log.end_action()
+        state = contents(self.holders)
+        self.assertFalse(log.can_redo())
+        log.undo()
+        log.redo()
+        self.assertEqual(contents(self.holders), state)
+
+    def test_undo_across_compaction(self):
+        log = self.start_log(capacity=32, checkpoint_interval=2)
+        states = [contents(self.holders)]
+        for _ in range(40):
+            self.draw_card(log)
+            states.append(contents(self.holders))
+        self.assertLessEqual(len(log), 32)
+
+        undone = 0
+        while log.undo():
+            undone += 1
+            self.assertEqual(contents(self.holders), states[-1 - undone])
+        self.assertGreater(undone, 0)
+        self.assertLess(undone, 40)  # The oldest actions were dropped
+        for state in states[len(states) - undone:]:
+            self.assertTrue(log.redo())
+            self.assertEqual(contents(self.holders), state)
+
+    def test_checkpoint_restores_unlogged_changes(self):
+        log = self.start_log()
+        self.draw_card(log)
+        state = contents(self.holders)
+        self.draw_card(log)
+        # Not logged: the discarded card doesn't match the record of the last action
+        self.discard.cards[-1], self.deck.cards[-1] = self.deck.cards[-1], self.discard.cards[-1]
+        self.assertTrue(log.undo())
+        self.assertEqual(contents(self.holders), state)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+import os
+import sys
+import random
+import shutil
+import tempfile
+import unittest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+KLONDIKE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "examples",
+                            "klondike")
+sys.path.insert(0, KLONDIKE_DIR)
+import main as klondike
+from pygame_cards import game_app, replay
+
+
+class ReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "session.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @staticmethod
+    def create_app():
+        return game_app.GameApp(json_path=os.path.join(KLONDIKE_DIR, "settings.json"),
+                                game_controller=klondike.KlondikeController(), headless=True)
+
+    def test_record_and_replay(self):
+        clicks = random.Random(1)
+        app = self.create_app()
+        app.start_recording(self.path, 2016)
+        app.init_game()
+        deal = app.game_controller.save_state()
+        for _ in range(40):
+            pos = (clicks.randrange(570), clicks.randrange(460))
+            with app.state_lock:
+                app.process_mouse_event(True, False, pos)
+                app.process_mouse_event(False, False, pos)
+        app.stop_recording()
+
+        recording = replay.Recording(self.path)
+        self.assertEqual(recording.seed, 2016)
+        self.assertEqual(len(recording.events), 80)
+
+        global_state = random.getstate()
+        other = self.create_app()
+        result = replay.replay(other, self.path)
+        self.assertTrue(result.state_matched)
+        self.assertEqual(result.get_report()["events"], 80)
+        self.assertEqual(random.getstate(), global_state)  # Decks have their own generator
+
+        another = self.create_app()
+        another.seed_decks(2016)
+        another.init_game()
+        self.assertEqual(another.game_controller.save_state(), deal)
+
+    def test_invalid_recording(self):
+        with open(self.path, "w", encoding="utf-8") as file_:
+            file_.write('{"format": "other"}\n')
+        with self.assertRaises(ValueError):
+            replay.Recording(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
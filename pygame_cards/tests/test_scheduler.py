@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+import unittest
+
+from pygame_cards import scheduler
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class SchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = scheduler.Scheduler(clock=self.clock)
+        self.calls = []
+
+    def test_cancel_from_callback(self):
+        """ Compaction triggered by a callback must not rerun due tasks or lose periodic tasks """
+        pending = [self.scheduler.call_later(10, lambda: self.calls.append('pending'))
+                   for _ in range(4)]
+
+        def cancel_pending():
+            self.calls.append('cancel')
+            for task in pending:
+                self.scheduler.cancel(task)
+
+        self.scheduler.call_later(1, cancel_pending)
+        self.scheduler.call_later(1, lambda: self.calls.append('once'))
+        self.scheduler.call_every(1, lambda: self.calls.append('every'))
+
+        self.clock.now = 1.0
+        self.assertEqual(self.scheduler.run_due(), 3)
+        self.assertEqual(sorted(self.calls), ['cancel', 'every', 'once'])
+        self.assertEqual(len(self.scheduler), 1)
+
+        del self.calls[:]
+        self.clock.now = 2.0
+        self.assertEqual(self.scheduler.run_due(), 1)
+        self.assertEqual(self.calls, ['every'])
+
+        del self.calls[:]
+        self.clock.now = 20.0
+        self.scheduler.run_due()
+        self.assertEqual(self.calls, ['every'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+import unittest
+
+from pygame_cards import card_holder, deck, enums, serialization
+
+
+def contents(holders):
+    return [[(card_.code, card_.back_up) for card_ in holder.cards] for holder in holders]
+
+
+class SerializationTest(unittest.TestCase):
+    def setUp(self):
+        self.deck = deck.Deck(enums.DeckType.full, (0, 0), (0, 0), rng=7)
+        self.deck.shuffle()
+        self.piles = [card_holder.CardsHolder((100 * i, 100), (0, 20)) for i in range(3)]
+        for i, pile in enumerate(self.piles):
+            for _ in range(i + 1):
+                pile.add_card(self.deck.pop_top_card())
+            pile.flip_card()
+        self.holders = [self.deck] + self.piles
+
+    def test_round_trip(self):
+        expected = contents(self.holders)
+        data = serialization.encode(self.holders)
+        self.assertEqual(len(data), 4 + 1 + 2 + 2 * len(self.holders) + 52)
+
+        cards = set(id(card_) for holder in self.holders for card_ in holder.cards)
+        self.deck.move_all_cards(self.piles[0])
+        serialization.restore(data, self.holders)
+        self.assertEqual(contents(self.holders), expected)
+        # Cards are reused rather than created
+        self.assertEqual(set(id(card_) for holder in self.holders for card_ in holder.cards),
+                         cards)
+
+    def test_restore_creates_missing_cards(self):
+        data = serialization.encode(self.holders)
+        empty = [card_holder.CardsHolder() for _ in self.holders]
+        serialization.restore(data, empty)
+        self.assertEqual(contents(empty), contents(self.holders))
+
+    def test_decode(self):
+        decoded = serialization.decode(serialization.encode(self.piles))
+        self.assertEqual([len(content) for content in decoded], [1, 2, 3])
+        top = self.piles[2].cards[-1]
+        self.assertEqual(decoded[2][-1], top.code | serialization.FACE_UP)
+        self.assertEqual(decoded[2][0], self.piles[2].cards[0].code)
+
+    def test_invalid_data(self):
+        data = serialization.encode(self.holders)
+        for invalid in (data[:3], b"XXXX" + data[4:], data[:4] + b"\x02" + data[5:], data[:-1]):
+            with self.assertRaises(ValueError):
+                serialization.decode(invalid)
+        with self.assertRaises(ValueError):
+            serialization.restore(data, self.piles)
+
+
+if __name__ == '__main__':
+    unittest.main()
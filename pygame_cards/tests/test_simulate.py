@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..",
+                                "examples", "klondike"))
+import simulate
+
+
+class SimulateTest(unittest.TestCase):
+    def test_play_deal_is_reproducible(self):
+        for policy in ("greedy", "random"):
+            policy_class = simulate.get_policy_class(policy)
+            first = simulate.play_deal(617, 3, policy_class)
+            self.assertEqual(simulate.play_deal(617, 3, policy_class), first)
+            self.assertEqual((first["deal"], first["draw"]), (617, 3))
+            self.assertLessEqual(first["moves"], 1000)
+
+    def test_get_policy_class(self):
+        self.assertIs(simulate.get_policy_class("greedy"), simulate.GreedyPolicy)
+        self.assertIs(simulate.get_policy_class("simulate:RandomPolicy"), simulate.RandomPolicy)
+
+    def test_statistics(self):
+        statistics = simulate.Statistics()
+        for result in simulate.play_chunk(1, 5, [1, 3], "greedy", 1000):
+            statistics.add(result)
+        self.assertEqual(statistics.games, {1: 5, 3: 5})
+        self.assertIn("draw 1: 5 deals", statistics.report())
+
+    def test_simulate(self):
+        directory = tempfile.mkdtemp()
+        try:
+            output = os.path.join(directory, "results.jsonl")
+            statistics = simulate.simulate(1, 6, [3], "greedy", 2, output, chunk_size=2)
+            with open(output, encoding="utf-8") as results_file:
+                results = [json.loads(line) for line in results_file]
+            self.assertEqual(sorted(result["deal"] for result in results), list(range(1, 7)))
+            self.assertEqual(statistics.wins[3], sum(1 for result in results if result["won"]))
+            policy_class = simulate.get_policy_class("greedy")
+            for result in results:
+                self.assertEqual(result, simulate.play_deal(result["deal"], 3, policy_class))
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+import os
+import sys
+import random
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..",
+                                "examples", "klondike"))
+import solver
+from pygame_cards import deck, enums
+
+
+def snapshot(state):
+    return ([list(pile) for pile in state.piles], list(state.face_down), list(state.deck),
+            list(state.discard), list(state.stack), list(state.foundations), state.key)
+
+
+def code(rank, suit):
+    return rank << 2 | suit
+
+
+class KlondikeStateTest(unittest.TestCase):
+    def test_from_permutation(self):
+        permutation = deck.Deck.deal_permutation(1)
+        state = solver.KlondikeState.from_permutation(permutation)
+        self.assertEqual([len(pile) for pile in state.piles], list(range(1, 8)))
+        self.assertEqual(state.face_down, list(range(7)))
+        self.assertEqual(state.piles[0], permutation[:1])
+        self.assertEqual(state.deck[-1], permutation[28])  # The next card to draw
+        self.assertEqual(len(state.deck), 24)
+
+    def test_apply_undo_keeps_zobrist_key(self):
+        """ Incrementally updated key matches the key calculated from scratch, undo restores
+        the state exactly
+        """
+        rng = random.Random(2016)
+        for deal_number, draw_count in ((1, 3), (617, 1), (11982, 3)):
+            state = solver.KlondikeState.from_permutation(
+                deck.Deck.deal_permutation(deal_number), draw_count)
+            history = []
+            for _ in range(150):
+                moves = state.get_moves()
+                if len(moves) == 0:
+                    break
+                move = rng.choice(moves)
+                history.append((move, snapshot(state), state.apply(move)))
+                self.assertEqual(state.key, state.calc_key(), move)
+            for move, before, undo in reversed(history):
+                state.undo(move, undo)
+                self.assertEqual(snapshot(state), before, move)
+
+    def test_copy_is_independent(self):
+        state = solver.KlondikeState.from_permutation(deck.Deck.deal_permutation(1))
+        copy = state.copy()
+        copy.apply((solver.DRAW, -1, -1, -1))
+        self.assertEqual(copy.key, copy.calc_key())
+        self.assertNotEqual(copy.key, state.key)
+        self.assertEqual(len(state.stack), 0)
+
+
+class SolverTest(unittest.TestCase):
+    @staticmethod
+    def make_endgame():
+        """ All cards are on foundations, except kings and queens of spades and hearts,
+        which are in piles
+        """
+        piles = [[code(enums.Rank.king, enums.Suit.spades),
+                  code(enums.Rank.queen, enums.Suit.hearts)],
+                 [code(enums.Rank.king, enums.Suit.hearts)],
+                 [code(enums.Rank.queen, enums.Suit.spades)], [], [], [], []]
+        return solver.KlondikeState(piles, [0] * 7, [], [], [], [11, 13, 13, 11])
+
+    def test_auto_complete(self):
+        state = self.make_endgame()
+        before = snapshot(state)
+        moves = solver.Solver(time_budget=5.0, table_bits=10).auto_complete(state)
+        self.assertEqual(snapshot(state), before)  # The state is not modified
+        self.assertIsNotNone(moves)
+        for move in moves:
+            state.apply(move)
+        self.assertTrue(state.is_won())
+
+    def test_hint(self):
+        state = self.make_endgame()
+        move, result = solver.Solver(time_budget=5.0, table_bits=10).hint(state)
+        self.assertEqual(result.status, solver.Solver.won)
+        self.assertEqual(move, result.moves[0])
+        self.assertIn(move, state.get_moves())
+
+
+if __name__ == '__main__':
+    unittest.main()
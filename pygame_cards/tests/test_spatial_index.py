@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+import unittest
+
+from pygame_cards import card, card_holder, card_sprite, enums, spatial_index
+
+CARD_JSON = {"size": [65, 85]}
+
+
+class SpatialIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.saved = card_holder.CardsHolder.card_json, card_sprite.CardSprite.card_json
+        card_holder.CardsHolder.card_json = CARD_JSON
+        card_sprite.CardSprite.card_json = CARD_JSON
+        self.index = spatial_index.SpatialIndex()
+        self.pile = card_holder.CardsHolder((0, 0), (0, 20))
+        self.other = card_holder.CardsHolder((300, 0), (0, 0))
+        for rank in range(enums.Rank.two, enums.Rank.seven):
+            self.pile.add_card(card.Card(enums.Suit.hearts, rank, (0, 0)))
+        self.index.add(self.pile)
+        self.index.add(self.other)
+
+    def tearDown(self):
+        card_holder.CardsHolder.card_json, card_sprite.CardSprite.card_json = self.saved
+
+    def test_holders_at(self):
+        # The pile spans 5 cards with offset 20: (0, 0, 65, 165)
+        self.assertEqual(self.index.holders_at((10, 160)), [self.pile])
+        self.assertEqual(self.index.holders_at((10, 170)), [])
+        self.assertEqual(self.index.holders_at((310, 10)), [self.other])
+        self.assertEqual(self.index.query_rect((50, 50, 300, 10)), [self.pile, self.other])
+
+    def test_bounds_are_updated(self):
+        self.other.add_card(self.pile.pop_top_card())
+        self.assertEqual(self.index.holders_at((10, 160)), [])
+        self.other.pos = (0, 200)
+        self.other.update_position(self.other.offset)
+        self.assertEqual(self.index.holders_at((10, 210)), [self.other])
+        self.assertEqual(self.index.holders_at((310, 10)), [])
+
+    def test_card_at(self):
+        holder, card_ = self.index.card_at((10, 70))
+        self.assertIs(holder, self.pile)
+        self.assertIs(card_, self.pile.cards[3])  # Topmost card at the point
+        self.assertEqual(self.index.card_at((310, 10)), (None, None))  # Empty pocket
+        self.assertIs(self.index.holder_at((310, 10)), self.other)
+
+    def test_drop_targets_for(self):
+        # Only the top card of a holder (or its empty pocket) is a drop target
+        self.assertEqual(self.index.drop_targets_for((30, 0, 65, 50)), [])
+        self.assertEqual(self.index.drop_targets_for((30, 50, 300, 85)), [self.pile, self.other])
+
+    def test_remove(self):
+        self.index.remove(self.pile)
+        self.assertIsNone(self.pile.spatial_index)
+        self.assertEqual(self.index.holders_at((10, 10)), [])
+        self.pile.add_card(card.Card(enums.Suit.spades, enums.Rank.ace, (0, 0)))
+
+
+if __name__ == '__main__':
+    unittest.main()
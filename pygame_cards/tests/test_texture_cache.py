@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+import os
+import shutil
+import tempfile
+import unittest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+
+from pygame_cards import texture_cache
+
+
+def make_image(directory, name, alpha):
+    """ Saves a 4x4 image which first pixel has alpha, other pixels are opaque.
+    :return: path to the image
+    """
+    surface = pygame.Surface((4, 4), pygame.SRCALPHA)
+    surface.fill((10, 20, 30, 255))
+    surface.set_at((0, 0), (10, 20, 30, alpha))
+    path = os.path.join(directory, name)
+    pygame.image.save(surface, path)
+    return path
+
+
+class TextureCacheTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        pygame.display.init()
+        pygame.display.set_mode((1, 1))
+        cls.directory = tempfile.mkdtemp()
+        cls.opaque_path = make_image(cls.directory, "opaque.png", 255)
+        cls.alpha_path = make_image(cls.directory, "alpha.png", 100)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+        pygame.display.quit()
+
+    def setUp(self):
+        self.cache = texture_cache.TextureCache()
+
+    def test_surfaces_are_shared(self):
+        first = self.cache.get(self.opaque_path, (8, 8))
+        self.assertIs(self.cache.get(self.opaque_path, (8, 8)), first)
+        self.assertEqual(first.get_size(), (8, 8))
+        self.assertIsNot(self.cache.get(self.opaque_path, (4, 4)), first)
+        stats = self.cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 2, 2))
+        self.assertEqual(stats["bytes"], first.get_pitch() * 8 + 4 * 4 * 4)
+
+    def test_evict(self):
+        self.cache.preload([self.opaque_path, self.alpha_path], (4, 4))
+        self.cache.get(self.opaque_path, (8, 8))
+        self.assertEqual(self.cache.evict(size=(4, 4)), 2)
+        self.assertEqual(self.cache.get_stats()["entries"], 1)
+        self.assertEqual(self.cache.evict(path=self.opaque_path), 1)
+        self.assertEqual(self.cache.get_stats()["bytes"], 0)
+        self.cache.get(self.opaque_path, (8, 8))
+        self.assertEqual(self.cache.misses, 2)  # preload() is not counted
+
+    def test_add_subsurface(self):
+        parent = pygame.Surface((8, 4))
+        self.cache.add("card.png", (4, 4), parent.subsurface((4, 0, 4, 4)), size_bytes=0)
+        self.cache.add("card.png", (4, 4), parent.subsurface((0, 0, 4, 4)), size_bytes=0)
+        self.assertEqual(self.cache.get_stats()["entries"], 1)
+        self.assertEqual(self.cache.bytes, 0)
+        self.assertEqual(self.cache.get("card.png", (4, 4)).get_offset(), (0, 0))
+
+
+class PixelFormatTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        pygame.display.init()
+        pygame.display.set_mode((1, 1))
+
+    @classmethod
+    def tearDownClass(cls):
+        pygame.display.quit()
+
+    def tearDown(self):
+        texture_cache.TextureCache.alpha_tolerance = 0
+        texture_cache.TextureCache.premultiply = False
+
+    @staticmethod
+    def make_surface(*alphas):
+        """ Creates a 4x4 surface with per-pixel alpha, the first pixels have the alphas """
+        surface = pygame.Surface((4, 4), pygame.SRCALPHA)
+        surface.fill((10, 20, 30, 255))
+        for i, alpha in enumerate(alphas):
+            surface.set_at((i, 0), (10, 20, 30, alpha))
+        return surface
+
+    def test_detect_pixel_format(self):
+        detect = texture_cache.TextureCache.detect_pixel_format
+        self.assertEqual(detect(self.make_surface()), "opaque")
+        self.assertEqual(detect(self.make_surface(0, 0)), "colorkey")
+        self.assertEqual(detect(self.make_surface(0, 100)), "alpha")
+        self.assertEqual(detect(self.make_surface(0, 100), tolerance=1), "colorkey")
+        self.assertEqual(detect(pygame.Surface((4, 4))), "opaque")
+
+    def test_colorkey_color_is_not_used_by_opaque_pixels(self):
+        surface = self.make_surface(0)
+        surface.set_at((3, 3), texture_cache.TextureCache.colorkey + (255,))
+        self.assertEqual(texture_cache.TextureCache.detect_pixel_format(surface), "alpha")
+
+    def test_resolve_pixel_format(self):
+        resolve = texture_cache.TextureCache.resolve_pixel_format
+        surface = self.make_surface(0, 100)
+        self.assertEqual(resolve(surface, "opaque"), "opaque")
+        self.assertEqual(resolve(surface, "auto"), "alpha")
+        texture_cache.TextureCache.premultiply = True
+        self.assertEqual(resolve(surface, "auto"), "premultiplied")
+        texture_cache.TextureCache.alpha_tolerance = 1
+        self.assertEqual(resolve(surface, "auto"), "colorkey")
+
+    def test_convert_colorkey(self):
+        converted = texture_cache.TextureCache.convert_surface(self.make_surface(0, 100), "colorkey")
+        self.assertEqual(converted.get_colorkey()[:3], texture_cache.TextureCache.colorkey)
+        self.assertEqual(converted.get_at((0, 0))[:3], texture_cache.TextureCache.colorkey)
+        self.assertEqual(converted.get_at((1, 0))[:3], texture_cache.TextureCache.colorkey)
+        self.assertEqual(converted.get_at((3, 3))[:3], (10, 20, 30))
+
+    def test_auto_format_is_reported(self):
+        directory = tempfile.mkdtemp()
+        try:
+            opaque_path = make_image(directory, "opaque.png", 255)
+            alpha_path = make_image(directory, "alpha.png", 100)
+            cache = texture_cache.TextureCache()
+            cache.preload([opaque_path, alpha_path], (4, 4), "auto")
+            self.assertEqual(cache.get_format(opaque_path, (4, 4), "auto"), "opaque")
+            self.assertEqual(cache.get_format(alpha_path, (4, 4), "auto"), "alpha")
+            self.assertEqual(cache.get_stats()["formats"], {"opaque": 1, "alpha": 1})
+            with self.assertRaises(ValueError):
+                cache.get(opaque_path, (4, 4), "unknown")
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()